@@ -1,24 +1,44 @@
 """
 Backend del proyecto - Lógica de modelos y predicciones.
+
+Los nombres públicos se importan al primer uso (PEP 562): ``import backend``
+no carga pandas, scikit-learn ni los modelos hasta que se necesitan.
 """
 
-from .model_loader import load_model, load_preprocessor, model_exists
-from .predictors import (
-    predict_logistic_regression,
-    predict_knn,
-    predict_kmeans,
-    prepare_telco_input,
-    prepare_credit_card_input
-)
-
-__all__ = [
-    'load_model',
-    'load_preprocessor',
-    'model_exists',
-    'predict_logistic_regression',
-    'predict_knn',
-    'predict_kmeans',
-    'prepare_telco_input',
-    'prepare_credit_card_input'
-]
+import importlib
+
+
+# Nombre público -> submódulo que lo define
+_EXPORTS = {
+    'load_model': 'model_loader',
+    'load_preprocessor': 'model_loader',
+    'model_exists': 'model_loader',
+    'get_model': 'model_loader',
+    'reload_model': 'model_loader',
+    'warm_up_models': 'model_loader',
+    'predict_logistic_regression': 'predictors',
+    'predict_logistic_regression_batch': 'predictors',
+    'predict_knn': 'predictors',
+    'predict_knn_batch': 'predictors',
+    'predict_kmeans': 'predictors',
+    'predict_kmeans_batch': 'predictors',
+    'prepare_telco_input': 'predictors',
+    'prepare_credit_card_input': 'predictors',
+    'prepare_telco_frame': 'predictors',
+    'prepare_credit_card_frame': 'predictors',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,164 +4,537 @@ Se utiliza FastAPI para permitir que el frontend (Streamlit)
 consuma los modelos a través de peticiones POST.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-
-from predictors import (
-    predict_logistic_regression,
-    predict_knn,
-    predict_kmeans,
-    prepare_telco_input,
-    prepare_credit_card_input,
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import create_model
+
+from .bulk import (
+    BULK_MODELS,
+    DEFAULT_CHUNK_SIZE,
+    INPUT_FORMATS,
+    OUTPUT_FORMATS,
+    BulkStats,
+    detect_input_format,
+    iter_input_chunks,
+    score_chunk_text,
+)
+from .columnar import (
+    ARROW_STREAM_TYPE,
+    NPY_TYPE,
+    ColumnarFormatError,
+    read_arrow_table,
+    read_npy_matrix,
+    table_columns,
+    write_arrow_stream,
+    write_npy,
 )
+from .executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+from .feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+from .metrics import (
+    CONTENT_TYPE,
+    METRICS_ENABLED,
+    MetricsMiddleware,
+    count_error,
+    executor_metrics,
+    instrumented,
+    microbatch_metrics,
+    model_metrics,
+    observe_batch_size,
+    render_metrics,
+    result_cache_metrics,
+    stage,
+)
+from .microbatch import MICROBATCH_ENABLED, MicroBatcher
+from .model_loader import registry_status
+from .result_cache import RESULT_CACHE_ENABLED, ResultCache
+from .shared_weights import SHARED_WEIGHTS, shared_weights_status
+from .warmup import ReadinessTracker, run_startup
+from .wire import CompactFormatError, FastJSONResponse, compact_response, parse_compact_batch
+
+
+# Número máximo de registros aceptados por los endpoints /batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# Con Arrow o .npy no se crea un objeto por registro, así que el límite es mayor
+MAX_COLUMNAR_BATCH_SIZE = int(os.getenv("MAX_COLUMNAR_BATCH_SIZE", "1000000"))
+
+
+def _call_predictor(function_name, *args):
+    """
+    Llama a una función de predictors.py. El módulo (y con él pandas) se importa
+    en el primer uso, para que el proceso arranque sin esperarlo.
+    """
+    from . import predictors
+    return getattr(predictors, function_name)(*args)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los modelos se cargan y calientan en segundo plano (ver warmup.py): "/" y
+    # /health/live responden desde el primer momento, /health/ready solo cuando
+    # todos los modelos están listos
+    app.state.readiness = ReadinessTracker()
+    threading.Thread(target=run_startup, args=(app.state.readiness,),
+                     name="model-warm-up", daemon=True).start()
+    
+    # Pool de inferencia con límites por modelo (ver executor.py)
+    app.state.executor = InferenceExecutor.from_env()
+    
+    # Resultados de peticiones individuales repetidas (ver result_cache.py)
+    app.state.result_cache = ResultCache.from_env() if RESULT_CACHE_ENABLED else None
+    
+    # Agrupar peticiones individuales concurrentes en lotes (ver microbatch.py)
+    app.state.batchers = {}
+    if MICROBATCH_ENABLED:
+        executor = app.state.executor
+        app.state.batchers = {
+            "logistic": MicroBatcher(
+                lambda records, threshold: executor.run(
+                    "logistic", _call_predictor, "predict_logistic_regression_batch", records, threshold)
+            ),
+            "knn": MicroBatcher(
+                lambda records: executor.run("knn", _call_predictor, "predict_knn_batch", records)
+            ),
+        }
+    yield
+    app.state.executor.shutdown()
 
 
 app = FastAPI(
     title="Machine Learning API",
     description="API para exponer los modelos de Regresión Logística, KNN y K-Means",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Latencia por endpoint y por etapa (ver metrics.py); sin métricas no se instala
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
-class TelcoRequest(BaseModel):
-    gender: str
-    senior_citizen: str = Field(..., alias="senior_citizen")
-    partner: str
-    dependents: str
-    tenure: int
-    phone_service: str
-    multiple_lines: str
-    internet_service: str
-    online_security: str
-    online_backup: str
-    device_protection: str
-    tech_support: str
-    streaming_tv: str
-    streaming_movies: str
-    contract: str
-    paperless_billing: str
-    payment_method: str
-    monthly_charges: float
-    total_charges: float
-
-
-class CreditCardRequest(BaseModel):
-    BALANCE: float
-    BALANCE_FREQUENCY: float
-    PURCHASES: float
-    ONEOFF_PURCHASES: float
-    INSTALLMENTS_PURCHASES: float
-    CASH_ADVANCE: float
-    PURCHASES_FREQUENCY: float
-    ONEOFF_PURCHASES_FREQUENCY: float
-    PURCHASES_INSTALLMENTS_FREQUENCY: float
-    CASH_ADVANCE_FREQUENCY: float
-    CASH_ADVANCE_TRX: int
-    PURCHASES_TRX: int
-    CREDIT_LIMIT: float
-    PAYMENTS: float
-    MINIMUM_PAYMENTS: float
-    PRC_FULL_PAYMENT: float
-    TENURE: int
+
+def _request_model(name, schema):
+    """Modelo de Pydantic con un campo obligatorio por variable del esquema."""
+    return create_model(name, **{field.name: (field.python_type, ...) for field in schema.fields})
+
+
+TelcoRequest = _request_model("TelcoRequest", TELCO_SCHEMA)
+CreditCardRequest = _request_model("CreditCardRequest", CREDIT_CARD_SCHEMA)
+
+
+def _check_batch_size(size: int, limit: int = MAX_BATCH_SIZE):
+    if size > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo permitido de {limit} registros",
+        )
 
 
 @app.get("/")
 def read_root():
-    return {"status": "ok", "message": "Machine Learning API operativa"}
+    return {
+        "status": "ok",
+        "message": "Machine Learning API operativa",
+        "ready": app.state.readiness.is_ready(),
+    }
 
 
-@app.post("/predict/logistic")
-def predict_logistic(request: TelcoRequest):
+@app.get("/health/live")
+def health_live():
+    """El proceso está vivo y atiende peticiones (no indica que los modelos estén listos)."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """
+    Estado de carga y calentamiento de cada modelo. Responde 503 hasta que
+    todos los modelos están listos, para que el balanceador no envíe tráfico antes.
+    """
+    snapshot = app.state.readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+# Los lotes se convierten por columnas (ver feature_schema.py), sin un diccionario por registro
+def _score_logistic_requests(requests, threshold):
+    with stage("logistic", "prepare"):
+        columns = TELCO_SCHEMA.map_objects(requests)
+    return _call_predictor("predict_logistic_regression_batch", columns, threshold)
+
+
+def _score_knn_requests(requests):
+    with stage("knn", "prepare"):
+        columns = TELCO_SCHEMA.map_objects(requests)
+    return _call_predictor("predict_knn_batch", columns)
+
+
+def _score_kmeans_requests(requests):
+    with stage("kmeans", "prepare"):
+        columns = CREDIT_CARD_SCHEMA.map_objects(requests)
+    return _call_predictor("predict_kmeans_batch", columns)
+
+
+def _score_ensemble_requests(requests, threshold, logistic_weight):
+    with stage("ensemble", "prepare"):
+        columns = TELCO_SCHEMA.map_objects(requests)
+    return _call_predictor("predict_churn_ensemble_batch", columns, threshold, logistic_weight)
+
+
+# Modelo -> (esquema de entrada, función por columnas de predictors.py) del formato compacto
+COMPACT_MODELS = {
+    "logistic": (TELCO_SCHEMA, "predict_logistic_regression_columns"),
+    "knn": (TELCO_SCHEMA, "predict_knn_columns"),
+    "kmeans": (CREDIT_CARD_SCHEMA, "predict_kmeans_columns"),
+}
+
+
+def _score_compact(model_name, columns, *options):
+    schema, function_name = COMPACT_MODELS[model_name]
+    with stage(model_name, "prepare"):
+        columns = schema.map_columns(columns)
+    return _call_predictor(function_name, columns, *options)
+
+
+def _score_columnar(model_name, data, *options):
+    """Puntúa una tabla Arrow o, en K-Means, la matriz de un .npy (ver columnar.py)."""
+    if model_name == "kmeans" and not hasattr(data, "column_names"):
+        return _call_predictor("predict_kmeans_matrix", data)
+    schema, function_name = COMPACT_MODELS[model_name]
+    with stage(model_name, "prepare"):
+        columns = table_columns(data, schema)
+    return _call_predictor(function_name, columns, *options)
+
+
+async def _run_inference(model_name, fn, *args):
+    """Ejecuta la inferencia en el pool y traduce sus errores a respuestas HTTP."""
+    return await _await_inference(model_name, app.state.executor.run(model_name, fn, *args))
+
+
+async def _run_single(model_name, function_name, formatted, *options):
+    """
+    Predicción de un solo registro: se responde desde la caché de resultados si
+    ya se calculó; si no, pasa por el micro-batcher del modelo si está activo o
+    ``function_name`` de predictors.py se ejecuta en el pool.
+    """
+    cache = app.state.result_cache
+    if cache is not None:
+        key = cache.key(model_name, formatted, options)
+        result = cache.get(key)
+        if result is not None:
+            return result
+    
+    batcher = app.state.batchers.get(model_name)
+    if batcher is not None:
+        result = await _await_inference(model_name, batcher.submit(formatted, *options))
+    else:
+        result = await _run_inference(model_name, _call_predictor, function_name, formatted, *options)
+    
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+async def _await_inference(model_name, awaitable, client_errors=()):
+    """
+    Espera la inferencia y traduce sus errores a respuestas HTTP; las
+    excepciones de ``client_errors`` son errores de la entrada (400).
+    """
     try:
-        formatted = prepare_telco_input(
-            request.gender,
-            request.senior_citizen,
-            request.partner,
-            request.dependents,
-            request.tenure,
-            request.phone_service,
-            request.multiple_lines,
-            request.internet_service,
-            request.online_security,
-            request.online_backup,
-            request.device_protection,
-            request.tech_support,
-            request.streaming_tv,
-            request.streaming_movies,
-            request.contract,
-            request.paperless_billing,
-            request.payment_method,
-            request.monthly_charges,
-            request.total_charges,
-        )
-        result = predict_logistic_regression(formatted)
-        return result
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover
+        return await awaitable
+    except Exception as exc:
+        count_error(model_name, type(exc).__name__)
+        if isinstance(exc, client_errors):
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if isinstance(exc, InferenceQueueFull):
+            raise HTTPException(status_code=429, detail=str(exc)) from exc
+        if isinstance(exc, InferenceTimeout):
+            raise HTTPException(status_code=504, detail=str(exc)) from exc
+        if isinstance(exc, FileNotFoundError):
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
         raise HTTPException(status_code=500, detail="Error interno en el modelo") from exc
 
 
+@app.get("/stats/microbatch")
+def microbatch_stats():
+    return {
+        "enabled": bool(app.state.batchers),
+        "models": {name: batcher.stats() for name, batcher in app.state.batchers.items()},
+    }
+
+
+@app.get("/stats/weights")
+def shared_weights_stats():
+    return {"enabled": SHARED_WEIGHTS, **shared_weights_status()}
+
+
+@app.get("/stats/cache")
+def result_cache_stats():
+    cache = app.state.result_cache
+    return {"enabled": cache is not None, **(cache.stats() if cache is not None else {})}
+
+
+@app.get("/metrics")
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    cache = app.state.result_cache
+    text = render_metrics(
+        executor_metrics(app.state.executor.stats()),
+        microbatch_metrics({name: batcher.stats() for name, batcher in app.state.batchers.items()}),
+        model_metrics(app.state.readiness.snapshot(), registry_status()),
+        result_cache_metrics(cache.stats()) if cache is not None else [],
+    )
+    return PlainTextResponse(text, media_type=CONTENT_TYPE)
+
+
+@app.post("/predict/logistic")
+@instrumented("logistic")
+async def predict_logistic(request: TelcoRequest, threshold: float = Query(None, ge=0.0, le=1.0)):
+    with stage("logistic", "prepare"):
+        formatted = TELCO_SCHEMA.map_object(request)
+    return FastJSONResponse(await _run_single("logistic", "predict_logistic_regression", formatted, threshold))
+
+
+@app.post("/predict/logistic/batch")
+@instrumented("logistic")
+async def predict_logistic_batch(
+    requests: List[TelcoRequest],
+    threshold: float = Query(None, ge=0.0, le=1.0),
+):
+    _check_batch_size(len(requests))
+    observe_batch_size("logistic", "batch", len(requests))
+    return FastJSONResponse(await _run_inference("logistic", _score_logistic_requests, requests, threshold))
+
+
 @app.post("/predict/knn")
-def predict_knn_endpoint(request: TelcoRequest):
-    try:
-        formatted = prepare_telco_input(
-            request.gender,
-            request.senior_citizen,
-            request.partner,
-            request.dependents,
-            request.tenure,
-            request.phone_service,
-            request.multiple_lines,
-            request.internet_service,
-            request.online_security,
-            request.online_backup,
-            request.device_protection,
-            request.tech_support,
-            request.streaming_tv,
-            request.streaming_movies,
-            request.contract,
-            request.paperless_billing,
-            request.payment_method,
-            request.monthly_charges,
-            request.total_charges,
-        )
-        result = predict_knn(formatted)
-        return result
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail="Error interno en el modelo") from exc
+@instrumented("knn")
+async def predict_knn_endpoint(request: TelcoRequest):
+    with stage("knn", "prepare"):
+        formatted = TELCO_SCHEMA.map_object(request)
+    return FastJSONResponse(await _run_single("knn", "predict_knn", formatted))
+
+
+@app.post("/predict/knn/batch")
+@instrumented("knn")
+async def predict_knn_batch_endpoint(requests: List[TelcoRequest]):
+    _check_batch_size(len(requests))
+    observe_batch_size("knn", "batch", len(requests))
+    return FastJSONResponse(await _run_inference("knn", _score_knn_requests, requests))
+
+
+@app.post("/predict/ensemble")
+@instrumented("ensemble")
+async def predict_ensemble(
+    request: TelcoRequest,
+    threshold: float = Query(None, ge=0.0, le=1.0),
+    logistic_weight: float = Query(None, ge=0.0, le=1.0),
+):
+    """
+    Regresión Logística y KNN en una sola petición: la entrada se codifica una
+    vez y se devuelve el resultado de cada modelo y la probabilidad combinada.
+    """
+    with stage("ensemble", "prepare"):
+        formatted = TELCO_SCHEMA.map_object(request)
+    return FastJSONResponse(
+        await _run_single("ensemble", "predict_churn_ensemble", formatted, threshold, logistic_weight)
+    )
+
+
+@app.post("/predict/ensemble/batch")
+@instrumented("ensemble")
+async def predict_ensemble_batch(
+    requests: List[TelcoRequest],
+    threshold: float = Query(None, ge=0.0, le=1.0),
+    logistic_weight: float = Query(None, ge=0.0, le=1.0),
+):
+    _check_batch_size(len(requests))
+    observe_batch_size("ensemble", "batch", len(requests))
+    return FastJSONResponse(
+        await _run_inference("ensemble", _score_ensemble_requests, requests, threshold, logistic_weight)
+    )
 
 
 @app.post("/predict/kmeans")
-def predict_kmeans_endpoint(request: CreditCardRequest):
+@instrumented("kmeans")
+async def predict_kmeans_endpoint(request: CreditCardRequest):
+    with stage("kmeans", "prepare"):
+        formatted = CREDIT_CARD_SCHEMA.map_object(request)
+    return FastJSONResponse(await _run_single("kmeans", "predict_kmeans", formatted))
+
+
+@app.post("/predict/kmeans/batch")
+@instrumented("kmeans")
+async def predict_kmeans_batch_endpoint(requests: List[CreditCardRequest]):
+    _check_batch_size(len(requests))
+    observe_batch_size("kmeans", "batch", len(requests))
+    return FastJSONResponse(await _run_inference("kmeans", _score_kmeans_requests, requests))
+
+
+@app.post("/predict/{model_name}/compact")
+@instrumented(models=COMPACT_MODELS)
+async def predict_compact(model_name: str, request: Request, threshold: float = Query(None, ge=0.0, le=1.0)):
+    """
+    Lote en formato compacto (ver wire.py): columnas una sola vez y filas como
+    arrays; la respuesta va por columnas.
+    """
+    if model_name not in COMPACT_MODELS:
+        raise HTTPException(status_code=404, detail=f"Modelo no soportado: {model_name}")
+    if threshold is not None and model_name != "logistic":
+        raise HTTPException(status_code=400, detail="El umbral solo aplica al modelo logistic")
+    
     try:
-        formatted = prepare_credit_card_input(
-            request.BALANCE,
-            request.BALANCE_FREQUENCY,
-            request.PURCHASES,
-            request.ONEOFF_PURCHASES,
-            request.INSTALLMENTS_PURCHASES,
-            request.CASH_ADVANCE,
-            request.PURCHASES_FREQUENCY,
-            request.ONEOFF_PURCHASES_FREQUENCY,
-            request.PURCHASES_INSTALLMENTS_FREQUENCY,
-            request.CASH_ADVANCE_FREQUENCY,
-            request.CASH_ADVANCE_TRX,
-            request.PURCHASES_TRX,
-            request.CREDIT_LIMIT,
-            request.PAYMENTS,
-            request.MINIMUM_PAYMENTS,
-            request.PRC_FULL_PAYMENT,
-            request.TENURE,
+        count, columns = parse_compact_batch(await request.body(), COMPACT_MODELS[model_name][0])
+    except CompactFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    _check_batch_size(count)
+    observe_batch_size(model_name, "compact", count)
+    
+    options = (threshold,) if model_name == "logistic" else ()
+    return compact_response(await _run_inference(model_name, _score_compact, model_name, columns, *options))
+
+
+@app.post("/predict/{model_name}/columnar")
+@instrumented(models=COMPACT_MODELS)
+async def predict_columnar(model_name: str, request: Request, threshold: float = Query(None, ge=0.0, le=1.0)):
+    """
+    Lote binario por columnas (ver columnar.py): stream Arrow IPC o, para
+    kmeans, matriz .npy. La respuesta es Arrow IPC, .npy o JSON compacto
+    según la cabecera Accept.
+    """
+    if model_name not in COMPACT_MODELS:
+        raise HTTPException(status_code=404, detail=f"Modelo no soportado: {model_name}")
+    if threshold is not None and model_name != "logistic":
+        raise HTTPException(status_code=400, detail="El umbral solo aplica al modelo logistic")
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    schema = COMPACT_MODELS[model_name][0]
+    try:
+        if content_type == NPY_TYPE and model_name == "kmeans":
+            data = read_npy_matrix(await request.body(), len(schema.fields))
+        elif content_type == ARROW_STREAM_TYPE:
+            data = read_arrow_table(await request.body(), schema)
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Se esperaba {ARROW_STREAM_TYPE}" + (f" o {NPY_TYPE}" if model_name == "kmeans" else ""),
+            )
+    except ColumnarFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except ImportError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    count = len(data)
+    _check_batch_size(count, MAX_COLUMNAR_BATCH_SIZE)
+    observe_batch_size(model_name, "columnar", count)
+    
+    options = (threshold,) if model_name == "logistic" else ()
+    results = await _run_inference(model_name, _score_columnar, model_name, data, *options)
+    
+    accept = request.headers.get("accept", "")
+    if "application/json" in accept:
+        return compact_response(results)
+    if NPY_TYPE in accept:
+        return Response(write_npy(results), media_type=NPY_TYPE)
+    try:
+        return Response(write_arrow_stream(results), media_type=ARROW_STREAM_TYPE)
+    except ImportError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+
+
+@app.get("/profiles/kmeans")
+async def kmeans_profiles():
+    """Perfiles de todos los clusters de K-Means (estadísticas y descripción), para dashboards."""
+    return await _run_inference("kmeans", _call_predictor, "get_kmeans_profiles")
+
+
+@app.post("/predict/{model_name}/bulk")
+@instrumented(models=BULK_MODELS)
+async def predict_bulk(
+    model_name: str,
+    file: UploadFile = File(...),
+    input_format: str = Query(None),
+    output_format: str = Query("ndjson"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, gt=0),
+    id_column: str = Query(None),
+    threshold: float = Query(None, ge=0.0, le=1.0),
+):
+    """
+    Puntúa un archivo CSV/NDJSON completo y devuelve los resultados en streaming.
+    La entrada se lee por bloques de ``chunk_size`` filas y cada bloque se
+    puntúa en el pool de inferencia, con los mismos límites que el resto de
+    endpoints (429 si la cola del modelo está llena, 504 si se agota el tiempo).
+    """
+    if model_name not in BULK_MODELS:
+        raise HTTPException(status_code=404, detail=f"Modelo no soportado: {model_name}")
+    input_format = input_format or detect_input_format(file.filename)
+    if input_format not in INPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato de entrada no soportado: {input_format}")
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato de salida no soportado: {output_format}")
+    if threshold is not None and model_name != "logistic":
+        raise HTTPException(status_code=400, detail="El umbral solo aplica al modelo logistic")
+    if chunk_size > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El bloque supera el máximo permitido de {MAX_BATCH_SIZE} registros",
         )
-        result = predict_kmeans(formatted)
-        return result
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover
-        raise HTTPException(status_code=500, detail="Error interno en el modelo") from exc
+
+    stats = BulkStats()
+    predict_options = {"threshold": threshold} if threshold is not None else {}
+    chunks = iter_input_chunks(file.file, input_format, chunk_size)
+
+    async def score_next():
+        # La lectura del archivo va al threadpool y la puntuación al pool de inferencia;
+        # los errores de formato de la entrada se responden como 400
+        try:
+            chunk = await run_in_threadpool(next, chunks, None)
+        except (ValueError, KeyError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if chunk is None:
+            return None
+        text = await _await_inference(
+            model_name,
+            app.state.executor.run(model_name, score_chunk_text, model_name, chunk, stats.rows,
+                                   id_column, output_format, stats.chunks == 0, predict_options),
+            client_errors=(ValueError, KeyError),
+        )
+        stats.rows += len(chunk)
+        stats.chunks += 1
+        return text
+
+    def close_reader():
+        try:
+            chunks.close()
+        except ValueError:
+            # La petición se canceló mientras un hilo leía el bloque; el
+            # lector se cierra cuando ese hilo termina y se libera el generador
+            pass
+
+    # Procesar el primer bloque antes de responder para reportar errores de formato como 400
+    try:
+        first_fragment = await score_next()
+    except BaseException:
+        close_reader()
+        raise
+
+    async def generate():
+        try:
+            fragment = first_fragment
+            while fragment is not None:
+                if fragment:
+                    yield fragment
+                fragment = await score_next()
+            stats.finished_at = time.perf_counter()
+        finally:
+            close_reader()
+            print(f"Bulk {model_name}: {stats.summary()}")
+
+    media_type = "application/x-ndjson" if output_format == "ndjson" else "text/csv"
+    return StreamingResponse(generate(), media_type=media_type)
 
 
 # Permite ejecutar con: uvicorn backend.api:app --reload
@@ -0,0 +1,365 @@
+"""
+Formato de artefactos binarios para los modelos, alternativo a pickle.
+
+Cada modelo de ``modelos/`` se exporta a ``modelos/artifacts/<nombre>/``:
+
+- ``manifest.json``: versión del formato, tipo de modelo, pickle de origen
+  (tamaño, mtime y SHA-256), versión de scikit-learn con la que se exportó y los
+  metadatos pequeños (columnas, categorías, ``n_neighbors``...)
+- un ``.npy`` por array numérico, que se abre con ``np.load(mmap_mode='r')``
+
+Cargar un artefacto no ejecuta código arbitrario (``allow_pickle=False``), no
+depende de la versión de scikit-learn instalada y no copia los arrays grandes
+a memoria: las páginas se leen bajo demanda y se comparten entre procesos.
+
+Los objetos cargados son las versiones en NumPy que ya usan las predicciones:
+
+- ``logreg_model``: ``CompiledLogisticModel``
+- ``knn_model``: ``IndexedKNNClassifier`` con búsqueda exacta
+- ``kmeans_model``: ``KMeansArtifact`` (``cluster_centers_``, ``transform``, ``predict``)
+- ``credit_scaler``: ``ScalerArtifact`` (``mean_``, ``scale_``, ``transform``)
+
+``model_loader.load_model`` usa el artefacto si existe y corresponde al pickle
+actual; si el pickle se reemplazó, avisa y carga el pickle hasta que se vuelva
+a exportar (``MODEL_FORMAT=pickle`` desactiva los artefactos). Para exportar, comprobar y medir:
+
+    python -m backend.artifacts export
+    python -m backend.artifacts check
+    python -m backend.artifacts bench
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .compiled_logistic import CompiledLogisticModel, get_compiled_logistic
+from .model_loader import (
+    ARTIFACT_MANIFEST,
+    DEFAULT_MODELS,
+    get_artifact_path,
+    get_model_path,
+    load_pickle,
+)
+from .neighbors import IndexedKNNClassifier, get_indexed_classifier
+
+
+# Versión del formato; un lector solo acepta artefactos con la misma versión mayor
+ARTIFACT_FORMAT_VERSION = 1
+
+
+class ScalerArtifact:
+    """``StandardScaler`` ajustado, reducido a lo necesario para inferencia."""
+
+    def __init__(self, mean, scale, feature_names=None, with_mean=True, with_std=True):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.with_mean = with_mean
+        self.with_std = with_std
+        self.n_features_in_ = self.mean_.shape[0]
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def from_estimator(cls, scaler):
+        n_features = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        names = getattr(scaler, 'feature_names_in_', None)
+        return cls(mean, scale, None if names is None else list(names), scaler.with_mean, scaler.with_std)
+
+    def to_arrays(self):
+        metadata = {
+            'feature_names': None if self.feature_names_in_ is None else self.feature_names_in_.tolist(),
+            'with_mean': self.with_mean,
+            'with_std': self.with_std,
+        }
+        return {'mean': self.mean_, 'scale': self.scale_}, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        return cls(arrays['mean'], arrays['scale'], metadata['feature_names'],
+                   metadata['with_mean'], metadata['with_std'])
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if self.with_mean:
+            X -= self.mean_
+        if self.with_std:
+            X /= self.scale_
+        return X
+
+
+class KMeansArtifact:
+    """Modelo ``KMeans`` ajustado, reducido a sus centroides."""
+
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = np.asarray(cluster_centers, dtype=np.float64)
+        self.n_clusters = self.cluster_centers_.shape[0]
+        self.n_features_in_ = self.cluster_centers_.shape[1]
+
+    @classmethod
+    def from_estimator(cls, model):
+        return cls(model.cluster_centers_)
+
+    def to_arrays(self):
+        return {'cluster_centers': self.cluster_centers_}, {}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        return cls(arrays['cluster_centers'])
+
+    def transform(self, X):
+        """Distancia euclídea de cada fila (ya escalada) a cada centroide."""
+        X = np.asarray(X, dtype=np.float64)
+        sq_dist = np.einsum('ij,ij->i', X, X)[:, None] - 2.0 * (X @ self.cluster_centers_.T)
+        sq_dist += np.einsum('ij,ij->i', self.cluster_centers_, self.cluster_centers_)
+        return np.sqrt(np.maximum(sq_dist, 0.0))
+
+    def predict(self, X):
+        return self.transform(X).argmin(axis=1)
+
+
+# Por tipo de artefacto: conversión desde el objeto cargado del pickle y reconstrucción
+ARTIFACT_KINDS = {
+    'logistic': (get_compiled_logistic, CompiledLogisticModel.from_arrays),
+    'knn': (
+        lambda pipeline: get_indexed_classifier(pipeline, 'brute'),
+        lambda arrays, metadata: IndexedKNNClassifier.from_arrays(arrays, metadata, 'brute'),
+    ),
+    'kmeans': (KMeansArtifact.from_estimator, KMeansArtifact.from_arrays),
+    'scaler': (ScalerArtifact.from_estimator, ScalerArtifact.from_arrays),
+}
+
+# Tipo de artefacto de cada modelo de ``modelos/``
+MODEL_ARTIFACT_KINDS = {
+    'logreg_model.pkl': 'logistic',
+    'knn_model.pkl': 'knn',
+    'kmeans_model.pkl': 'kmeans',
+    'credit_scaler.pkl': 'scaler',
+}
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_artifact(model_filename):
+    """
+    Exporta el pickle ``model_filename`` a su directorio de artefacto.
+
+    El artefacto se escribe en un directorio temporal y se sustituye al final,
+    de modo que un proceso que lo esté cargando nunca ve una versión a medias.
+
+    Parameters:
+    -----------
+    model_filename : str
+        Nombre del pickle (ej: 'knn_model.pkl')
+
+    Returns:
+    --------
+    str : Ruta del directorio del artefacto
+
+    Raises:
+    -------
+    ValueError : si el modelo no se puede convertir a artefacto (se sigue usando el pickle)
+    """
+    import sklearn
+
+    kind = MODEL_ARTIFACT_KINDS.get(model_filename)
+    if kind is None:
+        raise ValueError(f"No hay formato de artefacto para {model_filename}")
+
+    pickle_path = get_model_path(model_filename)
+    model = load_pickle(model_filename)
+    if model is None:
+        raise FileNotFoundError(f"No se encontró el modelo {model_filename}")
+
+    converted = ARTIFACT_KINDS[kind][0](model)
+    if not hasattr(converted, 'to_arrays'):
+        # get_compiled_logistic / get_indexed_classifier devuelven el Pipeline si no lo soportan
+        raise ValueError(f"La estructura de {model_filename} no tiene formato de artefacto")
+    arrays, metadata = converted.to_arrays()
+    target = get_artifact_path(model_filename)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target))
+    # mkdtemp crea el directorio solo para el usuario actual
+    os.chmod(staging, 0o755)
+    try:
+        manifest = {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'kind': kind,
+            'created_at': time.time(),
+            'sklearn_version': sklearn.__version__,
+            'source': {
+                'filename': model_filename,
+                'size': os.path.getsize(pickle_path),
+                'mtime_ns': os.stat(pickle_path).st_mtime_ns,
+                'sha256': _sha256(pickle_path),
+            },
+            'arrays': {},
+            'metadata': metadata,
+        }
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype == object:
+                raise ValueError(f"El array {key} de {model_filename} no es numérico")
+            filename = f"{key}.npy"
+            np.save(os.path.join(staging, filename), array, allow_pickle=False)
+            manifest['arrays'][key] = {'file': filename, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+        with open(os.path.join(staging, ARTIFACT_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        previous = None
+        if os.path.exists(target):
+            previous = tempfile.mkdtemp(prefix=".old-", dir=os.path.dirname(target))
+            os.rename(target, os.path.join(previous, 'artifact'))
+        os.rename(staging, target)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def read_manifest(artifact_path):
+    with open(os.path.join(artifact_path, ARTIFACT_MANIFEST), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_artifact(artifact_path, mmap_mode='r'):
+    """
+    Carga un artefacto exportado con ``export_artifact``.
+
+    Parameters:
+    -----------
+    artifact_path : str
+        Directorio del artefacto
+    mmap_mode : str or None
+        Modo de ``np.load`` ('r' mapea los arrays sin copiarlos)
+
+    Returns:
+    --------
+    object : Modelo reconstruido (ver los tipos en la documentación del módulo)
+    """
+    manifest = read_manifest(artifact_path)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Versión de artefacto no soportada: {manifest.get('format_version')}")
+
+    arrays = {}
+    for key, entry in manifest['arrays'].items():
+        array = np.load(os.path.join(artifact_path, entry['file']), mmap_mode=mmap_mode, allow_pickle=False)
+        if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+            raise ValueError(f"El array {key} no coincide con el manifiesto de {artifact_path}")
+        arrays[key] = array
+    return ARTIFACT_KINDS[manifest['kind']][1](arrays, manifest['metadata'])
+
+
+def check_artifact(model_filename):
+    """
+    Comprueba que el artefacto corresponde al pickle actual (SHA-256).
+
+    Returns:
+    --------
+    str : 'ok', 'stale' (el pickle cambió), 'missing' (sin artefacto) o
+        'no-source' (artefacto sin pickle de origen)
+    """
+    artifact_path = get_artifact_path(model_filename)
+    if not os.path.exists(os.path.join(artifact_path, ARTIFACT_MANIFEST)):
+        return 'missing'
+    pickle_path = get_model_path(model_filename)
+    if not os.path.exists(pickle_path):
+        return 'no-source'
+    source = read_manifest(artifact_path)['source']
+    return 'ok' if source['sha256'] == _sha256(pickle_path) else 'stale'
+
+
+_BENCH_SNIPPET = """
+import json, resource, sys, time, tracemalloc
+from backend import artifacts, model_loader
+fmt, filename = sys.argv[1], sys.argv[2]
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+tracemalloc.start()
+start = time.perf_counter()
+if fmt == 'pickle':
+    model = model_loader.load_pickle(filename)
+else:
+    model = artifacts.load_artifact(model_loader.get_artifact_path(filename))
+seconds = time.perf_counter() - start
+_, peak = tracemalloc.get_traced_memory()
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': seconds, 'peak_bytes': peak, 'rss_delta_kb': rss_after - rss_before}))
+"""
+
+
+def benchmark_load(model_filename, fmt, repeat=5):
+    """
+    Mide la carga en frío de un modelo en procesos nuevos (uno por repetición).
+
+    Los imports de los módulos del backend no cuentan: solo se mide la carga.
+
+    Returns:
+    --------
+    dict : Mediana de segundos, pico de memoria de Python (tracemalloc) y
+        crecimiento del RSS máximo del proceso
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', _BENCH_SNIPPET, fmt, model_filename],
+            check=True, capture_output=True, text=True, env=env, cwd=root,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': float(np.median([run['seconds'] for run in runs])),
+        'peak_bytes': max(run['peak_bytes'] for run in runs),
+        'rss_delta_kb': max(run['rss_delta_kb'] for run in runs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Artefactos binarios de los modelos (manifiesto JSON + .npy)")
+    parser.add_argument("command", choices=["export", "check", "bench"])
+    parser.add_argument("models", nargs="*", help="Pickles a procesar (por defecto todos)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medida en 'bench'")
+    args = parser.parse_args(argv)
+    models = args.models or list(DEFAULT_MODELS)
+
+    if args.command == "export":
+        for filename in models:
+            try:
+                print(f"{filename} -> {export_artifact(filename)}")
+            except ValueError as e:
+                print(f"⚠️ {filename}: {e}; se seguirá usando el pickle")
+    elif args.command == "check":
+        results = {filename: check_artifact(filename) for filename in models}
+        for filename, status in results.items():
+            print(f"{filename}: {status}")
+        if any(status == 'stale' for status in results.values()):
+            raise SystemExit(1)
+    else:
+        print(f"{'modelo':20s} {'formato':9s} {'carga (ms)':>11s} {'pico py (KB)':>13s} {'Δ RSS (KB)':>11s}")
+        for filename in models:
+            for fmt in ("pickle", "artifact"):
+                if fmt == "artifact" and check_artifact(filename) == 'missing':
+                    continue
+                result = benchmark_load(filename, fmt, args.repeat)
+                print(f"{filename:20s} {fmt:9s} {result['seconds'] * 1000:11.2f} "
+                      f"{result['peak_bytes'] / 1024:13.1f} {result['rss_delta_kb']:11d}")
+
+
+if __name__ == "__main__":
+    main()
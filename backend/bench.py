@@ -0,0 +1,415 @@
+"""
+Benchmarks de latencia y rendimiento de toda la pila de predicción.
+
+Capas:
+
+- ``prepare``: ``prepare_telco_input`` / ``prepare_credit_card_input``
+  (n registros, uno a uno)
+- ``predict``: ``predict_*`` de predictors.py para 1 fila y ``predict_*_batch``
+  para lotes, con los registros ya preparados
+- ``api``: endpoints de api.py dentro del proceso (ASGI, sin red), con 1..N
+  clientes concurrentes
+- ``http``: los mismos endpoints sobre un uvicorn local, con 1..N clientes
+  concurrentes
+
+Las entradas salen del generador de datos sintéticos (synthetic.py). Las de
+1 fila van a ``/predict/<modelo>`` y las de más filas a
+``/predict/<modelo>/batch``. Para cada caso se informa la latencia por llamada
+(p50/p95/p99), las filas por segundo, los errores y la memoria pico (RSS) del
+proceso que ejecuta los modelos.
+
+Los resultados se comparan con la línea base de ``bench_baseline.json``. El
+comando falla (código 1) si en algún caso la p50 o la memoria pico suben, o
+las filas/s bajan, más de la tolerancia. La línea base depende de la máquina: regrábala con
+``--update`` en la máquina donde se vayan a comparar los cambios.
+
+Uso (desde la raíz del proyecto):
+
+    python -m backend.bench
+    python -m backend.bench predict api --rows 1 100 --clients 1 8
+    python -m backend.bench --update                 # regrabar la línea base
+    python -m backend.bench --json resultados.json   # guardar todas las medidas
+
+La capa ``api`` usa httpx (el mismo cliente de ``fastapi.testclient``) y la
+capa ``http`` arranca ``uvicorn backend.api:app`` en un puerto libre.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+from .synthetic import synthetic_records
+
+
+ROOT_DIR = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+
+LAYERS = ("prepare", "predict", "api", "http")
+MODELS = ("logistic", "knn", "kmeans")
+
+DEFAULT_ROWS = (1, 100, 10000)
+DEFAULT_CLIENTS = (1, 4)
+# Segundos de medida por caso (tras el calentamiento) y mínimo de llamadas
+DEFAULT_DURATION = 1.0
+MIN_CALLS = 5
+WARMUP_CALLS = 2
+
+DEFAULT_TOLERANCE = 0.5
+
+# Modelo -> (función de un registro, función por lotes, preparación de un registro)
+PREDICT_FUNCTIONS = {
+    "logistic": ("predict_logistic_regression", "predict_logistic_regression_batch", "prepare_telco_input"),
+    "knn": ("predict_knn", "predict_knn_batch", "prepare_telco_input"),
+    "kmeans": ("predict_kmeans", "predict_kmeans_batch", "prepare_credit_card_input"),
+}
+
+# Preparación -> (esquema, conjunto de datos sintéticos de entrada)
+PREPARE_INPUTS = {
+    "prepare_telco_input": (TELCO_SCHEMA, "telco"),
+    "prepare_credit_card_input": (CREDIT_CARD_SCHEMA, "credit_card"),
+}
+
+SERVER_STARTUP_TIMEOUT = 180.0
+
+
+# ============================================
+# MEDIDA
+# ============================================
+
+def peak_rss_mb(pid=None):
+    """Memoria residente pico (VmHWM) de un proceso en MB, o None si no se puede leer."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid is None:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            pass
+    return None
+
+
+def summarize(latencies, rows_per_call, elapsed, errors=0):
+    """
+    Returns:
+    --------
+    dict : {'calls', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'rows_per_second'}
+    """
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (np.nan,) * 3
+    ok_calls = len(latencies_ms) - errors
+    return {
+        'calls': len(latencies_ms),
+        'errors': errors,
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'rows_per_second': round(ok_calls * rows_per_call / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def time_calls(fn, duration=DEFAULT_DURATION, min_calls=MIN_CALLS):
+    """
+    Llama a ``fn()`` en bucle durante ``duration`` segundos (al menos ``min_calls`` veces).
+
+    Returns:
+    --------
+    tuple : (latencias en segundos, tiempo total)
+    """
+    for _ in range(WARMUP_CALLS):
+        fn()
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    while len(latencies) < min_calls or time.perf_counter() < deadline:
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+    return latencies, time.perf_counter() - start
+
+
+async def time_async_clients(send, clients, duration=DEFAULT_DURATION, min_calls=MIN_CALLS):
+    """
+    ``clients`` corrutinas que llaman a ``await send()`` en bucle hasta agotar
+    ``duration`` (entre todas, al menos ``min_calls`` llamadas).
+
+    Returns:
+    --------
+    tuple : (latencias en segundos, tiempo total, número de errores)
+    """
+    for _ in range(WARMUP_CALLS):
+        await send()
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def client():
+        nonlocal errors
+        while len(latencies) < min_calls or time.perf_counter() < deadline:
+            call_start = time.perf_counter()
+            if not await send():
+                errors += 1
+            latencies.append(time.perf_counter() - call_start)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def _case_id(layer, target, rows, clients=None):
+    case = f"{layer}/{target}/rows={rows}"
+    return case if clients is None else f"{case}/clients={clients}"
+
+
+# ============================================
+# CAPAS
+# ============================================
+
+def bench_prepare(rows_list, duration):
+    from . import predictors
+
+    for name, (schema, dataset) in PREPARE_INPUTS.items():
+        prepare = getattr(predictors, name)
+        for rows in rows_list:
+            values = [[form[field] for field in schema.names] for form in synthetic_records(dataset, rows)]
+
+            def run():
+                for record in values:
+                    prepare(*record)
+
+            latencies, elapsed = time_calls(run, duration)
+            yield _case_id("prepare", name, rows), {**summarize(latencies, rows, elapsed), 'peak_rss_mb': peak_rss_mb()}
+
+
+def bench_predict(models, rows_list, duration):
+    from . import predictors
+
+    for model in models:
+        single_name, batch_name, prepare_name = PREDICT_FUNCTIONS[model]
+        prepare = getattr(predictors, prepare_name)
+        schema, dataset = PREPARE_INPUTS[prepare_name]
+        for rows in rows_list:
+            records = [prepare(*[form[field] for field in schema.names]) for form in synthetic_records(dataset, rows)]
+            if rows == 1:
+                single = getattr(predictors, single_name)
+                run = lambda: single(records[0])
+                target = single_name
+            else:
+                batch = getattr(predictors, batch_name)
+                run = lambda: batch(records)
+                target = batch_name
+            latencies, elapsed = time_calls(run, duration)
+            yield _case_id("predict", target, rows), {**summarize(latencies, rows, elapsed), 'peak_rss_mb': peak_rss_mb()}
+
+
+def _endpoint(model, rows):
+    return f"/predict/{model}" if rows == 1 else f"/predict/{model}/batch"
+
+
+def _payload(model, rows):
+    forms = synthetic_records(PREPARE_INPUTS[PREDICT_FUNCTIONS[model][2]][1], rows)
+    return forms[0] if rows == 1 else forms
+
+
+async def _bench_endpoints(client, models, rows_list, clients_list, duration, layer, rss_pid=None):
+    results = []
+    for model in models:
+        for rows in rows_list:
+            endpoint, payload = _endpoint(model, rows), _payload(model, rows)
+            body = json.dumps(payload).encode()
+            headers = {"Content-Type": "application/json"}
+
+            async def send():
+                response = await client.post(endpoint, content=body, headers=headers)
+                return response.status_code == 200
+
+            for clients in clients_list:
+                latencies, elapsed, errors = await time_async_clients(send, clients, duration)
+                result = {**summarize(latencies, rows, elapsed, errors), 'peak_rss_mb': peak_rss_mb(rss_pid)}
+                results.append((_case_id(layer, endpoint.lstrip("/"), rows, clients), result))
+                print(_format_row(results[-1][0], result), flush=True)
+    return results
+
+
+async def _wait_ready(client, timeout=SERVER_STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("El API no quedó listo a tiempo")
+
+
+def bench_api(models, rows_list, clients_list, duration):
+    import httpx
+
+    from .api import app
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await _wait_ready(client)
+                return await _bench_endpoints(client, models, rows_list, clients_list, duration, "api")
+
+    return asyncio.run(run())
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_http(models, rows_list, clients_list, duration):
+    import httpx
+
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env,
+    )
+
+    async def run():
+        limits = httpx.Limits(max_connections=max(clients_list), max_keepalive_connections=max(clients_list))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            await _wait_ready(client)
+            return await _bench_endpoints(client, models, rows_list, clients_list, duration, "http", server.pid)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+# ============================================
+# LÍNEA BASE
+# ============================================
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_case(case, result, baseline, tolerance):
+    """
+    Compara un caso con su línea base.
+
+    Returns:
+    --------
+    list of str : Regresiones encontradas (vacía si está dentro de la tolerancia)
+    """
+    problems = []
+    entry = baseline.get(case)
+    if entry is None:
+        return problems
+    if result['p50_ms'] > entry['p50_ms'] * (1 + tolerance):
+        problems.append(f"{case}: p50 {result['p50_ms']:.3f} ms frente a {entry['p50_ms']:.3f} ms")
+    if result['rows_per_second'] < entry['rows_per_second'] / (1 + tolerance):
+        problems.append(
+            f"{case}: {result['rows_per_second']:,.0f} filas/s frente a {entry['rows_per_second']:,.0f}"
+        )
+    baseline_rss, rss = entry.get('peak_rss_mb'), result.get('peak_rss_mb')
+    if baseline_rss is not None and rss is not None and rss > baseline_rss * (1 + tolerance):
+        problems.append(f"{case}: RSS pico {rss:.0f} MB frente a {baseline_rss:.0f} MB")
+    if result['errors'] and not entry.get('errors'):
+        problems.append(f"{case}: {result['errors']} errores")
+    return problems
+
+
+def _format_row(case, result):
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result.get('peak_rss_mb') is not None else "-"
+    errors = f"  errores={result['errors']}" if result['errors'] else ""
+    return (f"{case:55s} p50={result['p50_ms']:9.3f} ms  p95={result['p95_ms']:9.3f} ms  "
+            f"p99={result['p99_ms']:9.3f} ms  {result['rows_per_second']:>12,.0f} filas/s  RSS={rss}{errors}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencia y rendimiento de la pila de predicción")
+    parser.add_argument("layers", nargs="*", help=f"Capas a medir: {', '.join(LAYERS)} (por defecto todas)")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--rows", nargs="+", type=int, default=list(DEFAULT_ROWS), help="Filas por llamada")
+    parser.add_argument("--clients", nargs="+", type=int, default=list(DEFAULT_CLIENTS),
+                        help="Clientes concurrentes (capas api y http)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Segundos de medida por caso")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Margen sobre la línea base antes de fallar (0.5 = +50%%)")
+    parser.add_argument("--update", action="store_true", help="Guardar las medidas como nueva línea base")
+    parser.add_argument("--json", help="Guardar todas las medidas en este archivo")
+    args = parser.parse_args(argv)
+
+    unknown = [layer for layer in args.layers if layer not in LAYERS]
+    if unknown:
+        parser.error(f"Capas desconocidas: {', '.join(unknown)}")
+    layers = args.layers or list(LAYERS)
+
+    results = {}
+    for layer in layers:
+        if layer == "prepare":
+            cases = bench_prepare(args.rows, args.duration)
+        elif layer == "predict":
+            cases = bench_predict(args.models, args.rows, args.duration)
+        elif layer == "api":
+            cases = bench_api(args.models, args.rows, args.clients, args.duration)
+        else:
+            cases = bench_http(args.models, args.rows, args.clients, args.duration)
+        for case, result in cases:
+            results[case] = result
+            if layer in ("prepare", "predict"):
+                print(_format_row(case, result), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline()
+    if args.update:
+        baseline.update({
+            case: {
+                **{key: result[key] for key in ('p50_ms', 'p95_ms', 'p99_ms', 'rows_per_second', 'errors')},
+                'peak_rss_mb': round(result['peak_rss_mb'], 1) if result.get('peak_rss_mb') is not None else None,
+            }
+            for case, result in results.items()
+        })
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write("\n")
+        print(f"Línea base guardada en {BASELINE_PATH}")
+        return
+
+    problems = []
+    for case, result in results.items():
+        problems.extend(check_case(case, result, baseline, args.tolerance))
+    for problem in problems:
+        print(f"REGRESIÓN: {problem}", file=sys.stderr)
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
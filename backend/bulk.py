@@ -0,0 +1,288 @@
+"""
+Puntuación masiva (bulk) de archivos CSV o NDJSON.
+
+Lee la entrada por bloques, prepara cada bloque de forma vectorizada,
+lo puntúa con los modelos cargados y emite los resultados como NDJSON o CSV
+a medida que se generan, de modo que la memoria no depende del tamaño del archivo.
+
+Uso desde la línea de comandos (desde la raíz del proyecto):
+
+    python -m backend.bulk logistic WA_Fn-UseC_-Telco-Customer-Churn.csv -o churn.ndjson
+    python -m backend.bulk kmeans "CC GENERAL.csv" --output-format csv -o clusters.csv
+"""
+
+import argparse
+import importlib
+import io
+import sys
+import time
+
+from .metrics import observe_batch_size, stage
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+INPUT_FORMATS = ("csv", "ndjson")
+OUTPUT_FORMATS = ("ndjson", "csv")
+
+# Modelo -> (preparación vectorizada, predicción sobre DataFrame), funciones de
+# predictors.py que se resuelven al primer uso para no importar pandas antes
+BULK_MODELS = {
+    "logistic": ("prepare_telco_frame", "predict_logistic_regression_frame"),
+    "knn": ("prepare_telco_frame", "predict_knn_frame"),
+    "kmeans": ("prepare_credit_card_frame", "predict_kmeans_frame"),
+}
+
+
+class BulkStats:
+    """Contador de filas y tiempo para reportar el rendimiento en filas por segundo."""
+
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.rows} filas en {self.chunks} bloques, {self.elapsed:.2f} s "
+            f"({self.rows_per_second:,.0f} filas/s)"
+        )
+
+
+def detect_input_format(filename):
+    """
+    Deduce el formato de entrada a partir de la extensión del archivo.
+
+    Returns:
+    --------
+    str : 'ndjson' para .ndjson/.jsonl/.json, 'csv' en cualquier otro caso
+    """
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_input_chunks(source, input_format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lee la entrada por bloques de ``chunk_size`` filas.
+
+    Parameters:
+    -----------
+    source : str o archivo
+        Ruta o archivo abierto con los datos
+    input_format : str
+        'csv' o 'ndjson'
+    chunk_size : int
+        Número de filas por bloque
+
+    Yields:
+    -------
+    DataFrame : Un bloque de filas crudas
+    """
+    import pandas as pd
+
+    if input_format == "csv":
+        reader = pd.read_csv(source, chunksize=chunk_size)
+    elif input_format == "ndjson":
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Formato de entrada no soportado: {input_format}")
+
+    with reader:
+        yield from reader
+
+
+def score_chunk(model_name, chunk, offset=0, id_column=None, **predict_options):
+    """
+    Prepara y puntúa un bloque con el modelo indicado.
+
+    Parameters:
+    -----------
+    model_name : str
+        'logistic', 'knn' o 'kmeans'
+    chunk : DataFrame
+        Bloque de datos crudos
+    offset : int
+        Posición de la primera fila del bloque en la entrada
+    id_column : str, optional
+        Columna de la entrada que se copia a la salida (ej: 'customerID', 'CUST_ID')
+    **predict_options
+        Opciones adicionales para la predicción (ej: ``threshold`` en logistic)
+
+    Returns:
+    --------
+    DataFrame : Resultados del bloque, con la columna 'row' (posición en la entrada)
+    """
+    if model_name not in BULK_MODELS:
+        raise ValueError(f"Modelo no soportado: {model_name}")
+    predictors = importlib.import_module(".predictors", __package__)
+    prepare, predict = (getattr(predictors, name) for name in BULK_MODELS[model_name])
+
+    chunk = chunk.reset_index(drop=True)
+    observe_batch_size(model_name, "bulk", len(chunk))
+    with stage(model_name, "prepare"):
+        prepared = prepare(chunk)
+    results = predict(prepared, **predict_options)
+    results.insert(0, "row", range(offset, offset + len(chunk)))
+    if id_column is not None:
+        results.insert(1, id_column, chunk[id_column])
+    return results
+
+
+def score_chunks(model_name, chunks, id_column=None, stats=None, **predict_options):
+    """
+    Prepara y puntúa cada bloque con el modelo indicado (ver ``score_chunk``).
+
+    Parameters:
+    -----------
+    model_name : str
+        'logistic', 'knn' o 'kmeans'
+    chunks : iterable of DataFrame
+        Bloques de datos crudos
+    id_column : str, optional
+        Columna de la entrada que se copia a la salida (ej: 'customerID', 'CUST_ID')
+    stats : BulkStats, optional
+        Acumulador de filas procesadas
+    **predict_options
+        Opciones adicionales para la predicción (ej: ``threshold`` en logistic)
+
+    Yields:
+    -------
+    DataFrame : Resultados del bloque, con la columna 'row' (posición en la entrada)
+    """
+    if model_name not in BULK_MODELS:
+        raise ValueError(f"Modelo no soportado: {model_name}")
+
+    offset = 0
+    try:
+        for chunk in chunks:
+            results = score_chunk(model_name, chunk, offset, id_column, **predict_options)
+            offset += len(chunk)
+
+            if stats is not None:
+                stats.rows += len(chunk)
+                stats.chunks += 1
+            yield results
+    finally:
+        # Cerrar el lector aunque la puntuación falle a mitad del archivo
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def serialize_results(results, output_format="ndjson", header=True):
+    """
+    Serializa los resultados de un bloque.
+
+    Returns:
+    --------
+    str : Texto NDJSON o CSV (con encabezado si ``header``); vacío si no hay filas en NDJSON
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida no soportado: {output_format}")
+
+    if output_format == "ndjson":
+        if not len(results):
+            return ""
+        text = results.to_json(orient="records", lines=True, force_ascii=False, double_precision=15)
+        return text.rstrip("\n") + "\n"
+
+    buffer = io.StringIO()
+    results.to_csv(buffer, index=False, header=header)
+    return buffer.getvalue()
+
+
+def serialize_chunks(results_chunks, output_format="ndjson"):
+    """
+    Serializa los resultados bloque a bloque.
+
+    Yields:
+    -------
+    str : Texto NDJSON o CSV de cada bloque (el CSV incluye encabezado solo una vez)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida no soportado: {output_format}")
+
+    header = True
+    for results in results_chunks:
+        text = serialize_results(results, output_format, header)
+        header = False
+        if text:
+            yield text
+
+
+def score_chunk_text(model_name, chunk, offset, id_column, output_format, header, predict_options):
+    """
+    Puntúa y serializa un bloque en una sola llamada, para ejecutarla en el
+    pool de inferencia del API (también de procesos: solo viajan el bloque y el texto).
+    """
+    results = score_chunk(model_name, chunk, offset, id_column, **predict_options)
+    return serialize_results(results, output_format, header)
+
+
+def score_stream(model_name, source, input_format="csv", output_format="ndjson",
+                 chunk_size=DEFAULT_CHUNK_SIZE, id_column=None, stats=None, **predict_options):
+    """
+    Tubería completa: lectura por bloques, puntuación y serialización.
+
+    Yields:
+    -------
+    str : Fragmentos de salida listos para escribir o enviar por HTTP
+    """
+    chunks = iter_input_chunks(source, input_format, chunk_size)
+    yield from serialize_chunks(
+        score_chunks(model_name, chunks, id_column=id_column, stats=stats, **predict_options),
+        output_format,
+    )
+    if stats is not None:
+        stats.finished_at = time.perf_counter()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación masiva de archivos CSV/NDJSON")
+    parser.add_argument("model", choices=sorted(BULK_MODELS), help="Modelo a utilizar")
+    parser.add_argument("input", help="Archivo de entrada ('-' para stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Archivo de salida ('-' para stdout)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, help="Por defecto se deduce de la extensión")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--id-column", help="Columna de la entrada que se copia a la salida")
+    parser.add_argument("--threshold", type=float, help="Umbral de churn (solo para logistic)")
+    args = parser.parse_args(argv)
+
+    predict_options = {}
+    if args.threshold is not None:
+        if args.model != "logistic":
+            parser.error("--threshold solo aplica al modelo logistic")
+        predict_options["threshold"] = args.threshold
+
+    source = sys.stdin if args.input == "-" else args.input
+    input_format = args.input_format or detect_input_format(args.input)
+    stats = BulkStats()
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        for fragment in score_stream(args.model, source, input_format, args.output_format,
+                                     args.chunk_size, args.id_column, stats, **predict_options):
+            output.write(fragment)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(stats.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Perfiles de los clusters de K-Means calculados en una sola pasada por bloques.
+
+Cada bloque del archivo de tarjetas de crédito se asigna a su cluster con el
+mismo motor que usa el API (faltantes imputados con la media del escalador) y
+se acumulan, por cluster y para las 17 variables:
+
+- número de clientes, valores faltantes, media y desviación estándar (medias y
+  sumas de cuadrados de cada bloque fusionadas con la fórmula de Chan, estable
+  aunque haya millones de filas)
+- mínimo y máximo
+- cuartiles aproximados a partir de una muestra uniforme de hasta
+  ``sample_size`` filas por cluster (exactos si el cluster es más pequeño)
+- distancia media al centroide
+
+La memoria depende del tamaño de bloque y de la muestra, no del archivo.
+
+El resultado es un diccionario {cluster: perfil} con las estadísticas y una
+descripción en texto (``description``), que es lo que ``predict_kmeans``
+devuelve en el campo 'profile'. Se guarda en ``modelos/cluster_profiles.pkl``.
+
+Uso desde la línea de comandos (desde la raíz del proyecto):
+
+    python -m backend.cluster_profiles "CC GENERAL.csv"
+    python -m backend.cluster_profiles "CC GENERAL.csv" --json perfiles.json
+"""
+
+import argparse
+import json
+import pickle
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from .bulk import DEFAULT_CHUNK_SIZE, INPUT_FORMATS, BulkStats, detect_input_format, iter_input_chunks
+from .feature_schema import CREDIT_CARD_SCHEMA
+from .kmeans_engine import get_kmeans_engine
+from .model_loader import get_model, get_model_path
+from .shared_weights import get_shared_model
+
+
+PROFILES_FILENAME = "cluster_profiles.pkl"
+
+# Filas por cluster que se guardan para estimar los cuartiles
+DEFAULT_SAMPLE_SIZE = 20000
+
+PROFILE_QUANTILES = (0.25, 0.5, 0.75)
+
+# Variables de la descripción en texto: (columna, etiqueta, formato)
+DESCRIPTION_FEATURES = (
+    ("BALANCE", "Balance promedio", "${:,.2f}"),
+    ("PURCHASES", "Compras promedio", "${:,.2f}"),
+    ("CREDIT_LIMIT", "Límite de crédito promedio", "${:,.2f}"),
+    ("PAYMENTS", "Pagos promedio", "${:,.2f}"),
+    ("TENURE", "Antigüedad promedio", "{:.1f} meses"),
+)
+
+# Variables que se destacan en la descripción (las más alejadas de la media global)
+DISTINCTIVE_FEATURES = 3
+
+
+class ClusterProfileBuilder:
+    """Acumulador por cluster de las estadísticas de cada variable."""
+
+    def __init__(self, n_clusters, columns=CREDIT_CARD_SCHEMA.columns,
+                 sample_size=DEFAULT_SAMPLE_SIZE, seed=42):
+        """
+        Parameters:
+        -----------
+        n_clusters : int
+            Número de clusters del modelo
+        columns : list of str
+            Nombres de las columnas de las matrices que recibe ``update``
+        sample_size : int
+            Filas por cluster que se guardan para los cuartiles
+        seed : int
+            Semilla del muestreo
+        """
+        shape = (n_clusters, len(columns))
+        self.n_clusters = n_clusters
+        self.columns = list(columns)
+        self.sample_size = sample_size
+        self.rows = 0
+
+        self.sizes = np.zeros(n_clusters, dtype=np.int64)
+        self.distance_sums = np.zeros(n_clusters)
+        # Por (cluster, variable): valores no faltantes, media y suma de cuadrados
+        self.counts = np.zeros(shape)
+        self.means = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.minimums = np.full(shape, np.inf)
+        self.maximums = np.full(shape, -np.inf)
+
+        # Muestra uniforme por cluster: se guardan las filas con las claves
+        # aleatorias más pequeñas vistas hasta el momento
+        self._rng = np.random.default_rng(seed)
+        self._samples = [np.empty((0, len(columns))) for _ in range(n_clusters)]
+        self._sample_keys = [np.empty(0) for _ in range(n_clusters)]
+
+    def update(self, X, clusters, distances=None):
+        """
+        Agrega un bloque de filas.
+
+        Parameters:
+        -----------
+        X : ndarray
+            Matriz (n_filas, n_variables) sin escalar; NaN = valor faltante
+        clusters : ndarray
+            Cluster asignado a cada fila
+        distances : ndarray, optional
+            Distancia de cada fila a su centroide
+        """
+        X = np.asarray(X, dtype=np.float64)
+        clusters = np.asarray(clusters, dtype=np.intp)
+        if len(X) == 0:
+            return
+        n_clusters, n_features = self.means.shape
+
+        # Sumas por (cluster, variable) con un único bincount sobre índices planos
+        flat_index = (clusters[:, None] * n_features + np.arange(n_features)).ravel()
+
+        def group_sum(values):
+            return np.bincount(flat_index, weights=values.ravel(),
+                               minlength=n_clusters * n_features).reshape(n_clusters, n_features)
+
+        valid = ~np.isnan(X)
+        counts = group_sum(valid.astype(np.float64))
+        sums = group_sum(np.where(valid, X, 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, 0.0)
+        deviations = np.where(valid, X - means[clusters], 0.0)
+        m2 = group_sum(deviations ** 2)
+
+        # Fusión con lo acumulado (Chan et al.)
+        total = self.counts + counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, counts / total, 0.0)
+        delta = means - self.means
+        self.m2 += m2 + delta ** 2 * self.counts * weight
+        self.means += delta * weight
+        self.counts = total
+
+        self.sizes += np.bincount(clusters, minlength=n_clusters)
+        if distances is not None:
+            self.distance_sums += np.bincount(clusters, weights=distances, minlength=n_clusters)
+
+        # Mínimo, máximo y muestra por cluster sobre las filas ordenadas por cluster
+        order = np.argsort(clusters, kind='stable')
+        present, starts = np.unique(clusters[order], return_index=True)
+        ordered = X[order]
+        # fmin/fmax ignoran los NaN
+        self.minimums[present] = np.fmin(self.minimums[present], np.fmin.reduceat(ordered, starts, axis=0))
+        self.maximums[present] = np.fmax(self.maximums[present], np.fmax.reduceat(ordered, starts, axis=0))
+
+        keys = self._rng.random(len(X))[order]
+        ends = np.append(starts[1:], len(X))
+        for cluster, start, end in zip(present.tolist(), starts.tolist(), ends.tolist()):
+            self._add_to_sample(cluster, ordered[start:end], keys[start:end])
+
+        self.rows += len(X)
+
+    def _add_to_sample(self, cluster, rows, keys):
+        sample = np.concatenate([self._samples[cluster], rows])
+        sample_keys = np.concatenate([self._sample_keys[cluster], keys])
+        if len(sample_keys) > self.sample_size:
+            keep = np.argpartition(sample_keys, self.sample_size)[:self.sample_size]
+            sample, sample_keys = sample[keep], sample_keys[keep]
+        self._samples[cluster] = sample
+        self._sample_keys[cluster] = sample_keys
+
+    def profiles(self):
+        """
+        Returns:
+        --------
+        dict : {cluster: perfil}, con 'cluster', 'size', 'share',
+            'mean_distance_to_centroid', 'features' ({variable: {'mean', 'std',
+            'min', 'p25', 'p50', 'p75', 'max', 'missing'}}), 'distinctive_features'
+            ([{'feature', 'direction'}]) y 'description'
+        """
+        # Media y desviación globales para elegir los rasgos distintivos
+        total_counts = self.counts.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            global_means = (self.counts * self.means).sum(axis=0) / total_counts
+            global_m2 = (self.m2 + self.counts * (self.means - global_means) ** 2).sum(axis=0)
+            global_std = np.sqrt(global_m2 / (total_counts - 1))
+
+        profiles = {}
+        for cluster in range(self.n_clusters):
+            size = int(self.sizes[cluster])
+            quantiles = self._sample_quantiles(cluster)
+            features = {}
+            for j, column in enumerate(self.columns):
+                count = self.counts[cluster, j]
+                features[column] = {
+                    'mean': _stat(self.means[cluster, j]) if count else None,
+                    'std': _stat(np.sqrt(self.m2[cluster, j] / (count - 1))) if count > 1 else None,
+                    'min': _stat(self.minimums[cluster, j]),
+                    'p25': _stat(quantiles[0, j]),
+                    'p50': _stat(quantiles[1, j]),
+                    'p75': _stat(quantiles[2, j]),
+                    'max': _stat(self.maximums[cluster, j]),
+                    'missing': int(size - count),
+                }
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                scores = np.abs(self.means[cluster] - global_means) / global_std
+            scores = np.where(self.counts[cluster] > 0, np.nan_to_num(scores, nan=0.0, posinf=0.0), 0.0)
+            distinctive = [
+                {'feature': self.columns[j],
+                 'direction': 'alto' if self.means[cluster, j] > global_means[j] else 'bajo'}
+                for j in np.argsort(-scores)[:DISTINCTIVE_FEATURES] if scores[j] > 0
+            ]
+
+            profile = {
+                'cluster': cluster,
+                'size': size,
+                'share': size / self.rows if self.rows else 0.0,
+                'mean_distance_to_centroid': _stat(self.distance_sums[cluster] / size) if size else None,
+                'features': features,
+                'distinctive_features': distinctive,
+            }
+            profile['description'] = describe_profile(profile)
+            profiles[cluster] = profile
+        return profiles
+
+    def _sample_quantiles(self, cluster):
+        sample = self._samples[cluster]
+        if len(sample) == 0:
+            return np.full((len(PROFILE_QUANTILES), len(self.columns)), np.nan)
+        with warnings.catch_warnings():
+            # Columnas sin ningún valor en el cluster
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanquantile(sample, PROFILE_QUANTILES, axis=0)
+
+
+def _stat(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def describe_profile(profile):
+    """
+    Descripción en texto (markdown) de un perfil de ``ClusterProfileBuilder.profiles``.
+    """
+    lines = [
+        f"**Cluster {profile['cluster']}**",
+        "",
+        f"- Número de clientes: {profile['size']:,} ({profile['share']:.1%})",
+    ]
+    for column, label, fmt in DESCRIPTION_FEATURES:
+        mean = profile['features'].get(column, {}).get('mean')
+        if mean is not None:
+            lines.append(f"- {label}: {fmt.format(mean)}")
+    if profile['distinctive_features']:
+        traits = ", ".join(f"{item['feature']} {item['direction']}" for item in profile['distinctive_features'])
+        lines.append(f"- Rasgos distintivos: {traits}")
+    return "\n".join(lines)
+
+
+def profile_description(profile):
+    """
+    Texto que se devuelve en el campo 'profile' de ``predict_kmeans``.
+    Acepta los perfiles estructurados y los antiguos (un texto por cluster).
+    """
+    if isinstance(profile, dict):
+        return profile.get('description')
+    return profile
+
+
+class ClusterProfileIndex:
+    """
+    Perfiles de ``cluster_profiles.pkl`` indexados por cluster y validados
+    contra el número de clusters del modelo K-Means.
+    """
+
+    def __init__(self, profiles, n_clusters, error=None):
+        """
+        Parameters:
+        -----------
+        profiles : dict or None
+            {cluster: perfil}, estructurado (ver ``ClusterProfileBuilder``) o en texto
+        n_clusters : int
+            Número de clusters del modelo cargado
+        error : str, optional
+            Motivo por el que se descartaron los perfiles del archivo
+
+        Raises:
+        -------
+        ValueError : si algún perfil corresponde a un cluster que el modelo no tiene
+        """
+        by_cluster = {}
+        for key, profile in (profiles or {}).items():
+            try:
+                cluster = int(key)
+            except (TypeError, ValueError):
+                raise ValueError(f"Cluster no válido en los perfiles: {key!r}") from None
+            if not 0 <= cluster < n_clusters:
+                raise ValueError(
+                    f"Hay un perfil para el cluster {cluster}, pero el modelo K-Means tiene {n_clusters} clusters"
+                )
+            if isinstance(profile, dict) and profile.get('cluster', cluster) != cluster:
+                raise ValueError(f"El perfil guardado como cluster {cluster} es del cluster {profile['cluster']}")
+            by_cluster[cluster] = profile
+
+        self.n_clusters = n_clusters
+        self.profiles = by_cluster
+        self.error = error
+        self.missing = [cluster for cluster in range(n_clusters) if cluster not in by_cluster]
+        # Texto de 'profile' por cluster: en la predicción basta indexar la tupla
+        self.descriptions = tuple(profile_description(by_cluster.get(cluster)) for cluster in range(n_clusters))
+
+    def describe(self, clusters):
+        """Descripción de cada cluster de ``clusters`` (lista de enteros)."""
+        descriptions = self.descriptions
+        return [descriptions[cluster] for cluster in clusters]
+
+    def summary(self):
+        """
+        Returns:
+        --------
+        dict : {'n_clusters', 'profiles' (en orden de cluster), 'missing', 'error'};
+            los perfiles en texto se devuelven como {'cluster', 'description'}
+        """
+        profiles = []
+        for cluster in sorted(self.profiles):
+            profile = self.profiles[cluster]
+            if not isinstance(profile, dict):
+                profile = {'cluster': cluster, 'description': profile}
+            profiles.append(profile)
+        return {
+            'n_clusters': self.n_clusters,
+            'profiles': profiles,
+            'missing': list(self.missing),
+            'error': self.error,
+        }
+
+
+# Índice para el último par (perfiles cargados, número de clusters) visto
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_profile_index(n_clusters):
+    """
+    Devuelve los perfiles indexados para un modelo de ``n_clusters`` clusters.
+
+    El archivo pasa por el registro de modelos (se lee y valida solo al cargarlo
+    o cuando cambia en disco); si no corresponde al modelo, se descarta con un
+    aviso y las predicciones salen sin perfil.
+    """
+    global _index
+    profiles = get_model(PROFILES_FILENAME)
+    entry = _index
+    if entry is not None and entry[0] is profiles and entry[1] == n_clusters:
+        return entry[2]
+
+    with _index_lock:
+        if _index is None or _index[0] is not profiles or _index[1] != n_clusters:
+            try:
+                index = ClusterProfileIndex(profiles, n_clusters)
+            except ValueError as exc:
+                print(f"Perfiles de clusters descartados: {exc}")
+                index = ClusterProfileIndex(None, n_clusters, error=str(exc))
+            _index = (profiles, n_clusters, index)
+        return _index[2]
+
+
+def _load_kmeans_engine():
+    engine = get_shared_model("kmeans")
+    if engine is not None:
+        return engine
+    model = get_model("kmeans_model.pkl")
+    scaler = get_model("credit_scaler.pkl")
+    if model is None or scaler is None:
+        raise FileNotFoundError("No se encontraron el modelo o el preprocesador de K-Means")
+    return get_kmeans_engine(model, scaler)
+
+
+def build_cluster_profiles(chunks, sample_size=DEFAULT_SAMPLE_SIZE, stats=None):
+    """
+    Calcula los perfiles en una sola pasada sobre los bloques de datos.
+
+    Parameters:
+    -----------
+    chunks : iterable of DataFrame
+        Bloques de datos crudos (ej. ``bulk.iter_input_chunks``), con las
+        columnas de ``CREDIT_CARD_SCHEMA``; las columnas extra se ignoran
+    sample_size : int
+        Filas por cluster que se guardan para los cuartiles
+    stats : BulkStats, optional
+        Contador de filas y tiempo
+
+    Returns:
+    --------
+    dict : {cluster: perfil} (ver ``ClusterProfileBuilder.profiles``)
+    """
+    engine = _load_kmeans_engine()
+    builder = ClusterProfileBuilder(engine.n_clusters, sample_size=sample_size)
+    for chunk in chunks:
+        X = CREDIT_CARD_SCHEMA.map_frame(chunk).to_numpy(dtype=np.float64)
+        # Misma imputación que prepare_credit_card_frame
+        clusters, distances = engine.assign(np.where(np.isnan(X), engine.mean, X))
+        builder.update(X, clusters, distances)
+        if stats is not None:
+            stats.rows += len(X)
+            stats.chunks += 1
+    if stats is not None:
+        stats.finished_at = time.perf_counter()
+    return builder.profiles()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfiles de los clusters de K-Means en una sola pasada")
+    parser.add_argument("input", help="Archivo de tarjetas de crédito ('-' para stdin)")
+    parser.add_argument("-o", "--output", default=get_model_path(PROFILES_FILENAME),
+                        help="Archivo .pkl de salida (por defecto modelos/cluster_profiles.pkl)")
+    parser.add_argument("--json", help="Guarda también los perfiles como JSON")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, help="Por defecto se deduce de la extensión")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else args.input
+    input_format = args.input_format or detect_input_format(args.input)
+    stats = BulkStats()
+    profiles = build_cluster_profiles(iter_input_chunks(source, input_format, args.chunk_size),
+                                      args.sample_size, stats)
+
+    with open(args.output, "wb") as f:
+        pickle.dump(profiles, f)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({str(cluster): profile for cluster, profile in profiles.items()}, f,
+                      ensure_ascii=False, indent=2)
+
+    for profile in profiles.values():
+        print(profile['description'], end="\n\n")
+    print(stats.summary(), file=sys.stderr)
+    print(f"Perfiles guardados en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
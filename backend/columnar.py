@@ -0,0 +1,349 @@
+"""
+Entrada y salida binaria por columnas para los endpoints de puntuación por lotes.
+
+``POST /predict/<modelo>/columnar`` acepta:
+
+- Un stream Arrow IPC (``application/vnd.apache.arrow.stream``) con una columna
+  por variable, con los nombres del API o los del dataset original. Las
+  columnas numéricas sin nulos pasan a NumPy sin copia. Las de texto se
+  codifican como diccionario en Arrow y cada valor distinto se traduce una
+  sola vez; las que ya llegan como diccionario no se recorren fila a fila.
+- Un ``.npy`` (``application/x-npy``) con la matriz (n, 17) de tarjetas de
+  crédito en el orden de ``CREDIT_CARD_SCHEMA`` (solo ``kmeans``). La matriz se
+  usa sin copia sobre el cuerpo de la petición y va directa al motor de K-Means.
+
+La respuesta se elige con la cabecera ``Accept``:
+
+- Arrow IPC (por defecto): una columna por resultado; los textos como diccionario
+- ``application/x-npy``: array estructurado con las columnas numéricas del resultado
+- ``application/json``: formato compacto por columnas (ver wire.py)
+
+Arrow requiere pyarrow; el módulo lo importa al primer uso.
+
+Benchmark frente a JSON, desde la raíz del proyecto:
+
+    python -m backend.columnar --rows 100000
+"""
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+from .feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+NPY_TYPE = "application/x-npy"
+NPY_MAGIC = b"\x93NUMPY"
+
+
+class ColumnarFormatError(ValueError):
+    """El cuerpo binario no es válido o no corresponde al esquema del modelo."""
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ImportError("El formato Arrow requiere pyarrow (pip install pyarrow)") from exc
+    return pa
+
+
+def read_npy_matrix(body, n_columns):
+    """
+    Matriz de un ``.npy`` en memoria, sin copiarla.
+
+    Parameters:
+    -----------
+    body : bytes
+        Contenido del archivo ``.npy``
+    n_columns : int
+        Número de columnas esperado
+
+    Returns:
+    --------
+    ndarray : (n, n_columns) float64, de solo lectura si no hubo que convertir el tipo
+
+    Raises:
+    -------
+    ColumnarFormatError : si no es un ``.npy`` numérico de dos dimensiones con ``n_columns`` columnas
+    """
+    if not body.startswith(NPY_MAGIC):
+        raise ColumnarFormatError("El cuerpo no es un archivo .npy")
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as exc:
+        raise ColumnarFormatError(f"Cabecera .npy no válida: {exc}") from exc
+
+    if len(shape) != 2 or shape[1] != n_columns:
+        raise ColumnarFormatError(f"Se esperaba una matriz (n, {n_columns}) y se recibió {shape}")
+    if dtype.kind not in "fiu" or dtype.hasobject:
+        raise ColumnarFormatError(f"La matriz debe ser numérica (se recibió {dtype})")
+
+    count = shape[0] * shape[1]
+    if len(body) - stream.tell() < count * dtype.itemsize:
+        raise ColumnarFormatError("El archivo .npy está incompleto")
+    X = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    X = X.reshape(shape, order="F" if fortran_order else "C")
+    return X if dtype == np.float64 else X.astype(np.float64)
+
+
+def read_arrow_table(body, schema):
+    """
+    Tabla de un stream Arrow IPC en memoria (sin copiar los buffers).
+
+    Como en el formato compacto (ver wire.py), ninguna columna del esquema
+    puede tener nulos (ni NaN en las numéricas).
+
+    Raises:
+    -------
+    ColumnarFormatError : si el stream no es válido, faltan columnas del esquema
+        o alguna tiene valores vacíos
+    """
+    pa = _import_pyarrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except (pa.ArrowInvalid, OSError) as exc:
+        raise ColumnarFormatError(f"Stream Arrow IPC no válido: {exc}") from exc
+
+    names = set(table.column_names)
+    missing = [field.name for field in schema.fields if field.name not in names and field.column not in names]
+    if missing:
+        raise ColumnarFormatError(f"Faltan columnas en los datos {schema.label}: {missing}")
+
+    import pyarrow.compute as pc
+
+    for field in schema.fields:
+        name = field.name if field.name in names else field.column
+        column = table.column(name)
+        if column.null_count or (pa.types.is_floating(column.type) and pc.any(pc.is_nan(column)).as_py()):
+            raise ColumnarFormatError(f"La columna {field.name} tiene valores vacíos")
+    return table
+
+
+def table_columns(table, schema):
+    """
+    Convierte una tabla Arrow a columnas del modelo, como ``schema.map_columns``.
+
+    La tabla debe venir de ``read_arrow_table`` (sin nulos). Las columnas
+    numéricas se leen sin copia. Las categóricas se codifican como diccionario
+    (si no lo están ya) y solo se traducen los valores distintos.
+
+    Returns:
+    --------
+    dict : {columna del modelo: ndarray}; las columnas 'category' como
+        ``pd.Categorical`` con los códigos del diccionario
+    """
+    pa = _import_pyarrow()
+
+    columns = {}
+    for field in schema.fields:
+        name = field.name if field.name in table.column_names else field.column
+        array = table.column(name).combine_chunks()
+
+        if field.kind in ("int", "float"):
+            columns[field.column] = field.convert_array(array.to_numpy(zero_copy_only=False))
+            continue
+
+        if not pa.types.is_dictionary(array.type):
+            array = array.dictionary_encode()
+        if field.kind == "flag":
+            # Un valor traducido por entrada del diccionario
+            labels = field.convert_array(array.dictionary.to_pylist())
+            columns[field.column] = labels[array.indices.to_numpy()]
+        else:
+            columns[field.column] = _translated_categorical(field, array)
+    return columns
+
+
+def _translated_categorical(field, array):
+    """
+    ``pd.Categorical`` con las etiquetas traducidas de una columna de diccionario
+    de Arrow. Los códigos se reutilizan: el codificador compilado de la Regresión
+    Logística hace el one-hot a partir de ellos sin comparar textos fila a fila.
+    """
+    import pandas as pd
+
+    # Etiquetas distintas pueden traducirse al mismo valor ('Sí' y 'Yes')
+    categories = {}
+    remap = np.array(
+        [categories.setdefault(value, len(categories))
+         for value in field.convert_array(array.dictionary.to_pylist())],
+        dtype=np.int64,
+    )
+    codes = remap[array.indices.to_numpy()]
+    return pd.Categorical.from_codes(codes, categories=list(categories))
+
+
+def write_arrow_stream(columns):
+    """
+    Serializa columnas de resultados como stream Arrow IPC.
+
+    Las columnas numéricas se pasan a Arrow sin copia; las de texto se
+    codifican como diccionario (pocas etiquetas distintas).
+
+    Returns:
+    --------
+    bytes
+    """
+    pa = _import_pyarrow()
+
+    arrays = {}
+    for name, values in columns.items():
+        if values.dtype.kind in "OU":
+            arrays[name] = pa.array(values, type=pa.string()).dictionary_encode()
+        else:
+            arrays[name] = pa.array(values)
+    table = pa.table(arrays)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def write_npy(columns):
+    """
+    Serializa las columnas numéricas de los resultados como array estructurado ``.npy``.
+
+    Returns:
+    --------
+    bytes
+    """
+    numeric = {name: values for name, values in columns.items() if values.dtype.kind in "biuf"}
+    count = len(next(iter(columns.values()), ()))
+    records = np.empty(count, dtype=[(name, values.dtype) for name, values in numeric.items()])
+    for name, values in numeric.items():
+        records[name] = values
+    buffer = io.BytesIO()
+    np.save(buffer, records, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def arrow_table_bytes(records, schema, dictionary=True):
+    """
+    Stream Arrow IPC de registros con los nombres del API, para clientes y benchmarks.
+
+    Parameters:
+    -----------
+    dictionary : bool
+        Enviar las columnas de texto codificadas como diccionario
+    """
+    pa = _import_pyarrow()
+
+    arrays = {}
+    for field in schema.fields:
+        values = [record[field.name] for record in records]
+        if field.kind in ("int", "float"):
+            arrays[field.name] = pa.array(values, type=pa.int64() if field.kind == "int" else pa.float64())
+        else:
+            arrays[field.name] = pa.array(values, type=pa.string())
+            if dictionary:
+                arrays[field.name] = arrays[field.name].dictionary_encode()
+    table = pa.table(arrays)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def npy_matrix_bytes(records):
+    """``.npy`` con la matriz (n, 17) de registros de tarjetas de crédito con los nombres del API."""
+    X = np.array([[record[name] for name in CREDIT_CARD_SCHEMA.names] for record in records], dtype=np.float64)
+    buffer = io.BytesIO()
+    np.save(buffer, X.reshape(len(records), len(CREDIT_CARD_SCHEMA.names)), allow_pickle=False)
+    return buffer.getvalue()
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+# Modelo -> (esquema, conjunto sintético, función por columnas de predictors.py)
+BENCH_MODELS = {
+    "logistic": (TELCO_SCHEMA, "telco", "predict_logistic_regression_columns"),
+    "knn": (TELCO_SCHEMA, "telco", "predict_knn_columns"),
+    "kmeans": (CREDIT_CARD_SCHEMA, "credit_card", "predict_kmeans_columns"),
+}
+
+
+def bench_formats(model_name, rows, repeat=3):
+    """
+    Tiempo del lado del servidor (lectura + preparación + modelo + respuesta)
+    de un lote de ``rows`` registros en JSON (como ``/batch``), JSON compacto,
+    Arrow (texto plano o diccionario) y ``.npy``.
+
+    Returns:
+    --------
+    dict : {formato: {'request_bytes', 'total_ms', 'model_ms'}}
+    """
+    from pydantic import TypeAdapter
+
+    from . import predictors
+    from .api import CreditCardRequest, TelcoRequest
+    from .synthetic import synthetic_records
+    from .wire import _best_of, compact_response, dumps, parse_compact_batch, to_compact_request
+
+    schema, dataset, function_name = BENCH_MODELS[model_name]
+    predict = getattr(predictors, function_name)
+    predict_batch = getattr(predictors, function_name.replace("_columns", "_batch"))
+    adapter = TypeAdapter(list[TelcoRequest if schema is TELCO_SCHEMA else CreditCardRequest])
+    records = synthetic_records(dataset, rows)
+
+    bodies = {
+        "json": json.dumps(records, ensure_ascii=False).encode("utf-8"),
+        "compacto": json.dumps(to_compact_request(records, schema), ensure_ascii=False).encode("utf-8"),
+        "arrow": arrow_table_bytes(records, schema, dictionary=False),
+        "arrow+dict": arrow_table_bytes(records, schema),
+    }
+    if model_name == "kmeans":
+        bodies["npy"] = npy_matrix_bytes(records)
+
+    def run(variant, body):
+        if variant == "json":
+            # Igual que /predict/<modelo>/batch
+            return dumps(predict_batch(schema.map_objects(adapter.validate_python(json.loads(body)))))
+        if variant == "compacto":
+            return compact_response(predict(schema.map_columns(parse_compact_batch(body, schema)[1]))).body
+        if variant == "npy":
+            return write_arrow_stream(predictors.predict_kmeans_matrix(read_npy_matrix(body, len(schema.fields))))
+        return write_arrow_stream(predict(table_columns(read_arrow_table(body, schema), schema)))
+
+    # Referencia: solo el modelo, con las columnas ya preparadas
+    prepared = schema.map_columns({name: [record[name] for record in records] for name in schema.names})
+    model_ms, _ = _best_of(lambda: predict(prepared), repeat)
+
+    results = {}
+    for variant, body in bodies.items():
+        total_ms, _ = _best_of(lambda: run(variant, body), repeat)
+        results[variant] = {'request_bytes': len(body), 'total_ms': total_ms, 'model_ms': model_ms}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara la entrada JSON con Arrow IPC y .npy")
+    parser.add_argument("--models", nargs="+", choices=sorted(BENCH_MODELS), default=sorted(BENCH_MODELS))
+    parser.add_argument("--rows", nargs="+", type=int, default=[100000])
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medida (se toma la mejor)")
+    args = parser.parse_args(argv)
+
+    print(f"{'caso':24s} {'formato':12s} {'petición':>11s} {'servidor':>12s} {'solo modelo':>12s} {'filas/s':>12s}")
+    for model_name in args.models:
+        for rows in args.rows:
+            for variant, result in bench_formats(model_name, rows, args.repeat).items():
+                print(f"{model_name + '/rows=' + str(rows):24s} {variant:12s} "
+                      f"{result['request_bytes'] / 1024:8.0f} KB {result['total_ms']:9.1f} ms "
+                      f"{result['model_ms']:9.1f} ms {rows / result['total_ms'] * 1000:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
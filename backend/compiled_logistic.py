@@ -0,0 +1,397 @@
+"""
+Ruta de inferencia compilada para el modelo de Regresión Logística de Telco.
+
+Al cargar ``logreg_model.pkl`` se extraen del Pipeline las medias y escalas del
+``StandardScaler``, las tablas de categorías del ``OneHotEncoder`` y los
+coeficientes del ``LogisticRegression``. Con ellos se puntúan diccionarios,
+DataFrames o columnas con búsquedas en NumPy, sin pasar por pandas ni por el
+``ColumnTransformer``.
+
+Las operaciones replican las de scikit-learn en el mismo orden (centrar,
+escalar, concatenar, producto con ``coef_`` y ``expit``), de modo que las
+probabilidades coinciden bit a bit con ``Pipeline.predict_proba``. Para
+comprobarlo con registros aleatorios:
+
+    python -m backend.compiled_logistic --rows 10000
+"""
+
+import argparse
+import threading
+
+import numpy as np
+
+
+def _categorical_codes(values):
+    """
+    (códigos, categorías) si ``values`` es un ``pd.Categorical`` o una Series
+    categórica; None en otro caso. Los códigos -1 (nulos) quedan como -1.
+    """
+    cat = getattr(values, "cat", None)
+    if cat is not None:
+        values = values.array
+    codes = getattr(values, "codes", None)
+    categories = getattr(values, "categories", None)
+    if codes is None or categories is None:
+        return None
+    return np.asarray(codes), list(categories)
+
+
+class CompiledTelcoEncoder:
+    """
+    Versión en NumPy del ``ColumnTransformer`` de Telco (StandardScaler sobre las
+    columnas numéricas + OneHotEncoder sobre las categóricas, con o sin ``drop``).
+    """
+
+    def __init__(self, numeric_columns, categorical_columns, mean, scale, categories,
+                 drop_idx=None, handle_unknown='ignore'):
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categories = [np.asarray(cats, dtype=object) for cats in categories]
+        # Categoría sin columna propia por variable (OneHotEncoder.drop_idx_), o None
+        if drop_idx is None:
+            drop_idx = [None] * len(self.categories)
+        self.drop_idx = [None if index is None else int(index) for index in drop_idx]
+        # 'error' rechaza las categorías desconocidas, como el OneHotEncoder de origen
+        self.handle_unknown = handle_unknown
+
+        # Por columna categórica: posición en la matriz final de cada categoría
+        # (-1 para la eliminada con ``drop``, que codifica todo ceros)
+        self.targets = []
+        self.lookups = []
+        offset = len(self.numeric_columns)
+        for cats, dropped in zip(self.categories, self.drop_idx):
+            targets = np.full(len(cats), -1, dtype=np.intp)
+            kept = [position for position in range(len(cats)) if position != dropped]
+            targets[kept] = offset + np.arange(len(kept))
+            self.targets.append(targets)
+            self.lookups.append(dict(zip(cats.tolist(), targets.tolist())))
+            offset += len(kept)
+        self.n_features = offset
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor):
+        """
+        Raises:
+        -------
+        ValueError : si el preprocesador no tiene la forma esperada (un
+            ``StandardScaler`` 'num' seguido de un ``OneHotEncoder`` 'cat' sin
+            categorías poco frecuentes, y ninguna otra columna en la salida)
+        """
+        names = [name for name, _, _ in preprocessor.transformers_ if name != 'remainder']
+        if names != ['num', 'cat']:
+            raise ValueError(f"Se esperaban los transformadores 'num' y 'cat' en ese orden, no {names}")
+        # El resto de columnas debe descartarse: 'passthrough' u otro transformador
+        # añadirían columnas a la matriz que el codificador compilado no genera
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'remainder' and transformer != 'drop' and len(columns):
+                raise ValueError("El ColumnTransformer debe descartar el resto de columnas (remainder='drop')")
+        transformers = {name: (transformer, columns)
+                        for name, transformer, columns in preprocessor.transformers_
+                        if name != 'remainder'}
+        scaler, numeric_columns = transformers['num']
+        encoder, categorical_columns = transformers['cat']
+        if getattr(scaler, 'mean_', None) is None or getattr(scaler, 'scale_', None) is None:
+            raise ValueError("El transformador 'num' debe ser un StandardScaler con media y escala")
+        if not hasattr(encoder, 'categories_') or getattr(encoder, '_infrequent_enabled', False):
+            raise ValueError("El transformador 'cat' debe ser un OneHotEncoder sin categorías poco frecuentes")
+        handle_unknown = 'error' if encoder.handle_unknown == 'error' else 'ignore'
+        return cls(numeric_columns, categorical_columns, scaler.mean_, scaler.scale_, encoder.categories_,
+                   encoder.drop_idx_, handle_unknown)
+
+    def to_arrays(self):
+        """
+        Parámetros del codificador separados en arrays numéricos y metadatos JSON.
+
+        Returns:
+        --------
+        tuple : ({'mean', 'scale'}, {'numeric_columns', 'categorical_columns',
+            'categories', 'drop_idx', 'handle_unknown'})
+        """
+        arrays = {'mean': self.mean, 'scale': self.scale}
+        metadata = {
+            'numeric_columns': self.numeric_columns,
+            'categorical_columns': self.categorical_columns,
+            'categories': [cats.tolist() for cats in self.categories],
+            'drop_idx': self.drop_idx,
+            'handle_unknown': self.handle_unknown,
+        }
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        # Las exportaciones anteriores no guardaban drop_idx ni handle_unknown
+        return cls(metadata['numeric_columns'], metadata['categorical_columns'],
+                   arrays['mean'], arrays['scale'], metadata['categories'],
+                   metadata.get('drop_idx'), metadata.get('handle_unknown', 'ignore'))
+
+    def matches(self, other):
+        """True si ``other`` produce la misma matriz: mismas columnas, escalas y categorías."""
+        return (
+            self.numeric_columns == other.numeric_columns
+            and self.categorical_columns == other.categorical_columns
+            and np.array_equal(self.mean, other.mean)
+            and np.array_equal(self.scale, other.scale)
+            and len(self.categories) == len(other.categories)
+            and all(np.array_equal(a, b) for a, b in zip(self.categories, other.categories))
+            and self.drop_idx == other.drop_idx
+            and self.handle_unknown == other.handle_unknown
+        )
+
+    def _raise_unknown(self, name, value):
+        raise ValueError(f"Categoría desconocida {value!r} en la columna {name}")
+
+    def encode_records(self, records):
+        """
+        Codifica una lista de diccionarios (formato de ``prepare_telco_input``).
+
+        Returns:
+        --------
+        ndarray : Matriz (n_registros, n_features) igual a la del ``ColumnTransformer``
+
+        Raises:
+        -------
+        ValueError : si hay una categoría desconocida y ``handle_unknown='error'``
+        """
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        n_numeric = len(self.numeric_columns)
+        strict = self.handle_unknown == 'error'
+        for row, record in enumerate(records):
+            for col, name in enumerate(self.numeric_columns):
+                X[row, col] = record[name]
+            for name, lookup in zip(self.categorical_columns, self.lookups):
+                position = lookup.get(record[name])
+                if position is None:
+                    if strict:
+                        self._raise_unknown(name, record[name])
+                elif position >= 0:
+                    X[row, position] = 1.0
+        X[:, :n_numeric] -= self.mean
+        X[:, :n_numeric] /= self.scale
+        return X
+
+    def encode_columns(self, columns):
+        """
+        Codifica datos por columnas (DataFrame o diccionario de arrays).
+
+        Returns:
+        --------
+        ndarray : Matriz (n_filas, n_features) igual a la del ``ColumnTransformer``
+
+        Raises:
+        -------
+        ValueError : si hay una categoría desconocida y ``handle_unknown='error'``
+        """
+        n_rows = len(columns[self.numeric_columns[0]])
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        n_numeric = len(self.numeric_columns)
+        for col, name in enumerate(self.numeric_columns):
+            X[:, col] = np.asarray(columns[name], dtype=np.float64)
+
+        rows = np.arange(n_rows)
+        strict = self.handle_unknown == 'error'
+        for name, cats, targets, lookup in zip(self.categorical_columns, self.categories,
+                                               self.targets, self.lookups):
+            categorical = _categorical_codes(columns[name])
+            if categorical is not None:
+                # Columna categórica (ej. diccionario de Arrow): se busca la
+                # posición de cada categoría una vez y se indexa con los códigos.
+                # -2 marca las desconocidas; el código -1 (nulo) también lo es
+                codes, values = categorical
+                value_targets = np.array([lookup.get(value, -2) for value in values] + [-2], dtype=np.intp)
+                column_targets = value_targets[codes]
+                if strict and (column_targets == -2).any():
+                    code = codes[column_targets == -2][0]
+                    self._raise_unknown(name, values[code] if code >= 0 else None)
+            else:
+                values = np.asarray(columns[name], dtype=object)
+                positions = np.searchsorted(cats, values)
+                positions = np.minimum(positions, len(cats) - 1)
+                known = cats[positions] == values
+                if strict and not known.all():
+                    self._raise_unknown(name, values[~known][0])
+                column_targets = np.where(known, targets[positions], -1)
+            selected = column_targets >= 0
+            X[rows[selected], column_targets[selected]] = 1.0
+        X[:, :n_numeric] -= self.mean
+        X[:, :n_numeric] /= self.scale
+        return X
+
+    def encode(self, data):
+        """Codifica una lista de diccionarios, un DataFrame o un diccionario de arrays."""
+        if isinstance(data, (list, tuple)):
+            return self.encode_records(data)
+        return self.encode_columns(data)
+
+
+class CompiledLogisticModel:
+    """
+    Versión en NumPy puro de un Pipeline ``ColumnTransformer`` (StandardScaler +
+    OneHotEncoder) + ``LogisticRegression`` binario.
+    """
+
+    def __init__(self, encoder, coef, intercept, classes):
+        if len(classes) != 2:
+            raise ValueError("Solo se soportan modelos de Regresión Logística binarios")
+        self.encoder = encoder
+        self.coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        if len(pipeline.steps) != 2 or not hasattr(pipeline[-1], 'coef_'):
+            raise ValueError("Se esperaba un Pipeline (preprocesador, LogisticRegression)")
+        classifier = pipeline[-1]
+        encoder = CompiledTelcoEncoder.from_column_transformer(pipeline[0])
+        if classifier.coef_.shape[1] != encoder.n_features:
+            raise ValueError(f"El modelo tiene {classifier.coef_.shape[1]} coeficientes y el "
+                             f"preprocesador genera {encoder.n_features} columnas")
+        return cls(encoder, classifier.coef_, classifier.intercept_, classifier.classes_)
+
+    def to_arrays(self):
+        """
+        Parámetros del modelo separados en arrays numéricos y metadatos JSON
+        (ver ``CompiledTelcoEncoder.to_arrays``).
+        """
+        arrays, metadata = self.encoder.to_arrays()
+        arrays.update({
+            'coef': self.coef_t.T,
+            'intercept': self.intercept,
+            'classes': self.classes_,
+        })
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        encoder = CompiledTelcoEncoder.from_arrays(arrays, metadata)
+        return cls(encoder, arrays['coef'], arrays['intercept'], arrays['classes'])
+
+    def predict_proba_encoded(self, X):
+        """Probabilidades [no churn, churn] a partir de la matriz ya codificada."""
+        # Misma función que usa scikit-learn; scipy se importa en la primera predicción
+        from scipy.special import expit
+
+        scores = (X @ self.coef_t + self.intercept).reshape(-1)
+        expit(scores, out=scores)
+        return np.vstack([1 - scores, scores]).T
+
+    def predict_proba(self, data):
+        """
+        Probabilidades por clase, como ``Pipeline.predict_proba``.
+
+        Parameters:
+        -----------
+        data : list of dict, DataFrame o dict de arrays
+            Datos Telco con las columnas del modelo
+
+        Returns:
+        --------
+        ndarray : Forma (n_filas, 2), columnas en el orden de ``classes_``
+        """
+        return self.predict_proba_encoded(self.encoder.encode(data))
+
+
+# Modelo compilado para el último Pipeline visto: (pipeline de origen, modelo compilado)
+_compiled = None
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_logistic(pipeline):
+    """
+    Devuelve la versión compilada de ``pipeline``, generándola solo la primera
+    vez o cuando el registro recarga un modelo nuevo. Si ``pipeline`` ya es un
+    modelo compilado (cargado desde su artefacto) se devuelve tal cual; si su
+    estructura no se puede compilar, se avisa y se devuelve el propio Pipeline.
+    """
+    global _compiled
+    if isinstance(pipeline, CompiledLogisticModel):
+        return pipeline
+
+    entry = _compiled
+    if entry is not None and entry[0] is pipeline:
+        return entry[1]
+
+    with _compiled_lock:
+        if _compiled is None or _compiled[0] is not pipeline:
+            try:
+                compiled = CompiledLogisticModel.from_pipeline(pipeline)
+            except ValueError as e:
+                print(f"⚠️ No se puede compilar el modelo de Regresión Logística ({e}); se usa el Pipeline")
+                compiled = pipeline
+            _compiled = (pipeline, compiled)
+        return _compiled[1]
+
+
+def random_records(compiled, n_rows, random_state=0, unknown_rate=0.02):
+    """
+    Genera registros aleatorios con las categorías conocidas por el modelo
+    (y una fracción ``unknown_rate`` de desconocidas) para comprobar la paridad.
+    """
+    encoder = compiled.encoder
+    rng = np.random.default_rng(random_state)
+    records = []
+    for _ in range(n_rows):
+        record = {}
+        for name, mean, scale in zip(encoder.numeric_columns, encoder.mean, encoder.scale):
+            record[name] = float(rng.normal(mean, scale))
+        record['SeniorCitizen'] = int(rng.integers(0, 2))
+        for name, cats in zip(encoder.categorical_columns, encoder.categories):
+            record[name] = cats[rng.integers(0, len(cats))] if rng.random() >= unknown_rate else "Desconocido"
+        records.append(record)
+    return records
+
+
+def check_parity(pipeline, records):
+    """
+    Compara la ruta compilada con ``Pipeline.predict_proba``.
+
+    Returns:
+    --------
+    dict : Número de filas, si coinciden bit a bit (por registros y por columnas)
+        y la diferencia absoluta máxima
+    """
+    import pandas as pd
+
+    compiled = CompiledLogisticModel.from_pipeline(pipeline)
+    df = pd.DataFrame(records)
+    expected = pipeline.predict_proba(df)
+    from_records = compiled.predict_proba(records)
+    from_columns = compiled.predict_proba(df)
+    return {
+        'rows': len(records),
+        'records_identical': bool(np.array_equal(expected, from_records)),
+        'columns_identical': bool(np.array_equal(expected, from_columns)),
+        'max_abs_diff': float(max(np.abs(expected - from_records).max(),
+                                  np.abs(expected - from_columns).max())),
+    }
+
+
+def main(argv=None):
+    from .model_loader import load_pickle
+
+    parser = argparse.ArgumentParser(description="Paridad de la ruta compilada con Pipeline.predict_proba")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pipeline = load_pickle("logreg_model.pkl")
+    if pipeline is None:
+        raise SystemExit("No se encontró el modelo de Regresión Logística")
+
+    try:
+        compiled = CompiledLogisticModel.from_pipeline(pipeline)
+    except ValueError as e:
+        raise SystemExit(f"El modelo no se puede compilar: {e}")
+    # Con handle_unknown='error' el Pipeline rechaza las categorías desconocidas
+    unknown_rate = 0.0 if compiled.encoder.handle_unknown == 'error' else 0.02
+    records = random_records(compiled, args.rows, args.seed, unknown_rate)
+    result = check_parity(pipeline, records)
+    print(result)
+    if not (result['records_identical'] and result['columns_identical']):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
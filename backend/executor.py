@@ -0,0 +1,177 @@
+"""
+Ejecutor de inferencia para el API.
+
+Los endpoints asíncronos delegan el trabajo de CPU (preparación y predicción)
+en un pool de hilos o de procesos propio, en lugar del threadpool genérico de
+Starlette. Cada modelo tiene:
+
+- un límite de ejecuciones concurrentes dentro del pool, para que una ráfaga
+  de peticiones KNN no ocupe todos los workers y deje sin servicio a la
+  Regresión Logística;
+- una cola acotada de peticiones pendientes: si está llena, la petición se
+  rechaza de inmediato (el API responde 429);
+- un tiempo máximo por petición, contando la espera en cola (el API responde 504).
+
+Configuración por variables de entorno:
+
+- ``INFERENCE_EXECUTOR``: 'thread' (por defecto) o 'process'
+- ``INFERENCE_WORKERS``: tamaño del pool
+- ``INFERENCE_CONCURRENCY``: límites por modelo, ej. 'knn=1,logistic=4'
+  (por defecto la mitad del pool para cada modelo, con un mínimo de 1)
+- ``INFERENCE_MAX_PENDING``: peticiones pendientes por modelo (por defecto 64)
+- ``INFERENCE_TIMEOUT``: segundos por petición (por defecto 30)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .metrics import observe_stage, stage
+from .warmup import ReadinessTracker, run_startup
+
+
+MODEL_NAMES = ("logistic", "knn", "kmeans", "ensemble")
+
+
+class InferenceQueueFull(Exception):
+    """La cola de un modelo está llena; la petición debe reintentarse más tarde."""
+
+
+class InferenceTimeout(Exception):
+    """La petición superó el tiempo máximo de inferencia."""
+
+
+def _parse_limits(value):
+    limits = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, _, limit = item.partition("=")
+        limits[name.strip()] = max(1, int(limit))
+    return limits
+
+
+class _ModelLimiter:
+    """Límite de concurrencia y de peticiones pendientes de un modelo."""
+
+    def __init__(self, max_concurrency, max_pending):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.pending = 0
+
+
+def _initialize_worker():
+    # Cada proceso del pool carga (o conecta) y calienta sus propios modelos
+    run_startup(ReadinessTracker())
+
+
+def _release_from_worker(loop, semaphore):
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # El loop ya se cerró (apagado del servidor)
+        pass
+
+
+class InferenceExecutor:
+    """Pool de inferencia con límites por modelo, cola acotada y timeouts."""
+
+    def __init__(self, kind="thread", workers=None, concurrency=None,
+                 max_pending=64, timeout=30.0):
+        """
+        Parameters:
+        -----------
+        kind : str
+            'thread' o 'process'
+        workers : int, optional
+            Tamaño del pool (por defecto min(4, núcleos))
+        concurrency : dict, optional
+            Límite de ejecuciones concurrentes por modelo ({'knn': 1, ...})
+        max_pending : int
+            Peticiones pendientes admitidas por modelo antes de rechazar
+        timeout : float
+            Segundos máximos por petición, incluida la espera
+        """
+        workers = workers or min(4, os.cpu_count() or 1)
+        if kind == "process":
+            # 'spawn' en lugar de fork: el API carga los modelos en un hilo de fondo
+            # y un fork en mitad de un import dejaría bloqueado al proceso hijo
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        elif kind == "thread":
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        else:
+            raise ValueError(f"Tipo de ejecutor no soportado: {kind}")
+
+        self.kind = kind
+        self.workers = workers
+        self.timeout = timeout
+        limits = {name: max(1, workers // 2) for name in MODEL_NAMES}
+        limits.update(concurrency or {})
+        self.limiters = {
+            name: _ModelLimiter(min(limit, workers), max_pending)
+            for name, limit in limits.items()
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            kind=os.getenv("INFERENCE_EXECUTOR", "thread"),
+            workers=int(os.getenv("INFERENCE_WORKERS", "0")) or None,
+            concurrency=_parse_limits(os.getenv("INFERENCE_CONCURRENCY")),
+            max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "64")),
+            timeout=float(os.getenv("INFERENCE_TIMEOUT", "30")),
+        )
+
+    async def run(self, model_name, fn, *args):
+        """
+        Ejecuta ``fn(*args)`` en el pool respetando los límites de ``model_name``.
+
+        Raises:
+        -------
+        InferenceQueueFull : si el modelo ya tiene ``max_pending`` peticiones pendientes
+        InferenceTimeout : si la petición (espera + ejecución) supera ``timeout``
+        """
+        limiter = self.limiters[model_name]
+        if limiter.pending >= limiter.max_pending:
+            raise InferenceQueueFull(f"Demasiadas peticiones pendientes para el modelo {model_name}")
+
+        limiter.pending += 1
+        try:
+            return await asyncio.wait_for(self._submit(model_name, limiter, fn, args), self.timeout)
+        except asyncio.TimeoutError as exc:
+            raise InferenceTimeout(f"La inferencia de {model_name} superó {self.timeout} s") from exc
+        finally:
+            limiter.pending -= 1
+
+    async def _submit(self, model_name, limiter, fn, args):
+        queued_at = time.perf_counter()
+        await limiter.semaphore.acquire()
+        observe_stage(model_name, "queue", time.perf_counter() - queued_at)
+        try:
+            future = self.pool.submit(fn, *args)
+        except BaseException:
+            limiter.semaphore.release()
+            raise
+
+        # El hueco se libera cuando el worker termina de verdad, aunque la
+        # petición ya haya expirado: así el límite de concurrencia se respeta
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: _release_from_worker(loop, limiter.semaphore))
+        with stage(model_name, "execution"):
+            return await asyncio.wrap_future(future)
+
+    def stats(self):
+        """Estado actual: peticiones pendientes y límites por modelo."""
+        return {
+            name: {
+                'pending': limiter.pending,
+                'max_pending': limiter.max_pending,
+                'max_concurrency': limiter.max_concurrency,
+            }
+            for name, limiter in self.limiters.items()
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,288 @@
+"""
+Esquema declarativo de las variables de entrada de los modelos.
+
+Cada campo de Telco y de tarjetas de crédito se define una sola vez: nombre en
+el API y en el formulario, columna que espera el modelo, tipo, etiquetas en
+español -> valor del modelo y valor por defecto. A partir del esquema se
+obtienen:
+
+- ``map_values`` / ``map_record``: conversión rápida de un registro (una
+  búsqueda en tablas precalculadas por campo)
+- ``map_columns``: conversión por columnas a arrays de NumPy, sin construir
+  un diccionario por fila
+- ``map_frame``: lo mismo para un DataFrame de pandas (columnas con los
+  nombres del API o con los del dataset original); las etiquetas se traducen
+  una vez por valor distinto, no por fila
+
+Tipos de campo:
+
+- ``category``: texto; las etiquetas conocidas se traducen y el resto (por
+  ejemplo valores ya en inglés) se deja igual
+- ``flag``: texto 'Sí'/'No' que el modelo recibe como 1/0
+- ``int`` / ``float``: numéricos; los vacíos toman el valor por defecto del
+  campo (o quedan como faltantes si no tiene)
+
+Este módulo no importa pandas ni NumPy al cargarse, así que el API puede
+usarlo desde el arranque.
+"""
+
+import operator
+
+
+# Convertir valores en español a inglés para el modelo
+GENDER_LABELS = {"Masculino": "Male", "Femenino": "Female"}
+YES_NO_LABELS = {"Sí": "Yes", "No": "No"}
+CONTRACT_LABELS = {"Mensual": "Month-to-month", "Un año": "One year", "Dos años": "Two year"}
+PAYMENT_LABELS = {
+    "Cheque electrónico": "Electronic check",
+    "Cheque por correo": "Mailed check",
+    "Transferencia bancaria (automática)": "Bank transfer (automatic)",
+    "Tarjeta de crédito (automática)": "Credit card (automatic)"
+}
+INTERNET_LABELS = {"Fibra óptica": "Fiber optic", "DSL": "DSL", "No": "No"}
+NO_SERVICE_LABELS = {"Sin servicio telefónico": "No phone service", "Sin servicio de internet": "No internet service"}
+SERVICE_LABELS = {**YES_NO_LABELS, **NO_SERVICE_LABELS}
+FLAG_LABELS = {"Sí": 1, "No": 0}
+
+# Tipo de campo -> tipo de Python con que llega en el API
+FIELD_TYPES = {"category": str, "flag": str, "int": int, "float": float}
+
+
+class FeatureField:
+    """Una variable de entrada."""
+
+    def __init__(self, name, column, kind, labels=None, default=None):
+        """
+        Parameters:
+        -----------
+        name : str
+            Nombre en el API y en el formulario (ej. 'senior_citizen')
+        column : str
+            Columna que espera el modelo (ej. 'SeniorCitizen')
+        kind : str
+            'category', 'flag', 'int' o 'float'
+        labels : dict, optional
+            Etiquetas del formulario -> valor del modelo
+        default : object, optional
+            Valor para entradas vacías (en 'flag', también para etiquetas desconocidas)
+        """
+        if kind not in FIELD_TYPES:
+            raise ValueError(f"Tipo de campo no soportado: {kind}")
+        self.name = name
+        self.column = column
+        self.kind = kind
+        self.labels = dict(labels or {})
+        self.default = default
+        self.python_type = FIELD_TYPES[kind]
+        # Conversión en dos pasos: búsqueda en la tabla de etiquetas y, si hace
+        # falta, un ajuste final (entero de 'flag', valor por defecto)
+        self.lookup = self.labels.get
+        self.finish = self._make_finish()
+
+    def _make_finish(self):
+        """Ajuste tras la búsqueda en ``labels`` (None si no hace falta ninguno)."""
+        default = self.default
+        if self.kind == "flag":
+            def finish_flag(value):
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return default
+            return finish_flag
+        if self.kind == "category" or default is None:
+            return None
+        return lambda value: default if value is None else value
+
+    def convert(self, value):
+        """Convierte un valor individual al formato del modelo."""
+        value = self.lookup(value, value)
+        return value if self.finish is None else self.finish(value)
+
+    def convert_array(self, values):
+        """
+        Versión vectorizada de ``convert`` para una columna.
+
+        Parameters:
+        -----------
+        values : Series, ndarray o list
+            Con una Series de pandas cada valor distinto se convierte una sola
+            vez (``factorize``); una lista se recorre con la tabla de etiquetas
+
+        Returns:
+        --------
+        ndarray : object para 'category', int64 para 'flag' y float64 para los
+            numéricos (int64 en 'int' con valor por defecto y sin decimales)
+        """
+        import numpy as np
+
+        if self.kind in ("int", "float"):
+            try:
+                array = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                array = np.array([_to_float(value) for value in values], dtype=np.float64)
+            if self.default is not None:
+                array = np.where(np.isnan(array), self.default, array)
+                if self.kind == "int" and np.array_equal(array, np.trunc(array)):
+                    array = array.astype(np.int64)
+            return array
+
+        dtype = np.int64 if self.kind == "flag" else object
+        factorize = getattr(values, "factorize", None)
+        if factorize is not None:
+            codes, values = factorize(use_na_sentinel=False)
+        # map() con dos iterables hace ``lookup(value, value)`` sin bucle en Python
+        converted = map(self.lookup, values, values)
+        if self.finish is not None:
+            converted = map(self.finish, converted)
+        converted = np.fromiter(converted, dtype=dtype, count=len(values))
+        return converted[codes] if factorize is not None else converted
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class FeatureSchema:
+    """Conjunto ordenado de variables de entrada de un modelo."""
+
+    def __init__(self, label, fields):
+        """
+        Parameters:
+        -----------
+        label : str
+            Nombre de los datos para los mensajes de error (ej. 'Telco')
+        fields : list of FeatureField
+            Campos en el orden de columnas que espera el modelo
+        """
+        self.label = label
+        self.fields = tuple(fields)
+        self.names = [field.name for field in self.fields]
+        self.columns = [field.column for field in self.fields]
+        self.numeric_columns = [field.column for field in self.fields if field.kind in ("int", "float")]
+        self.aliases = {field.name: field.column for field in self.fields if field.name != field.column}
+        self._mappers = [(field.column, field.lookup, field.finish) for field in self.fields]
+        self._getters = [operator.attrgetter(field.name) for field in self.fields]
+
+    def map_values(self, values):
+        """
+        Convierte un registro dado como secuencia de valores en el orden de los campos.
+
+        Returns:
+        --------
+        dict : {columna del modelo: valor}
+        """
+        record = {}
+        for (column, lookup, finish), value in zip(self._mappers, values):
+            value = lookup(value, value)
+            record[column] = value if finish is None else finish(value)
+        return record
+
+    def map_record(self, record):
+        """Convierte un registro con los nombres del API (ej. un formulario o ``request.__dict__``)."""
+        return self.map_values([record[name] for name in self.names])
+
+    def map_object(self, item):
+        """Convierte un objeto con un atributo por campo (ej. un modelo de Pydantic)."""
+        return self.map_values([getter(item) for getter in self._getters])
+
+    def map_columns(self, columns):
+        """
+        Convierte datos por columnas.
+
+        Parameters:
+        -----------
+        columns : dict
+            {nombre del API o columna del modelo: secuencia de valores}
+
+        Returns:
+        --------
+        dict : {columna del modelo: ndarray}, en el orden de ``columns``
+        """
+        missing = [field.column for field in self.fields
+                   if field.name not in columns and field.column not in columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en los datos {self.label}: {missing}")
+        return {
+            field.column: field.convert_array(columns[field.name] if field.name in columns else columns[field.column])
+            for field in self.fields
+        }
+
+    def map_objects(self, items):
+        """``map_columns`` para una lista de objetos con un atributo por campo."""
+        return self.map_columns({
+            field.name: [getter(item) for item in items]
+            for field, getter in zip(self.fields, self._getters)
+        })
+
+    def map_frame(self, df):
+        """
+        Versión para un DataFrame completo. Acepta columnas con los nombres del API
+        o con los del dataset original, y valores en español o ya en inglés.
+
+        Returns:
+        --------
+        DataFrame : Columnas de ``columns``, con el mismo índice de ``df``
+        """
+        import pandas as pd
+
+        df = df.rename(columns=self.aliases)
+        columns = {}
+        for field in self.fields:
+            if field.column in df.columns and field.kind in ("int", "float"):
+                # to_numeric convierte por columna los textos vacíos del CSV original
+                columns[field.column] = pd.to_numeric(df[field.column], errors='coerce').to_numpy()
+            elif field.column in df.columns:
+                columns[field.column] = df[field.column]
+        return pd.DataFrame(self.map_columns(columns), index=df.index)
+
+
+TELCO_SCHEMA = FeatureSchema("Telco", [
+    FeatureField("gender", "gender", "category", GENDER_LABELS),
+    FeatureField("senior_citizen", "SeniorCitizen", "flag", FLAG_LABELS, default=0),
+    FeatureField("partner", "Partner", "category", YES_NO_LABELS),
+    FeatureField("dependents", "Dependents", "category", YES_NO_LABELS),
+    FeatureField("tenure", "tenure", "int", default=0),
+    FeatureField("phone_service", "PhoneService", "category", YES_NO_LABELS),
+    FeatureField("multiple_lines", "MultipleLines", "category", SERVICE_LABELS),
+    FeatureField("internet_service", "InternetService", "category", INTERNET_LABELS),
+    FeatureField("online_security", "OnlineSecurity", "category", SERVICE_LABELS),
+    FeatureField("online_backup", "OnlineBackup", "category", SERVICE_LABELS),
+    FeatureField("device_protection", "DeviceProtection", "category", SERVICE_LABELS),
+    FeatureField("tech_support", "TechSupport", "category", SERVICE_LABELS),
+    FeatureField("streaming_tv", "StreamingTV", "category", SERVICE_LABELS),
+    FeatureField("streaming_movies", "StreamingMovies", "category", SERVICE_LABELS),
+    FeatureField("contract", "Contract", "category", CONTRACT_LABELS),
+    FeatureField("paperless_billing", "PaperlessBilling", "category", YES_NO_LABELS),
+    FeatureField("payment_method", "PaymentMethod", "category", PAYMENT_LABELS),
+    FeatureField("monthly_charges", "MonthlyCharges", "float", default=0.0),
+    # TotalCharges viene vacío en clientes nuevos del CSV original
+    FeatureField("total_charges", "TotalCharges", "float", default=0.0),
+])
+
+# Mismo nombre en el API y en el modelo; los faltantes se imputan con la media
+# del escalador de K-Means (ver predictors.prepare_credit_card_frame)
+CREDIT_CARD_SCHEMA = FeatureSchema("de tarjetas de crédito", [
+    FeatureField(name, name, kind)
+    for name, kind in [
+        ("BALANCE", "float"),
+        ("BALANCE_FREQUENCY", "float"),
+        ("PURCHASES", "float"),
+        ("ONEOFF_PURCHASES", "float"),
+        ("INSTALLMENTS_PURCHASES", "float"),
+        ("CASH_ADVANCE", "float"),
+        ("PURCHASES_FREQUENCY", "float"),
+        ("ONEOFF_PURCHASES_FREQUENCY", "float"),
+        ("PURCHASES_INSTALLMENTS_FREQUENCY", "float"),
+        ("CASH_ADVANCE_FREQUENCY", "float"),
+        ("CASH_ADVANCE_TRX", "int"),
+        ("PURCHASES_TRX", "int"),
+        ("CREDIT_LIMIT", "float"),
+        ("PAYMENTS", "float"),
+        ("MINIMUM_PAYMENTS", "float"),
+        ("PRC_FULL_PAYMENT", "float"),
+        ("TENURE", "int"),
+    ]
+])
@@ -0,0 +1,416 @@
+"""
+Métricas del API en formato de texto de Prometheus (``GET /metrics``).
+
+Con ``METRICS_ENABLED=1`` se registran por modelo y por etapa histogramas de
+latencia, para ver dónde se va el tiempo de cada petición:
+
+- ``request``: petición HTTP completa
+- ``framework``: validación de Pydantic, enrutado y serialización de la
+  respuesta (la petición completa menos el tiempo del endpoint)
+- ``prepare``: mapeo del formulario al formato del modelo (``prepare_*_input``)
+- ``queue``: espera de un hueco del modelo en el ejecutor de inferencia
+- ``execution``: ejecución en el pool (incluye las etapas siguientes)
+- ``frame``: construcción del DataFrame o de la matriz de entrada
+- ``transform``: preprocesado (escalado y codificación de categorías)
+- ``classifier``: clasificador o asignación de cluster
+- ``format``: construcción de los resultados
+
+Además se cuentan las peticiones por endpoint y código de estado, los errores
+de inferencia por tipo y el tamaño de los lotes (``/batch`` y bloques de
+``/bulk``). El estado del ejecutor, los lotes del micro-batching, la caché de
+resultados y los tiempos de carga de los modelos se leen de sus propias
+estadísticas al generar la respuesta, así que están disponibles aunque la
+instrumentación esté desactivada.
+
+Desactivada (por defecto), cada punto de medida es una llamada que devuelve un
+contexto vacío y el middleware HTTP no se instala.
+
+Con ``INFERENCE_EXECUTOR=process`` las etapas ``frame`` a ``format`` se
+ejecutan en los procesos del pool y no aparecen en ``/metrics``.
+
+Configuración por variables de entorno:
+
+- ``METRICS_ENABLED``: '1' para registrar las latencias por etapa (desactivado por defecto)
+"""
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites superiores (segundos) de los buckets de latencia
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Límites superiores de los buckets de tamaño de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 5000, 10000)
+
+# Nombre -> (tipo, descripción) de las métricas que se registran por petición
+METRIC_DEFINITIONS = {
+    "ml_stage_duration_seconds": ("histogram", "Duración de cada etapa de la predicción"),
+    "ml_http_request_duration_seconds": ("histogram", "Duración de las peticiones HTTP"),
+    "ml_http_requests_total": ("counter", "Peticiones HTTP por endpoint y código de estado"),
+    "ml_inference_errors_total": ("counter", "Errores de inferencia por modelo y tipo"),
+    "ml_batch_size": ("histogram", "Registros por lote de predicción"),
+}
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        # bisect_left: un valor igual al límite cuenta en ese bucket (le=)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, labels):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        samples = []
+        for bucket, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", {**labels, 'le': bucket}, cumulative))
+        samples.append(("_sum", labels, total))
+        samples.append(("_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """Contadores e histogramas por nombre y etiquetas, seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {name: {} for name in METRIC_DEFINITIONS}
+
+    def increment(self, name, labels, amount=1):
+        key = tuple(labels.items())
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def histogram(self, name, labels, buckets=LATENCY_BUCKETS):
+        """Histograma de ``name`` con esas etiquetas, creado en la primera observación."""
+        key = tuple(labels.items())
+        histogram = self._values[name].get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values[name].setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        self.histogram(name, labels, buckets).observe(value)
+
+    def families(self):
+        """
+        Returns:
+        --------
+        list of tuple : (nombre, tipo, descripción, muestras) por métrica, con
+            muestras (sufijo, etiquetas, valor)
+        """
+        families = []
+        for name, values in self._values.items():
+            kind, description = METRIC_DEFINITIONS[name]
+            with self._lock:
+                items = sorted(values.items(), key=lambda item: item[0])
+            samples = []
+            for key, value in items:
+                labels = dict(key)
+                if kind == "histogram":
+                    samples.extend(value.samples(labels))
+                else:
+                    samples.append(("", labels, value))
+            families.append((name, kind, description, samples))
+        return families
+
+    def clear(self):
+        with self._lock:
+            for values in self._values.values():
+                values.clear()
+        _stage_histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+_NULL_STAGE = contextlib.nullcontext()
+
+# Hilos con la medición pausada (ej. predicciones de calentamiento)
+_paused = threading.local()
+
+
+# (modelo, etapa) -> histograma, para no construir las etiquetas en cada medida
+_stage_histograms = {}
+
+
+def _stage_histogram(model, name):
+    histogram = _stage_histograms.get((model, name))
+    if histogram is None:
+        histogram = REGISTRY.histogram("ml_stage_duration_seconds", {'model': model, 'stage': name})
+        _stage_histograms[(model, name)] = histogram
+    return histogram
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+def _recording():
+    """Si se registran métricas en el hilo actual (activadas y sin pausar)."""
+    return METRICS_ENABLED and not getattr(_paused, 'active', False)
+
+
+def stage(model, name):
+    """
+    Contexto que mide la duración de una etapa de ``model``.
+
+    Ejemplo::
+
+        with stage("knn", "transform"):
+            X = model.transform(df)
+    """
+    # En pausa tampoco se crea la serie: no aparecen histogramas vacíos en /metrics
+    if not _recording():
+        return _NULL_STAGE
+    return _StageTimer(_stage_histogram(model, name))
+
+
+def observe_stage(model, name, seconds):
+    if _recording():
+        _stage_histogram(model, name).observe(seconds)
+
+
+@contextlib.contextmanager
+def paused():
+    """
+    No registra métricas en el hilo actual (las predicciones de calentamiento
+    no son tráfico real): ni etapas, ni tamaños de lote, ni errores.
+    """
+    previous = getattr(_paused, 'active', False)
+    _paused.active = True
+    try:
+        yield
+    finally:
+        _paused.active = previous
+
+
+def observe_batch_size(model, source, size):
+    """Registra el tamaño de un lote (``source``: 'batch', 'compact', 'columnar' o 'bulk')."""
+    if _recording():
+        REGISTRY.observe("ml_batch_size", {'model': model, 'source': source}, size, BATCH_SIZE_BUCKETS)
+
+
+def count_error(model, error):
+    if _recording():
+        REGISTRY.increment("ml_inference_errors_total", {'model': model, 'error': error})
+
+
+# Petición HTTP en curso: el endpoint anota su modelo y su duración para que el
+# middleware calcule el tiempo de validación y serialización
+_current_request = contextvars.ContextVar("ml_current_request", default=None)
+
+
+def instrumented(model=None, models=()):
+    """
+    Decorador para endpoints asíncronos de predicción: registra el tiempo del
+    endpoint como parte de la petición de ``model``. Sin métricas no cambia la función.
+
+    Con ``model=None`` el modelo es el parámetro de ruta ``model_name``
+    (ej. ``/predict/{model_name}/compact``), y solo se registra si está en
+    ``models``: un nombre arbitrario en la URL no crea series nuevas.
+    """
+    def decorator(endpoint):
+        if not METRICS_ENABLED:
+            return endpoint
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                request = _current_request.get()
+                name = model if model is not None else kwargs.get('model_name')
+                if request is not None and (model is not None or name in models):
+                    request['model'] = name
+                    request['handler'] = time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide cada petición HTTP por endpoint y código de estado."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = {'status': 500, 'model': None, 'handler': 0.0}
+        token = _current_request.set(request)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                request['status'] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+
+            # Plantilla de la ruta (ej. /predict/{model_name}/bulk) para acotar las etiquetas
+            endpoint = getattr(scope.get("route"), "path", "unmatched")
+            REGISTRY.observe("ml_http_request_duration_seconds",
+                             {'endpoint': endpoint, 'method': scope["method"]}, elapsed)
+            REGISTRY.increment("ml_http_requests_total",
+                               {'endpoint': endpoint, 'method': scope["method"], 'status': str(request['status'])})
+            if request['model'] is not None:
+                observe_stage(request['model'], "request", elapsed)
+                observe_stage(request['model'], "framework", max(0.0, elapsed - request['handler']))
+
+
+def executor_metrics(stats):
+    """Familias de métricas a partir de ``InferenceExecutor.stats()``."""
+    return [
+        (f"ml_executor_{key}", "gauge", description,
+         [("", {'model': model}, entry[key]) for model, entry in stats.items()])
+        for key, description in (
+            ('pending', "Peticiones pendientes en el ejecutor"),
+            ('max_pending', "Peticiones pendientes admitidas"),
+            ('max_concurrency', "Ejecuciones concurrentes admitidas"),
+        )
+    ]
+
+
+def microbatch_metrics(batcher_stats):
+    """
+    Histograma de tamaños del micro-batching a partir de ``MicroBatcher.stats()``
+    por modelo (sus buckets no son acumulativos).
+    """
+    samples = []
+    for model, stats in batcher_stats.items():
+        labels = {'model': model}
+        cumulative = 0
+        for bucket, count in stats['size_histogram'].items():
+            cumulative += count
+            samples.append(("_bucket", {**labels, 'le': bucket}, cumulative))
+        samples.append(("_sum", labels, stats['records']))
+        samples.append(("_count", labels, stats['batches']))
+    return [("ml_microbatch_size", "histogram", "Registros por lote del micro-batching", samples)]
+
+
+def result_cache_metrics(stats):
+    """Familias de métricas a partir de ``ResultCache.stats()``."""
+    return [
+        ("ml_result_cache_hits_total", "counter", "Peticiones respondidas desde la caché de resultados",
+         [("", {}, stats['hits'])]),
+        ("ml_result_cache_misses_total", "counter", "Peticiones no encontradas en la caché de resultados",
+         [("", {}, stats['misses'])]),
+        ("ml_result_cache_evictions_total", "counter", "Entradas descartadas por tamaño, caducidad o cambio de modelo",
+         [("", {'reason': 'size'}, stats['evictions']),
+          ("", {'reason': 'ttl'}, stats['expirations']),
+          ("", {'reason': 'model_version'}, stats['invalidations'])]),
+        ("ml_result_cache_entries", "gauge", "Entradas en la caché de resultados",
+         [("", {}, stats['size'])]),
+    ]
+
+
+def model_metrics(readiness, registry):
+    """
+    Estado y tiempos de carga de los modelos.
+
+    Parameters:
+    -----------
+    readiness : dict
+        ``ReadinessTracker.snapshot()``
+    registry : dict
+        ``registry_status()`` del registro de modelos
+    """
+    models = readiness['models']
+    return [
+        ("ml_model_ready", "gauge", "1 si el modelo está cargado y calentado",
+         [("", {'model': model}, int(entry['state'] == 'ready')) for model, entry in models.items()]),
+        ("ml_model_load_seconds", "gauge", "Tiempo de carga del modelo al arrancar",
+         [("", {'model': model}, entry['load_seconds'])
+          for model, entry in models.items() if 'load_seconds' in entry]),
+        ("ml_model_file_load_seconds", "gauge", "Tiempo de la última carga de cada archivo en el registro",
+         [("", {'file': filename}, entry['load_seconds']) for filename, entry in registry.items()]),
+    ]
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = _format_value(value) if key == 'le' and not isinstance(value, str) else str(value)
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render_metrics(*extra_families):
+    """
+    Texto de ``/metrics``: las métricas registradas más las familias de ``extra_families``.
+
+    Parameters:
+    -----------
+    *extra_families : list of tuple
+        Familias (nombre, tipo, descripción, muestras), ej. de ``executor_metrics``
+    """
+    families = REGISTRY.families()
+    for extra in extra_families:
+        families.extend(extra)
+
+    lines = []
+    for name, kind, description, samples in families:
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
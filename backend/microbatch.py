@@ -0,0 +1,138 @@
+"""
+Micro-batching dinámico de peticiones individuales.
+
+Las peticiones concurrentes a ``/predict/logistic`` o ``/predict/knn`` se
+acumulan durante como máximo ``max_wait_ms`` milisegundos o hasta reunir
+``max_batch_size`` registros; entonces se ejecuta una sola predicción
+vectorizada y cada resultado vuelve a la petición que lo esperaba.
+
+Las peticiones solo se agrupan si comparten opciones (por ejemplo el mismo
+``threshold``). Si la predicción del lote falla, todas sus peticiones reciben
+el mismo error.
+
+Configuración por variables de entorno:
+
+- ``MICROBATCH_ENABLED``: '1' para activarlo (desactivado por defecto)
+- ``MICROBATCH_MAX_WAIT_MS``: espera máxima para completar un lote (por defecto 5)
+- ``MICROBATCH_MAX_SIZE``: registros máximos por lote (por defecto 64)
+"""
+
+import asyncio
+import os
+
+
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+
+# Límites superiores de los buckets del histograma de tamaños de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MicroBatcher:
+    """Agrupa registros individuales en lotes para una función de predicción por lotes."""
+
+    def __init__(self, run_batch, max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+                 max_batch_size=MICROBATCH_MAX_SIZE):
+        """
+        Parameters:
+        -----------
+        run_batch : callable asíncrono
+            ``await run_batch(records, *options)`` debe devolver un resultado por registro
+        max_wait_ms : float
+            Tiempo máximo que espera el primer registro de un lote
+        max_batch_size : int
+            Tamaño a partir del cual el lote se ejecuta sin esperar
+        """
+        self.run_batch = run_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._pending = {}
+        self._timers = {}
+
+        self.batches = 0
+        self.records = 0
+        self.max_observed = 0
+        self.size_histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.size_histogram[float('inf')] = 0
+
+    async def submit(self, record, *options):
+        """
+        Encola un registro y espera su resultado.
+
+        Parameters:
+        -----------
+        record : dict
+            Registro ya formateado
+        *options
+            Opciones que se pasan a ``run_batch``; solo se agrupan registros con las mismas
+
+        Returns:
+        --------
+        object : El resultado correspondiente a ``record``
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(options, [])
+        queue.append((record, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(options)
+        elif len(queue) == 1:
+            self._timers[options] = loop.call_later(self.max_wait, self._flush, options)
+        return await future
+
+    def _flush(self, options):
+        timer = self._timers.pop(options, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(options, None)
+        if not items:
+            return
+
+        self._observe(len(items))
+        asyncio.ensure_future(self._execute(items, options))
+
+    async def _execute(self, items, options):
+        records = [record for record, _ in items]
+        try:
+            results = await self.run_batch(records, *options)
+        except Exception as exc:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _observe(self, size):
+        self.batches += 1
+        self.records += size
+        self.max_observed = max(self.max_observed, size)
+        for bucket in self.size_histogram:
+            if size <= bucket:
+                self.size_histogram[bucket] += 1
+                break
+
+    def stats(self):
+        """
+        Métricas de los lotes ejecutados.
+
+        Returns:
+        --------
+        dict : Número de lotes y registros, tamaño medio y máximo, e histograma
+            de tamaños (cada bucket cuenta los lotes de tamaño <= su límite)
+        """
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'mean_batch_size': self.records / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_observed,
+            'size_histogram': {
+                ('+Inf' if bucket == float('inf') else str(bucket)): count
+                for bucket, count in self.size_histogram.items()
+            },
+        }
@@ -1,12 +1,50 @@
 """
-Módulo para cargar modelos y preprocesadores desde archivos pickle.
+Módulo para cargar modelos y preprocesadores desde archivos pickle o desde sus
+artefactos binarios (ver artifacts.py).
 """
 
+import json
 import pickle
 import os
+import threading
+import time
 from pathlib import Path
 
 
+# Modelos que el API necesita tener en memoria desde el arranque
+DEFAULT_MODELS = (
+    "logreg_model.pkl",
+    "knn_model.pkl",
+    "kmeans_model.pkl",
+    "credit_scaler.pkl",
+)
+
+# Archivos de cada modelo servido por el API
+MODEL_FILES = {
+    "logistic": ("logreg_model.pkl",),
+    "knn": ("knn_model.pkl",),
+    "kmeans": ("kmeans_model.pkl", "credit_scaler.pkl"),
+}
+
+# Cada cuántos segundos se revisa en disco si un modelo cambió (recarga en caliente)
+RELOAD_CHECK_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "2.0"))
+
+# 'auto' usa el artefacto binario de un modelo si existe; 'pickle' lo ignora
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto")
+
+# Subdirectorio de ``modelos/`` con los artefactos y nombre de su manifiesto
+ARTIFACTS_DIRNAME = "artifacts"
+ARTIFACT_MANIFEST = "manifest.json"
+
+# Última comprobación de cada artefacto frente a su pickle:
+# manifiesto -> (firma del manifiesto, firma del pickle, vigente)
+_artifact_checks = {}
+
+# Registro de modelos cargados: nombre de archivo -> entrada con el objeto y su firma
+_registry = {}
+_registry_lock = threading.RLock()
+
+
 def get_model_path(filename):
     """
     Obtiene la ruta completa del modelo.
@@ -26,7 +64,112 @@ def get_model_path(filename):
     return str(model_dir / filename)
 
 
+def get_artifact_path(filename):
+    """
+    Obtiene la ruta del directorio del artefacto binario de un modelo.
+    
+    Parameters:
+    -----------
+    filename : str
+        Nombre del archivo del modelo (ej: 'knn_model.pkl')
+    
+    Returns:
+    --------
+    str : Ruta a ``modelos/artifacts/<nombre sin extensión>``
+    """
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(os.path.dirname(get_model_path(filename)), ARTIFACTS_DIRNAME, stem)
+
+
+def _artifact_manifest(model_filename):
+    """
+    Ruta del manifiesto del artefacto si existe, está habilitado y corresponde
+    al pickle actual, o None.
+    """
+    if MODEL_FORMAT == "pickle":
+        return None
+    manifest = os.path.join(get_artifact_path(model_filename), ARTIFACT_MANIFEST)
+    if not os.path.exists(manifest) or not _artifact_is_current(model_filename, manifest):
+        return None
+    return manifest
+
+
+def _artifact_is_current(model_filename, manifest):
+    """
+    Indica si el artefacto se exportó del pickle que hay ahora en disco.
+    
+    Se compara el tamaño y el mtime guardados en el manifiesto; si solo cambió
+    el mtime (ej. una copia del mismo archivo) se compara el SHA-256. El
+    resultado se recuerda hasta que cambie la firma del manifiesto o del pickle.
+    Sin pickle de origen (solo se desplegó el artefacto) se usa el artefacto.
+    """
+    pickle_path = get_model_path(model_filename)
+    try:
+        pickle_signature = _file_signature(pickle_path)
+        manifest_signature = _file_signature(manifest)
+    except OSError:
+        return True
+    
+    checked = _artifact_checks.get(manifest)
+    if checked is not None and checked[:2] == (manifest_signature, pickle_signature):
+        return checked[2]
+    
+    try:
+        with open(manifest, encoding='utf-8') as f:
+            source = json.load(f).get('source') or {}
+    except (OSError, ValueError):
+        # Manifiesto ilegible: load_model recurrirá al pickle al cargarlo
+        return True
+    
+    if source.get('size') != pickle_signature[1]:
+        current = False
+    elif source.get('mtime_ns') == pickle_signature[0]:
+        current = True
+    else:
+        from .artifacts import _sha256
+        current = source.get('sha256') == _sha256(pickle_path)
+    
+    if not current:
+        print(f"⚠️ El artefacto de {model_filename} no corresponde al pickle actual; se usa el pickle "
+              f"hasta volver a exportarlo (python -m backend.artifacts export)")
+    _artifact_checks[manifest] = (manifest_signature, pickle_signature, current)
+    return current
+
+
+def resolve_model_path(model_filename):
+    """
+    Archivo del que se cargará el modelo: el manifiesto del artefacto si existe
+    y corresponde al pickle, si no el pickle. Su firma en disco decide la
+    recarga en caliente: al reemplazar el pickle el artefacto queda obsoleto,
+    la ruta pasa a ser el pickle y el registro lo recarga.
+    """
+    return _artifact_manifest(model_filename) or get_model_path(model_filename)
+
+
 def load_model(model_filename):
+    """
+    Carga un modelo, desde su artefacto binario si existe y está al día o desde el pickle.
+    
+    Parameters:
+    -----------
+    model_filename : str
+        Nombre del archivo del modelo (ej: 'logistic_regression_model.pkl')
+    
+    Returns:
+    --------
+    object : Modelo cargado o None si no existe
+    """
+    manifest = _artifact_manifest(model_filename)
+    if manifest is not None:
+        try:
+            from .artifacts import load_artifact
+            return load_artifact(os.path.dirname(manifest))
+        except Exception as e:
+            print(f"Error al cargar el artefacto de {model_filename}: {str(e)}; se usa el pickle")
+    return load_pickle(model_filename)
+
+
+def load_pickle(model_filename):
     """
     Carga un modelo desde un archivo pickle.
     
@@ -80,6 +223,139 @@ def model_exists(model_filename):
     --------
     bool : True si el archivo existe, False en caso contrario
     """
-    model_path = get_model_path(model_filename)
-    return os.path.exists(model_path)
+    return os.path.exists(resolve_model_path(model_filename))
+
 
+def _file_signature(model_path):
+    """
+    Firma de un archivo en disco (mtime en nanosegundos y tamaño).
+    Si cambia, el modelo en memoria se considera obsoleto.
+    """
+    stat = os.stat(model_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_model(model_filename):
+    """
+    Obtiene un modelo desde el registro en memoria del proceso.
+    
+    El archivo solo se deserializa la primera vez o cuando su firma
+    (mtime/tamaño) cambia en disco. La comprobación en disco se hace
+    como máximo una vez cada ``RELOAD_CHECK_INTERVAL`` segundos, también
+    para los archivos que no existen.
+    
+    Parameters:
+    -----------
+    model_filename : str
+        Nombre del archivo del modelo (ej: 'logreg_model.pkl')
+    
+    Returns:
+    --------
+    object : Modelo cargado o None si no existe
+    """
+    entry = _registry.get(model_filename)
+    now = time.monotonic()
+    if entry is not None and now - entry['checked_at'] < RELOAD_CHECK_INTERVAL:
+        return entry['model']
+    
+    with _registry_lock:
+        try:
+            signature = _file_signature(resolve_model_path(model_filename))
+        except OSError:
+            # Archivo ausente (ej. cluster_profiles.pkl opcional): se recuerda hasta
+            # la próxima comprobación para no consultar el disco en cada llamada
+            _registry[model_filename] = {
+                'model': None,
+                'signature': None,
+                'checked_at': now,
+                'load_seconds': None,
+            }
+            return None
+        
+        entry = _registry.get(model_filename)
+        if entry is not None and entry['signature'] == signature:
+            entry['checked_at'] = now
+            return entry['model']
+        
+        return _load_into_registry(model_filename, signature)
+
+
+def _load_into_registry(model_filename, signature):
+    """Deserializa el modelo y lo guarda en el registro junto a su firma."""
+    start = time.perf_counter()
+    model = load_model(model_filename)
+    if model is None:
+        _registry.pop(model_filename, None)
+        return None
+    
+    _registry[model_filename] = {
+        'model': model,
+        'signature': signature,
+        'checked_at': time.monotonic(),
+        'load_seconds': time.perf_counter() - start,
+    }
+    return model
+
+
+def reload_model(model_filename):
+    """
+    Fuerza la recarga de un modelo desde disco aunque su firma no haya cambiado.
+    
+    Parameters:
+    -----------
+    model_filename : str
+        Nombre del archivo del modelo
+    
+    Returns:
+    --------
+    object : Modelo recargado o None si no existe
+    """
+    with _registry_lock:
+        _registry.pop(model_filename, None)
+        return get_model(model_filename)
+
+
+def warm_up_models(model_filenames=DEFAULT_MODELS):
+    """
+    Carga de forma explícita los modelos indicados en el registro.
+    Pensado para ejecutarse al arrancar el API.
+    
+    Parameters:
+    -----------
+    model_filenames : iterable of str
+        Archivos de modelo a precargar
+    
+    Returns:
+    --------
+    dict : {nombre_archivo: bool} indicando si cada modelo quedó cargado
+    """
+    return {
+        filename: get_model(filename) is not None
+        for filename in model_filenames
+    }
+
+
+def clear_model_registry():
+    """Vacía el registro de modelos en memoria."""
+    with _registry_lock:
+        _registry.clear()
+
+
+def registry_status():
+    """
+    Estado del registro de modelos.
+    
+    Returns:
+    --------
+    dict : {nombre_archivo: {'mtime_ns', 'size', 'load_seconds'}}
+    """
+    with _registry_lock:
+        return {
+            filename: {
+                'mtime_ns': entry['signature'][0],
+                'size': entry['signature'][1],
+                'load_seconds': entry['load_seconds'],
+            }
+            for filename, entry in _registry.items()
+            if entry['signature'] is not None
+        }
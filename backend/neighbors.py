@@ -0,0 +1,421 @@
+"""
+Índices de vecinos más cercanos para el modelo KNN de Telco.
+
+El Pipeline de ``knn_model.pkl`` guarda toda la matriz de entrenamiento
+codificada y, por defecto, hace una búsqueda exacta por fuerza bruta en cada
+predicción. Este módulo permite sustituir esa búsqueda por un índice construido
+una sola vez por modelo cargado:
+
+- ``brute``: búsqueda exacta en NumPy con normas precalculadas
+- ``kd_tree`` / ``ball_tree``: árboles exactos de scikit-learn
+- ``rp_lsh``: índice aproximado con proyecciones aleatorias (LSH) y reordenación exacta
+
+El índice se elige con la variable de entorno ``KNN_INDEX`` (por defecto
+``sklearn``, que usa el Pipeline tal cual). Para medir el recall frente a la
+búsqueda exacta y la latencia de cada índice:
+
+    python -m backend.neighbors --index rp_lsh --queries 2000
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from .compiled_logistic import CompiledTelcoEncoder
+
+
+KNN_INDEX = os.getenv("KNN_INDEX", "sklearn")
+
+# Parámetros del índice aproximado
+RP_LSH_TABLES = int(os.getenv("KNN_RP_TABLES", "12"))
+RP_LSH_BITS = int(os.getenv("KNN_RP_BITS", "8"))
+RP_LSH_QUERY_BLOCK = 256
+
+
+class BruteForceIndex:
+    """Búsqueda exacta por fuerza bruta con las normas de la matriz precalculadas."""
+
+    def __init__(self, data):
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        self.sq_norms = np.einsum('ij,ij->i', self.data, self.data)
+
+    def query(self, X, k):
+        """
+        Busca los ``k`` vecinos más cercanos de cada fila de ``X``.
+
+        Returns:
+        --------
+        tuple : (distancias, índices), ambos de forma (n_filas, k) y ordenados
+        """
+        X = np.asarray(X, dtype=np.float64)
+        sq_dist = self.sq_norms[None, :] - 2.0 * (X @ self.data.T)
+        sq_dist += np.einsum('ij,ij->i', X, X)[:, None]
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+
+        k = min(k, self.data.shape[0])
+        candidates = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+        candidate_dist = np.take_along_axis(sq_dist, candidates, axis=1)
+        order = np.argsort(candidate_dist, axis=1, kind='stable')
+        indices = np.take_along_axis(candidates, order, axis=1)
+        distances = np.sqrt(np.take_along_axis(candidate_dist, order, axis=1))
+        return distances, indices
+
+
+class TreeIndex:
+    """Árbol exacto de scikit-learn (KDTree o BallTree) construido una sola vez."""
+
+    def __init__(self, data, kind='kd_tree', leaf_size=30):
+        # scikit-learn solo se importa si se usa un índice en árbol
+        from sklearn.neighbors import BallTree, KDTree
+
+        tree_class = KDTree if kind == 'kd_tree' else BallTree
+        self.tree = tree_class(np.asarray(data, dtype=np.float64), leaf_size=leaf_size)
+
+    def query(self, X, k):
+        return self.tree.query(np.asarray(X, dtype=np.float64), k=k)
+
+
+class RandomProjectionIndex:
+    """
+    Índice aproximado con LSH de proyecciones aleatorias.
+
+    Cada tabla divide el espacio con ``n_bits`` hiperplanos aleatorios que pasan
+    por la media de los datos; los puntos con el mismo código caen en el mismo
+    cubo. Una consulta recoge los candidatos de su cubo en todas las tablas y
+    los reordena con la distancia exacta. Si hay menos de ``k`` candidatos se
+    recurre a la búsqueda exacta completa.
+    """
+
+    def __init__(self, data, n_tables=RP_LSH_TABLES, n_bits=RP_LSH_BITS, random_state=42):
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        self.exact = BruteForceIndex(self.data)
+        rng = np.random.default_rng(random_state)
+
+        n_features = self.data.shape[1]
+        self.center = self.data.mean(axis=0)
+        self.planes = rng.standard_normal((n_tables, n_features, n_bits))
+        self.bit_weights = (1 << np.arange(n_bits)).astype(np.int64)
+
+        # Por tabla: códigos ordenados y la permutación de filas correspondiente
+        codes = self._hash(self.data)
+        self.order = np.argsort(codes, axis=0, kind='stable')
+        self.sorted_codes = np.take_along_axis(codes, self.order, axis=0)
+
+    def _hash(self, X):
+        centered = X - self.center
+        bits = np.einsum('nf,tfb->ntb', centered, self.planes) > 0
+        return bits.astype(np.int64) @ self.bit_weights
+
+    def query(self, X, k):
+        X = np.asarray(X, dtype=np.float64)
+        distances = np.empty((X.shape[0], k))
+        indices = np.empty((X.shape[0], k), dtype=np.int64)
+        # Por bloques para acotar la memoria de los pares (consulta, candidato)
+        for start in range(0, X.shape[0], RP_LSH_QUERY_BLOCK):
+            block = slice(start, start + RP_LSH_QUERY_BLOCK)
+            distances[block], indices[block] = self._query_block(X[block], k)
+        return distances, indices
+
+    def _query_block(self, X, k):
+        codes = self._hash(X)
+        n_rows, n_data = X.shape[0], self.data.shape[0]
+
+        # Pares (fila, candidato) de los cubos de cada tabla, sin bucles por fila
+        row_parts, candidate_parts = [], []
+        for table in range(codes.shape[1]):
+            table_codes = self.sorted_codes[:, table]
+            starts = np.searchsorted(table_codes, codes[:, table], side='left')
+            sizes = np.searchsorted(table_codes, codes[:, table], side='right') - starts
+            offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            row_parts.append(np.repeat(np.arange(n_rows), sizes))
+            candidate_parts.append(self.order[np.repeat(starts, sizes) + offsets, table])
+
+        # Sin duplicados entre tablas; quedan ordenados por fila y candidato
+        pairs = np.sort(np.concatenate(row_parts) * n_data + np.concatenate(candidate_parts))
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        rows, candidates = np.divmod(pairs, n_data)
+        diff = self.data[candidates] - X[rows]
+        sq_dist = np.einsum('ij,ij->i', diff, diff)
+
+        # Orden estable por fila y distancia: los k primeros de cada fila son sus vecinos
+        order = np.lexsort((sq_dist, rows))
+        counts = np.bincount(rows, minlength=n_rows)
+        firsts = np.cumsum(counts) - counts
+
+        distances = np.empty((n_rows, k))
+        indices = np.empty((n_rows, k), dtype=np.int64)
+        enough = counts >= k
+        if enough.any():
+            best = order[firsts[enough][:, None] + np.arange(k)]
+            distances[enough] = np.sqrt(sq_dist[best])
+            indices[enough] = candidates[best]
+        if not enough.all():
+            # Menos de k candidatos: búsqueda exacta completa para esas filas
+            distances[~enough], indices[~enough] = self.exact.query(X[~enough], k)
+        return distances, indices
+
+
+def majority_vote(votes, n_classes):
+    """
+    Clase mayoritaria por fila (en empate gana la de menor índice, como scikit-learn).
+
+    Parameters:
+    -----------
+    votes : ndarray
+        Índices de clase de los vecinos, forma (n_filas, k)
+    n_classes : int
+        Número de clases
+
+    Returns:
+    --------
+    ndarray : Índice de la clase ganadora por fila
+    """
+    counts = (votes[:, :, None] == np.arange(n_classes)).sum(axis=1)
+    return counts.argmax(axis=1)
+
+
+INDEX_BUILDERS = {
+    'brute': BruteForceIndex,
+    'kd_tree': lambda data: TreeIndex(data, 'kd_tree'),
+    'ball_tree': lambda data: TreeIndex(data, 'ball_tree'),
+    'rp_lsh': RandomProjectionIndex,
+}
+
+
+def build_index(kind, data):
+    """
+    Construye un índice de vecinos sobre ``data``.
+
+    Parameters:
+    -----------
+    kind : str
+        'brute', 'kd_tree', 'ball_tree' o 'rp_lsh'
+    data : ndarray
+        Matriz de entrenamiento ya codificada
+
+    Returns:
+    --------
+    object : Índice con el método ``query(X, k) -> (distancias, índices)``
+    """
+    if kind not in INDEX_BUILDERS:
+        raise ValueError(f"Índice de vecinos no soportado: {kind}")
+    return INDEX_BUILDERS[kind](data)
+
+
+class IndexedKNNClassifier:
+    """
+    Reemplazo del Pipeline KNN que usa un índice de vecinos propio.
+
+    Codifica las entradas con ``CompiledTelcoEncoder`` (idéntico al preprocesador
+    del Pipeline) y busca sobre la matriz de entrenamiento del
+    ``KNeighborsClassifier``; la clase se decide por mayoría de votos entre los
+    ``n_neighbors`` vecinos, igual que ``weights='uniform'``.
+    """
+
+    def __init__(self, encoder, fit_X, labels, classes, n_neighbors, kind):
+        self.kind = kind
+        self.encoder = encoder
+        self.fit_X = fit_X
+        self.n_neighbors = int(n_neighbors)
+        self.classes_ = np.asarray(classes)
+        self.labels = np.asarray(labels)
+        self.index = build_index(kind, fit_X)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, kind):
+        if len(pipeline.steps) != 2 or not hasattr(pipeline[-1], '_fit_X'):
+            raise ValueError("Se esperaba un Pipeline (preprocesador, KNeighborsClassifier)")
+        classifier = pipeline[-1]
+        if classifier.weights != 'uniform' or classifier.effective_metric_ != 'euclidean':
+            raise ValueError("Solo se soportan modelos KNN con pesos uniformes y distancia euclídea")
+
+        encoder = CompiledTelcoEncoder.from_column_transformer(pipeline[0])
+        if classifier._fit_X.shape[1] != encoder.n_features:
+            raise ValueError(f"El modelo se entrenó con {classifier._fit_X.shape[1]} columnas y el "
+                             f"preprocesador genera {encoder.n_features}")
+        return cls(encoder, classifier._fit_X, classifier._y, classifier.classes_,
+                   classifier.n_neighbors, kind)
+
+    def to_arrays(self):
+        """
+        Parámetros del clasificador separados en arrays numéricos y metadatos JSON
+        (ver ``CompiledTelcoEncoder.to_arrays``).
+        """
+        arrays, metadata = self.encoder.to_arrays()
+        arrays.update({'fit_X': self.fit_X, 'labels': self.labels, 'classes': self.classes_})
+        metadata['n_neighbors'] = self.n_neighbors
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata, kind='brute'):
+        encoder = CompiledTelcoEncoder.from_arrays(arrays, metadata)
+        return cls(encoder, arrays['fit_X'], arrays['labels'], arrays['classes'],
+                   metadata['n_neighbors'], kind)
+
+    def transform(self, df):
+        return self.encoder.encode(df)
+
+    def kneighbors(self, df):
+        return self.index.query(self.transform(df), self.n_neighbors)
+
+    def predict(self, df):
+        return self.predict_encoded(self.transform(df))
+
+    def predict_encoded(self, X):
+        """Clase por voto mayoritario de los vecinos, a partir de la matriz ya codificada."""
+        _, indices = self.index.query(X, self.n_neighbors)
+        return self.classes_[majority_vote(self.labels[indices], len(self.classes_))]
+
+    def predict_proba_encoded(self, X):
+        """
+        Fracción de los ``n_neighbors`` vecinos de cada clase, como
+        ``predict_proba`` con ``weights='uniform'``.
+
+        Returns:
+        --------
+        ndarray : Forma (n_filas, n_clases), columnas en el orden de ``classes_``
+        """
+        _, indices = self.index.query(X, self.n_neighbors)
+        votes = self.labels[indices]
+        counts = (votes[:, :, None] == np.arange(len(self.classes_))).sum(axis=1)
+        return counts / votes.shape[1]
+
+
+# Índices construidos por tipo: kind -> (pipeline de origen, clasificador indexado)
+_indexed_classifiers = {}
+_indexed_lock = threading.Lock()
+
+
+def get_indexed_classifier(pipeline, kind=None):
+    """
+    Devuelve el clasificador indexado para ``pipeline``, construyéndolo solo
+    la primera vez o cuando el registro recarga un modelo nuevo.
+
+    Parameters:
+    -----------
+    pipeline : Pipeline or IndexedKNNClassifier
+        Pipeline KNN de ``knn_model.pkl`` o el clasificador cargado desde su artefacto
+    kind : str, optional
+        Tipo de índice (por defecto ``KNN_INDEX``)
+
+    Returns:
+    --------
+    IndexedKNNClassifier : o el propio ``pipeline`` si su estructura no se
+        puede indexar (se avisa una vez por modelo)
+    """
+    kind = kind or KNN_INDEX
+    if isinstance(pipeline, IndexedKNNClassifier) and pipeline.kind == kind:
+        return pipeline
+
+    entry = _indexed_classifiers.get(kind)
+    if entry is not None and entry[0] is pipeline:
+        return entry[1]
+
+    with _indexed_lock:
+        entry = _indexed_classifiers.get(kind)
+        if entry is None or entry[0] is not pipeline:
+            if isinstance(pipeline, IndexedKNNClassifier):
+                classifier = IndexedKNNClassifier.from_arrays(*pipeline.to_arrays(), kind)
+            else:
+                try:
+                    classifier = IndexedKNNClassifier.from_pipeline(pipeline, kind)
+                except ValueError as e:
+                    print(f"⚠️ No se puede indexar el modelo KNN ({e}); se usa el Pipeline")
+                    classifier = pipeline
+            entry = (pipeline, classifier)
+            _indexed_classifiers[kind] = entry
+        return entry[1]
+
+
+def evaluate_index(pipeline, kind, records, k=None):
+    """
+    Compara un índice con la búsqueda exacta y con las predicciones del Pipeline.
+
+    Parameters:
+    -----------
+    pipeline : Pipeline
+        Pipeline KNN cargado
+    kind : str
+        Tipo de índice a evaluar
+    records : DataFrame
+        Registros Telco con las columnas del modelo (ver ``prepare_telco_frame``)
+    k : int, optional
+        Número de vecinos (por defecto el ``n_neighbors`` del modelo)
+
+    Returns:
+    --------
+    dict : recall@k medio frente a la búsqueda exacta, acuerdo de clase con
+        ``pipeline.predict``, tiempo de construcción y latencias p50/p99 por
+        consulta (ms)
+    """
+    classifier = pipeline[-1]
+    k = k or classifier.n_neighbors
+    labels = np.asarray(classifier._y)
+    # Mismo preprocesamiento que el Pipeline, para medir solo el índice
+    queries = np.asarray(pipeline[0].transform(records), dtype=np.float64)
+
+    start = time.perf_counter()
+    index = build_index(kind, classifier._fit_X)
+    build_seconds = time.perf_counter() - start
+
+    exact = BruteForceIndex(classifier._fit_X)
+    _, exact_indices = exact.query(queries, k)
+
+    latencies = []
+    found = np.empty_like(exact_indices)
+    for row in range(queries.shape[0]):
+        start = time.perf_counter()
+        _, found[row] = index.query(queries[row:row + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    recall = np.mean([
+        len(np.intersect1d(found[row], exact_indices[row])) / k
+        for row in range(queries.shape[0])
+    ])
+    predicted = classifier.classes_[majority_vote(labels[found], len(classifier.classes_))]
+
+    return {
+        'index': kind,
+        'k': k,
+        'recall_at_k': float(recall),
+        'label_agreement': float(np.mean(predicted == pipeline.predict(records))),
+        'build_seconds': build_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def main(argv=None):
+    from .model_loader import load_pickle
+    from .predictors import prepare_telco_frame
+    from .synthetic import DEFAULT_SEED, synthetic_frame
+
+    parser = argparse.ArgumentParser(description="Recall, acuerdo con scikit-learn y latencia de los índices KNN")
+    parser.add_argument("--index", choices=sorted(INDEX_BUILDERS), action="append",
+                        help="Índice a evaluar (se puede repetir; por defecto todos)")
+    parser.add_argument("--queries", type=int, default=1000, help="Número de registros sintéticos de consulta")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Semilla de los registros sintéticos")
+    args = parser.parse_args(argv)
+
+    pipeline = load_pickle("knn_model.pkl")
+    if pipeline is None:
+        raise SystemExit("No se encontró el modelo de KNN")
+
+    # Clientes con la distribución del dataset, no filas de entrenamiento con ruido
+    records = prepare_telco_frame(synthetic_frame("telco", args.queries, seed=args.seed))
+
+    for kind in args.index or sorted(INDEX_BUILDERS):
+        result = evaluate_index(pipeline, kind, records)
+        print(
+            f"{kind:10s} recall@{result['k']}={result['recall_at_k']:.3f} "
+            f"acuerdo_sklearn={result['label_agreement']:.3f} "
+            f"construcción={result['build_seconds'] * 1000:.1f} ms "
+            f"p50={result['p50_ms']:.3f} ms p99={result['p99_ms']:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
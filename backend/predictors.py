@@ -2,12 +2,106 @@
 Módulo con funciones de predicción para cada modelo.
 """
 
+import os
+import threading
+
 import pandas as pd
 import numpy as np
-from .model_loader import load_model, load_preprocessor, model_exists
+from .cluster_profiles import get_profile_index
+from .compiled_logistic import CompiledLogisticModel, CompiledTelcoEncoder, get_compiled_logistic
+from .feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+from .kmeans_engine import get_kmeans_engine
+from .metrics import stage
+from .model_loader import get_model
+from .neighbors import KNN_INDEX, IndexedKNNClassifier, get_indexed_classifier
+from .shared_weights import get_shared_model
+
+
+# Orden de columnas esperado por el preprocesador de K-Means
+CREDIT_CARD_COLUMNS = CREDIT_CARD_SCHEMA.columns
+
+# Columnas del dataset Telco que espera el Pipeline (mismo orden que prepare_telco_input)
+TELCO_COLUMNS = TELCO_SCHEMA.columns
+
+# Umbral de decisión de LogisticRegression.predict (churn si la probabilidad lo supera)
+DEFAULT_CHURN_THRESHOLD = 0.5
+
+# 'compiled' puntúa con NumPy (ver compiled_logistic.py); 'sklearn' usa el Pipeline tal cual
+LOGISTIC_ENGINE = os.getenv("LOGISTIC_ENGINE", "compiled")
+
+# 'fused' asigna clusters con el motor de kmeans_engine.py; 'sklearn' usa escalador + KMeans
+KMEANS_ENGINE = os.getenv("KMEANS_ENGINE", "fused")
+
+# Peso de la Regresión Logística en la probabilidad combinada del ensemble (el resto es KNN)
+ENSEMBLE_LOGISTIC_WEIGHT = float(os.getenv("ENSEMBLE_LOGISTIC_WEIGHT", "0.5"))
+
 
+def _classification_labels(predictions):
+    return np.where(predictions == 1, 'Sí', 'No')
 
-def predict_logistic_regression(input_data):
+
+def _frame_to_records(results):
+    return results.to_dict(orient='records')
+
+
+def _batch_length(records):
+    """Número de registros de una lista de diccionarios o de un diccionario de columnas."""
+    if isinstance(records, dict):
+        return len(next(iter(records.values()), ()))
+    return len(records)
+
+
+def _pipeline_predict(model_name, pipeline, df, method):
+    """
+    Equivalente a ``getattr(pipeline, method)(df)``, midiendo por separado el
+    preprocesado y el clasificador (ver metrics.py).
+    """
+    with stage(model_name, "transform"):
+        X = df
+        for _, step in pipeline.steps[:-1]:
+            if step is not None and step != "passthrough":
+                X = step.transform(X)
+    with stage(model_name, "classifier"):
+        return getattr(pipeline.steps[-1][1], method)(X)
+
+
+def _logistic_predict_proba(model, data):
+    """Probabilidades del modelo de ``_get_logistic_model`` para registros o un DataFrame."""
+    if isinstance(model, CompiledLogisticModel):
+        # La ruta compilada acepta los diccionarios directamente, sin DataFrame
+        with stage("logistic", "transform"):
+            X = model.encoder.encode(data)
+        with stage("logistic", "classifier"):
+            return model.predict_proba_encoded(X)
+    
+    if not isinstance(data, pd.DataFrame):
+        with stage("logistic", "frame"):
+            data = pd.DataFrame(data)
+    return _pipeline_predict("logistic", model, data, "predict_proba")
+
+
+def _get_logistic_model():
+    """
+    Modelo de Regresión Logística listo para ``predict_proba``: el Pipeline del
+    registro o su versión compilada, según ``LOGISTIC_ENGINE``. En modo de pesos
+    compartidos se usa siempre la versión compilada sobre esos pesos.
+    """
+    shared = get_shared_model("logistic")
+    if shared is not None:
+        return shared
+    
+    # Obtener modelo del registro en memoria (ya incluye el preprocesador dentro)
+    model = get_model("logreg_model.pkl")
+    
+    if model is None:
+        raise FileNotFoundError("No se encontró el modelo de Regresión Logística")
+    
+    if LOGISTIC_ENGINE == "compiled":
+        return get_compiled_logistic(model)
+    return model
+
+
+def predict_logistic_regression(input_data, threshold=None):
     """
     Realiza una predicción usando el modelo de Regresión Logística.
     
@@ -15,6 +109,9 @@ def predict_logistic_regression(input_data):
     -----------
     input_data : dict
         Diccionario con los datos de entrada del cliente Telco
+    threshold : float, optional
+        Probabilidad de churn a partir de la cual se clasifica como 'Sí'
+        (por defecto ``DEFAULT_CHURN_THRESHOLD``, el umbral del modelo)
     
     Returns:
     --------
@@ -26,25 +123,116 @@ def predict_logistic_regression(input_data):
             'classification': str ('Yes' o 'No')
         }
     """
-    # Cargar modelo (ya incluye el preprocesador dentro)
-    model = load_model("logreg_model.pkl")
+    return predict_logistic_regression_batch([input_data], threshold)[0]
+
+
+def predict_logistic_regression_batch(records, threshold=None):
+    """
+    Realiza predicciones de Regresión Logística para varios clientes a la vez.
     
-    if model is None:
-        raise FileNotFoundError("No se encontró el modelo de Regresión Logística")
+    Parameters:
+    -----------
+    records : list of dict o dict de columnas
+        Registros ya formateados con ``prepare_telco_input``, o columnas de
+        ``TELCO_SCHEMA.map_columns``
+    threshold : float, optional
+        Umbral de clasificación (ver ``predict_logistic_regression``)
     
-    # Convertir input_data a DataFrame
-    df = pd.DataFrame([input_data])
+    Returns:
+    --------
+    list of dict : Un resultado por registro, en el mismo orden de entrada
+        (mismo formato que ``predict_logistic_regression``)
+    """
+    model = _get_logistic_model()
     
-    # El modelo ya incluye el preprocesador, solo necesitamos hacer predict
-    prediction = model.predict(df)[0]
-    probability = model.predict_proba(df)[0]
+    if not _batch_length(records):
+        return []
     
-    return {
-        'prediction': int(prediction),
-        'probability_churn': float(probability[1]),
-        'probability_no_churn': float(probability[0]),
-        'classification': 'Sí' if prediction == 1 else 'No'
-    }
+    probabilities = _logistic_predict_proba(model, records)
+    
+    if threshold is None:
+        threshold = DEFAULT_CHURN_THRESHOLD
+    
+    with stage("logistic", "format"):
+        return [
+            {
+                'prediction': int(probability_churn > threshold),
+                'probability_churn': probability_churn,
+                'probability_no_churn': probability_no_churn,
+                'classification': 'Sí' if probability_churn > threshold else 'No'
+            }
+            for probability_no_churn, probability_churn in probabilities.tolist()
+        ]
+
+
+def predict_logistic_regression_columns(records, threshold=None):
+    """
+    Versión por columnas de ``predict_logistic_regression_batch``: devuelve los
+    arrays de NumPy tal cual, sin un diccionario por registro.
+    
+    Parameters:
+    -----------
+    records : list of dict, dict de columnas o DataFrame
+        Registros preparados, columnas de ``TELCO_SCHEMA.map_columns`` o un
+        DataFrame de ``prepare_telco_frame``
+    threshold : float, optional
+        Umbral de clasificación (ver ``predict_logistic_regression``)
+    
+    Returns:
+    --------
+    dict : {'prediction', 'probability_churn', 'probability_no_churn',
+        'classification'}, un array por columna
+    """
+    model = _get_logistic_model()
+    
+    if not _batch_length(records):
+        return {
+            'prediction': np.empty(0, dtype=np.int64),
+            'probability_churn': np.empty(0),
+            'probability_no_churn': np.empty(0),
+            'classification': np.empty(0, dtype=object),
+        }
+    
+    if threshold is None:
+        threshold = DEFAULT_CHURN_THRESHOLD
+    
+    # Una sola pasada por el preprocesador y el clasificador
+    probabilities = _logistic_predict_proba(model, records)
+    
+    with stage("logistic", "format"):
+        predictions = (probabilities[:, 1] > threshold).astype(np.int64)
+        return {
+            'prediction': predictions,
+            'probability_churn': np.ascontiguousarray(probabilities[:, 1]),
+            'probability_no_churn': np.ascontiguousarray(probabilities[:, 0]),
+            'classification': _classification_labels(predictions)
+        }
+
+
+def predict_logistic_regression_frame(df, threshold=None):
+    """
+    Realiza predicciones de Regresión Logística sobre un DataFrame completo.
+    
+    El Pipeline se evalúa una sola vez (``predict_proba``) y la clase se deriva
+    de la probabilidad de churn comparándola con el umbral.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Datos Telco con las columnas del modelo (ver ``prepare_telco_frame``)
+    threshold : float, optional
+        Umbral de clasificación (ver ``predict_logistic_regression``)
+    
+    Returns:
+    --------
+    DataFrame : Columnas 'prediction', 'probability_churn',
+        'probability_no_churn' y 'classification', con el mismo índice de ``df``
+    """
+    if df.empty:
+        _get_logistic_model()
+        return pd.DataFrame(columns=['prediction', 'probability_churn', 'probability_no_churn', 'classification'])
+    
+    return pd.DataFrame(predict_logistic_regression_columns(df, threshold), index=df.index)
 
 
 def predict_knn(input_data):
@@ -64,22 +252,337 @@ def predict_knn(input_data):
             'classification': str ('Yes' o 'No')
         }
     """
-    # Cargar modelo (ya incluye el preprocesador dentro)
-    model = load_model("knn_model.pkl")
+    return predict_knn_batch([input_data])[0]
+
+
+def predict_knn_batch(records):
+    """
+    Realiza predicciones KNN para varios clientes a la vez.
+    
+    Parameters:
+    -----------
+    records : list of dict o dict de columnas
+        Registros ya formateados con ``prepare_telco_input``, o columnas de
+        ``TELCO_SCHEMA.map_columns``
+    
+    Returns:
+    --------
+    list of dict : Un resultado por registro, en el mismo orden de entrada
+        (mismo formato que ``predict_knn``)
+    """
+    with stage("knn", "frame"):
+        df = pd.DataFrame(records)
+    results = predict_knn_frame(df)
+    with stage("knn", "format"):
+        return _frame_to_records(results)
+
+
+def predict_knn_columns(records):
+    """
+    Versión por columnas de ``predict_knn_batch``.
+    
+    Returns:
+    --------
+    dict : {'prediction', 'classification'}, un array por columna
+    """
+    with stage("knn", "frame"):
+        df = pd.DataFrame(records)
+    results = predict_knn_frame(df)
+    return {
+        'prediction': results['prediction'].to_numpy(dtype=np.int64),
+        'classification': results['classification'].to_numpy(dtype=object),
+    }
+
+
+def predict_knn_frame(df):
+    """
+    Realiza predicciones KNN sobre un DataFrame completo.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Datos Telco con las columnas del modelo (ver ``prepare_telco_frame``)
+    
+    Returns:
+    --------
+    DataFrame : Columnas 'prediction' y 'classification', con el mismo índice de ``df``
+    """
+    model = _get_knn_model()
+    
+    if df.empty:
+        return pd.DataFrame(columns=['prediction', 'classification'])
+    
+    if isinstance(model, IndexedKNNClassifier):
+        with stage("knn", "transform"):
+            X = model.transform(df)
+        with stage("knn", "classifier"):
+            predictions = model.predict_encoded(X)
+    else:
+        predictions = _pipeline_predict("knn", model, df, "predict")
+    
+    return pd.DataFrame({
+        'prediction': predictions.astype(int),
+        'classification': _classification_labels(predictions)
+    }, index=df.index)
+
+
+def _get_knn_model():
+    """
+    Modelo KNN: el Pipeline del registro o, si se configuró ``KNN_INDEX`` o hay
+    pesos compartidos, el clasificador con índice de vecinos propio.
+    """
+    model = get_shared_model("knn")
+    if model is not None:
+        return model
+    
+    # Obtener modelo del registro en memoria (ya incluye el preprocesador dentro)
+    model = get_model("knn_model.pkl")
     
     if model is None:
         raise FileNotFoundError("No se encontró el modelo de KNN")
     
-    # Convertir input_data a DataFrame
-    df = pd.DataFrame([input_data])
+    # Si se configuró KNN_INDEX, la búsqueda de vecinos se hace con el
+    # índice construido para este modelo
+    if KNN_INDEX != "sklearn":
+        model = get_indexed_classifier(model)
+    return model
+
+
+def _telco_scorer(model):
+    """
+    (preprocesado, ``predict_proba`` sobre la matriz ya codificada) de un modelo
+    Telco: la versión compilada o indexada, o un Pipeline de scikit-learn.
+    """
+    if isinstance(model, (CompiledLogisticModel, IndexedKNNClassifier)):
+        return model.encoder, model.predict_proba_encoded
+    return model[:-1], model[-1].predict_proba
+
+
+def _as_compiled_encoder(encoder):
+    """``CompiledTelcoEncoder`` equivalente a ``encoder``, o None si no se puede compilar."""
+    if isinstance(encoder, CompiledTelcoEncoder):
+        return encoder
+    if len(encoder.steps) != 1:
+        return None
+    try:
+        return CompiledTelcoEncoder.from_column_transformer(encoder[0])
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+def _encode_telco(encoder, data):
+    """Matriz codificada de ``data`` con un ``CompiledTelcoEncoder`` o un Pipeline de preprocesado."""
+    if isinstance(encoder, CompiledTelcoEncoder):
+        return encoder.encode(data)
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+    return encoder.transform(data)
+
+
+# Plan del ensemble para el último par de modelos visto: (logística, KNN, plan)
+_ensemble_plan = None
+_ensemble_lock = threading.Lock()
+
+
+def _get_ensemble_plan():
+    """
+    Preprocesado y clasificadores del ensemble de churn. Si los dos modelos
+    codifican igual (mismas columnas, medias, escalas y categorías), ambos usan
+    el mismo preprocesado y la entrada se transforma una sola vez; se prefiere
+    la versión compilada, que da la misma matriz que el ``ColumnTransformer``.
+    
+    Returns:
+    --------
+    tuple : (preprocesado de la logística, su ``predict_proba``, preprocesado
+        de KNN, su ``predict_proba``); los preprocesados son el mismo objeto si
+        se comparten
+    """
+    global _ensemble_plan
+    logistic_model = _get_logistic_model()
+    knn_model = _get_knn_model()
     
-    # El modelo ya incluye el preprocesador, solo necesitamos hacer predict
-    prediction = model.predict(df)[0]
+    entry = _ensemble_plan
+    if entry is not None and entry[0] is logistic_model and entry[1] is knn_model:
+        return entry[2]
     
-    return {
-        'prediction': int(prediction),
-        'classification': 'Sí' if prediction == 1 else 'No'
-    }
+    with _ensemble_lock:
+        if _ensemble_plan is None or _ensemble_plan[0] is not logistic_model \
+                or _ensemble_plan[1] is not knn_model:
+            logistic_encoder, logistic_proba = _telco_scorer(logistic_model)
+            knn_encoder, knn_proba = _telco_scorer(knn_model)
+            compiled_logistic = _as_compiled_encoder(logistic_encoder)
+            compiled_knn = _as_compiled_encoder(knn_encoder)
+            if compiled_logistic is not None and compiled_knn is not None \
+                    and compiled_logistic.matches(compiled_knn):
+                if isinstance(logistic_encoder, CompiledTelcoEncoder):
+                    knn_encoder = logistic_encoder
+                elif isinstance(knn_encoder, CompiledTelcoEncoder):
+                    logistic_encoder = knn_encoder
+                else:
+                    knn_encoder = logistic_encoder
+            else:
+                print("⚠️ Los modelos logistic y knn no comparten preprocesado; "
+                      "el ensemble codifica la entrada dos veces")
+            _ensemble_plan = (logistic_model, knn_model,
+                              (logistic_encoder, logistic_proba, knn_encoder, knn_proba))
+        return _ensemble_plan[2]
+
+
+def predict_churn_ensemble(input_data, threshold=None, logistic_weight=None):
+    """
+    Predicción de churn con la Regresión Logística y KNN a la vez.
+    
+    Parameters:
+    -----------
+    input_data : dict
+        Diccionario con los datos de entrada del cliente Telco
+    threshold : float, optional
+        Umbral de clasificación de la logística y de la probabilidad combinada
+        (ver ``predict_logistic_regression``)
+    logistic_weight : float, optional
+        Peso de la logística en la probabilidad combinada, entre 0 y 1
+        (por defecto ``ENSEMBLE_LOGISTIC_WEIGHT``)
+    
+    Returns:
+    --------
+    dict : Resultado de cada modelo y el combinado
+        {
+            'logistic': dict (mismo formato que ``predict_logistic_regression``),
+            'knn': dict (formato de ``predict_knn`` más 'probability_churn',
+                la fracción de vecinos con churn),
+            'ensemble': {'prediction', 'probability_churn', 'probability_no_churn',
+                'classification', 'logistic_weight'},
+            'agreement': bool (los dos modelos predicen la misma clase)
+        }
+    """
+    return predict_churn_ensemble_batch([input_data], threshold, logistic_weight)[0]
+
+
+def predict_churn_ensemble_batch(records, threshold=None, logistic_weight=None):
+    """
+    Versión por lotes de ``predict_churn_ensemble``.
+    
+    Parameters:
+    -----------
+    records : list of dict o dict de columnas
+        Registros ya formateados con ``prepare_telco_input``, o columnas de
+        ``TELCO_SCHEMA.map_columns``
+    
+    Returns:
+    --------
+    list of dict : Un resultado por registro, en el mismo orden de entrada
+    """
+    columns = predict_churn_ensemble_columns(records, threshold, logistic_weight)
+    weight = columns['logistic_weight']
+    names = list(ENSEMBLE_COLUMNS)
+    
+    with stage("ensemble", "format"):
+        results = []
+        for values in zip(*(columns[name].tolist() for name in names)):
+            row = dict(zip(names, values))
+            results.append({
+                'logistic': {
+                    'prediction': row['logistic_prediction'],
+                    'probability_churn': row['logistic_probability_churn'],
+                    'probability_no_churn': row['logistic_probability_no_churn'],
+                    'classification': row['logistic_classification'],
+                },
+                'knn': {
+                    'prediction': row['knn_prediction'],
+                    'probability_churn': row['knn_probability_churn'],
+                    'classification': row['knn_classification'],
+                },
+                'ensemble': {
+                    'prediction': row['ensemble_prediction'],
+                    'probability_churn': row['ensemble_probability_churn'],
+                    'probability_no_churn': row['ensemble_probability_no_churn'],
+                    'classification': row['ensemble_classification'],
+                    'logistic_weight': weight,
+                },
+                'agreement': row['agreement'],
+            })
+        return results
+
+
+# Columnas de ``predict_churn_ensemble_columns`` y su tipo
+ENSEMBLE_COLUMNS = {
+    'logistic_prediction': np.int64,
+    'logistic_probability_churn': np.float64,
+    'logistic_probability_no_churn': np.float64,
+    'logistic_classification': object,
+    'knn_prediction': np.int64,
+    'knn_probability_churn': np.float64,
+    'knn_classification': object,
+    'ensemble_prediction': np.int64,
+    'ensemble_probability_churn': np.float64,
+    'ensemble_probability_no_churn': np.float64,
+    'ensemble_classification': object,
+    'agreement': bool,
+}
+
+
+def predict_churn_ensemble_columns(records, threshold=None, logistic_weight=None):
+    """
+    Versión por columnas de ``predict_churn_ensemble_batch``. La entrada se
+    codifica una sola vez y la misma matriz alimenta a los dos clasificadores.
+    
+    Parameters:
+    -----------
+    records : list of dict, dict de columnas o DataFrame
+        Registros preparados, columnas de ``TELCO_SCHEMA.map_columns`` o un
+        DataFrame de ``prepare_telco_frame``
+    threshold, logistic_weight : float, optional
+        Ver ``predict_churn_ensemble``
+    
+    Returns:
+    --------
+    dict : Un array por cada columna de ``ENSEMBLE_COLUMNS``, más
+        'logistic_weight' (float)
+    """
+    logistic_encoder, logistic_proba, knn_encoder, knn_proba = _get_ensemble_plan()
+    
+    if threshold is None:
+        threshold = DEFAULT_CHURN_THRESHOLD
+    if logistic_weight is None:
+        logistic_weight = ENSEMBLE_LOGISTIC_WEIGHT
+    
+    if not _batch_length(records):
+        return {
+            **{name: np.empty(0, dtype=dtype) for name, dtype in ENSEMBLE_COLUMNS.items()},
+            'logistic_weight': logistic_weight,
+        }
+    
+    with stage("ensemble", "transform"):
+        X = _encode_telco(logistic_encoder, records)
+        X_knn = X if knn_encoder is logistic_encoder else _encode_telco(knn_encoder, records)
+    with stage("ensemble", "logistic"):
+        probabilities = logistic_proba(X)
+    with stage("ensemble", "knn"):
+        neighbors = knn_proba(X_knn)
+    
+    with stage("ensemble", "format"):
+        logistic_churn = np.ascontiguousarray(probabilities[:, 1])
+        logistic_predictions = (logistic_churn > threshold).astype(np.int64)
+        # Clase de KNN como en predict: la más votada (en empate, la de menor índice)
+        knn_predictions = neighbors.argmax(axis=1).astype(np.int64)
+        knn_churn = np.ascontiguousarray(neighbors[:, 1])
+        blended = logistic_weight * logistic_churn + (1.0 - logistic_weight) * knn_churn
+        blended_predictions = (blended > threshold).astype(np.int64)
+        return {
+            'logistic_prediction': logistic_predictions,
+            'logistic_probability_churn': logistic_churn,
+            'logistic_probability_no_churn': np.ascontiguousarray(probabilities[:, 0]),
+            'logistic_classification': _classification_labels(logistic_predictions),
+            'knn_prediction': knn_predictions,
+            'knn_probability_churn': knn_churn,
+            'knn_classification': _classification_labels(knn_predictions),
+            'ensemble_prediction': blended_predictions,
+            'ensemble_probability_churn': blended,
+            'ensemble_probability_no_churn': 1.0 - blended,
+            'ensemble_classification': _classification_labels(blended_predictions),
+            'agreement': logistic_predictions == knn_predictions,
+            'logistic_weight': logistic_weight,
+        }
 
 
 def predict_kmeans(input_data):
@@ -100,55 +603,236 @@ def predict_kmeans(input_data):
             'profile': str (descripción del cluster si está disponible)
         }
     """
-    # Cargar modelo y preprocesador
-    model = load_model("kmeans_model.pkl")
-    preprocessor = load_preprocessor("credit_scaler.pkl")
+    return predict_kmeans_batch([input_data])[0]
+
+
+def predict_kmeans_batch(records):
+    """
+    Asigna clusters K-Means a varias tarjetas de crédito a la vez.
+    
+    Parameters:
+    -----------
+    records : list of dict o dict de columnas
+        Registros ya formateados con ``prepare_credit_card_input``, o columnas
+        de ``CREDIT_CARD_SCHEMA.map_columns``
+    
+    Returns:
+    --------
+    list of dict : Un resultado por registro, en el mismo orden de entrada
+        (mismo formato que ``predict_kmeans``)
+    """
+    clusters, distances, profiles = _assign_kmeans_clusters(_credit_card_matrix(records))
     
-    if model is None or preprocessor is None:
-        raise FileNotFoundError("No se encontraron el modelo o el preprocesador de K-Means")
+    with stage("kmeans", "format"):
+        clusters = clusters.tolist()
+        return [
+            {
+                'cluster': cluster,
+                'distance_to_centroid': distance,
+                'profile': profile
+            }
+            for cluster, distance, profile in zip(clusters, distances.tolist(), profiles.describe(clusters))
+        ]
+
+
+def predict_kmeans_columns(records):
+    """
+    Versión por columnas de ``predict_kmeans_batch``.
     
-    # Definir el orden correcto de las columnas (según el preprocesador)
-    column_order = [
-        'BALANCE', 'BALANCE_FREQUENCY', 'PURCHASES', 'ONEOFF_PURCHASES',
-        'INSTALLMENTS_PURCHASES', 'CASH_ADVANCE', 'PURCHASES_FREQUENCY',
-        'ONEOFF_PURCHASES_FREQUENCY', 'PURCHASES_INSTALLMENTS_FREQUENCY',
-        'CASH_ADVANCE_FREQUENCY', 'CASH_ADVANCE_TRX', 'PURCHASES_TRX',
-        'CREDIT_LIMIT', 'PAYMENTS', 'MINIMUM_PAYMENTS', 'PRC_FULL_PAYMENT', 'TENURE'
-    ]
+    Returns:
+    --------
+    dict : {'cluster', 'distance_to_centroid', 'profile'}, un array por columna
+    """
+    return predict_kmeans_matrix(_credit_card_matrix(records))
+
+
+def predict_kmeans_matrix(X):
+    """
+    Versión de ``predict_kmeans_columns`` para una matriz sin escalar.
     
-    # Convertir input_data a DataFrame con el orden correcto de columnas
-    df = pd.DataFrame([input_data], columns=column_order)
+    Parameters:
+    -----------
+    X : ndarray
+        Matriz (n, 17) float64 en el orden de ``CREDIT_CARD_COLUMNS`` (por
+        ejemplo, un ``.npy`` leído sin copia); solo se copia si tiene vacíos,
+        que se imputan con la media del escalador como en ``prepare_credit_card_frame``
     
-    # Asegurar que todas las columnas estén presentes
-    for col in column_order:
-        if col not in df.columns:
-            df[col] = 0.0
+    Returns:
+    --------
+    dict : {'cluster', 'distance_to_centroid', 'profile'}, un array por columna
+    """
+    missing = np.isnan(X)
+    if missing.any():
+        X = np.where(missing, _credit_card_means(), X)
     
+    clusters, distances, profiles = _assign_kmeans_clusters(X)
+    
+    with stage("kmeans", "format"):
+        return {
+            'cluster': clusters.astype(np.int64),
+            'distance_to_centroid': distances,
+            'profile': np.array(profiles.describe(clusters.tolist()), dtype=object),
+        }
+
+
+def _credit_card_matrix(records):
+    """
+    Matriz con el orden correcto de columnas; las ausentes o vacías se imputan
+    con la media del escalador, como en ``prepare_credit_card_frame``.
+    """
+    with stage("kmeans", "frame"):
+        if isinstance(records, dict):
+            X = np.column_stack([np.asarray(records[col], dtype=np.float64) for col in CREDIT_CARD_COLUMNS])
+        else:
+            X = np.array(
+                [[record.get(col) for col in CREDIT_CARD_COLUMNS] for record in records],
+                dtype=np.float64,
+            ).reshape(len(records), len(CREDIT_CARD_COLUMNS))
+        rows, columns = np.nonzero(np.isnan(X))
+        if len(rows):
+            X[rows, columns] = _credit_card_means()[columns]
+    return X
+
+
+def _credit_card_means():
+    """
+    Media de cada variable en el escalador de K-Means (del motor compartido si
+    está activo): el valor que queda en 0 tras la estandarización.
+    """
+    engine = get_shared_model("kmeans")
+    if engine is not None:
+        return np.asarray(engine.mean, dtype=np.float64)
+    preprocessor = get_model("credit_scaler.pkl")
+    if preprocessor is None:
+        raise FileNotFoundError("No se encontró el preprocesador de K-Means")
+    return np.asarray(preprocessor.mean_, dtype=np.float64)
+
+
+def predict_kmeans_frame(df):
+    """
+    Asigna clusters K-Means sobre un DataFrame completo.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Datos de tarjetas de crédito con las columnas de ``CREDIT_CARD_COLUMNS``
+    
+    Returns:
+    --------
+    DataFrame : Columnas 'cluster', 'distance_to_centroid' y 'profile',
+        con el mismo índice de ``df``
+    """
     # Reordenar columnas por si acaso
-    df = df[column_order]
+    X = df[CREDIT_CARD_COLUMNS].to_numpy(dtype=np.float64)
     
-    # Preprocesar datos
-    processed_data = preprocessor.transform(df)
+    clusters, distances, profiles = _assign_kmeans_clusters(X)
+    
+    return pd.DataFrame({
+        'cluster': clusters.astype(int),
+        'distance_to_centroid': distances,
+        'profile': profiles.describe(clusters.tolist())
+    }, index=df.index)
+
+
+def _assign_kmeans_clusters(X):
+    """
+    Cluster más cercano y distancia a su centroide para una matriz sin escalar.
     
-    # Realizar predicción
-    cluster = model.predict(processed_data)[0]
+    Returns:
+    --------
+    tuple : (clusters, distancias, ``ClusterProfileIndex`` del modelo)
+    """
+    engine = get_shared_model("kmeans")
+    if engine is None:
+        # Obtener modelo y preprocesador del registro en memoria
+        model = get_model("kmeans_model.pkl")
+        preprocessor = get_model("credit_scaler.pkl")
+        
+        if model is None or preprocessor is None:
+            raise FileNotFoundError("No se encontraron el modelo o el preprocesador de K-Means")
+        
+        if KMEANS_ENGINE == "fused":
+            engine = get_kmeans_engine(model, preprocessor)
     
-    # Calcular distancia al centroide
-    distances = model.transform(processed_data)
-    distance_to_centroid = float(distances[0][cluster])
+    if len(X) == 0:
+        clusters, distances = np.empty(0, dtype=np.int64), np.empty(0)
+    elif engine is not None:
+        # Escalado, cluster y distancia en una sola pasada
+        with stage("kmeans", "classifier"):
+            clusters, distances = engine.assign(X)
+    else:
+        # Preprocesar datos y calcular distancias a todos los centroides
+        with stage("kmeans", "transform"):
+            processed_data = preprocessor.transform(pd.DataFrame(X, columns=CREDIT_CARD_COLUMNS))
+        with stage("kmeans", "classifier"):
+            all_distances = model.transform(processed_data)
+            clusters = all_distances.argmin(axis=1)
+            distances = all_distances[np.arange(len(clusters)), clusters]
     
-    # Cargar perfiles de clusters si existen
-    profile = None
-    if model_exists("cluster_profiles.pkl"):
-        cluster_profiles = load_model("cluster_profiles.pkl")
-        if cluster_profiles and cluster in cluster_profiles:
-            profile = cluster_profiles[cluster]
+    # Perfiles indexados por cluster, validados al cargar el modelo
+    n_clusters = engine.n_clusters if engine is not None else model.n_clusters
+    return clusters, distances, get_profile_index(n_clusters)
+
+
+def get_kmeans_profiles():
+    """
+    Perfiles de todos los clusters de K-Means, para dashboards.
     
-    return {
-        'cluster': int(cluster),
-        'distance_to_centroid': distance_to_centroid,
-        'profile': profile
-    }
+    Returns:
+    --------
+    dict : {'n_clusters', 'profiles', 'missing', 'error'} (ver ``ClusterProfileIndex.summary``)
+    """
+    engine = get_shared_model("kmeans")
+    if engine is not None:
+        n_clusters = engine.n_clusters
+    else:
+        model = get_model("kmeans_model.pkl")
+        if model is None:
+            raise FileNotFoundError("No se encontró el modelo K-Means")
+        n_clusters = model.n_clusters
+    return get_profile_index(n_clusters).summary()
+
+
+def prepare_telco_frame(df):
+    """
+    Versión vectorizada de ``prepare_telco_input`` para un DataFrame completo.
+    
+    Acepta columnas con los nombres del API (``senior_citizen``, ``phone_service``...)
+    o con los del dataset original (``SeniorCitizen``, ``PhoneService``...), y valores
+    en español (etiquetas del formulario) o ya en inglés.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Datos Telco crudos
+    
+    Returns:
+    --------
+    DataFrame : Datos con las columnas de ``TELCO_COLUMNS`` listos para el Pipeline
+    """
+    return TELCO_SCHEMA.map_frame(df)
+
+
+def prepare_credit_card_frame(df):
+    """
+    Versión vectorizada de ``prepare_credit_card_input`` para un DataFrame completo.
+    
+    Los valores faltantes se imputan con la media del escalador de K-Means,
+    es decir, quedan en 0 tras la estandarización.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Datos de tarjetas de crédito crudos (puede incluir columnas extra como CUST_ID)
+    
+    Returns:
+    --------
+    DataFrame : Datos con las columnas de ``CREDIT_CARD_COLUMNS``
+    """
+    prepared = CREDIT_CARD_SCHEMA.map_frame(df)
+    if prepared.isna().any().any():
+        prepared = prepared.fillna(dict(zip(CREDIT_CARD_COLUMNS, _credit_card_means())))
+    return prepared
 
 
 def prepare_telco_input(gender, senior_citizen, partner, dependents, tenure,
@@ -164,40 +848,12 @@ def prepare_telco_input(gender, senior_citizen, partner, dependents, tenure,
     --------
     dict : Diccionario con los datos formateados
     """
-    # Convertir valores en español a inglés para el modelo
-    gender_map = {"Masculino": "Male", "Femenino": "Female"}
-    yes_no_map = {"Sí": "Yes", "No": "No"}
-    contract_map = {"Mensual": "Month-to-month", "Un año": "One year", "Dos años": "Two year"}
-    payment_map = {
-        "Cheque electrónico": "Electronic check",
-        "Cheque por correo": "Mailed check",
-        "Transferencia bancaria (automática)": "Bank transfer (automatic)",
-        "Tarjeta de crédito (automática)": "Credit card (automatic)"
-    }
-    internet_map = {"Fibra óptica": "Fiber optic", "DSL": "DSL", "No": "No"}
-    no_service_map = {"Sin servicio telefónico": "No phone service", "Sin servicio de internet": "No internet service"}
-    
-    return {
-        'gender': gender_map.get(gender, gender),
-        'SeniorCitizen': 1 if senior_citizen == "Sí" else 0,
-        'Partner': yes_no_map.get(partner, partner),
-        'Dependents': yes_no_map.get(dependents, dependents),
-        'tenure': tenure,
-        'PhoneService': yes_no_map.get(phone_service, phone_service),
-        'MultipleLines': no_service_map.get(multiple_lines, yes_no_map.get(multiple_lines, multiple_lines)),
-        'InternetService': internet_map.get(internet_service, internet_service),
-        'OnlineSecurity': no_service_map.get(online_security, yes_no_map.get(online_security, online_security)),
-        'OnlineBackup': no_service_map.get(online_backup, yes_no_map.get(online_backup, online_backup)),
-        'DeviceProtection': no_service_map.get(device_protection, yes_no_map.get(device_protection, device_protection)),
-        'TechSupport': no_service_map.get(tech_support, yes_no_map.get(tech_support, tech_support)),
-        'StreamingTV': no_service_map.get(streaming_tv, yes_no_map.get(streaming_tv, streaming_tv)),
-        'StreamingMovies': no_service_map.get(streaming_movies, yes_no_map.get(streaming_movies, streaming_movies)),
-        'Contract': contract_map.get(contract, contract),
-        'PaperlessBilling': yes_no_map.get(paperless_billing, paperless_billing),
-        'PaymentMethod': payment_map.get(payment_method, payment_method),
-        'MonthlyCharges': monthly_charges,
-        'TotalCharges': total_charges
-    }
+    return TELCO_SCHEMA.map_values((
+        gender, senior_citizen, partner, dependents, tenure, phone_service,
+        multiple_lines, internet_service, online_security, online_backup,
+        device_protection, tech_support, streaming_tv, streaming_movies, contract,
+        paperless_billing, payment_method, monthly_charges, total_charges,
+    ))
 
 
 def prepare_credit_card_input(balance, balance_frequency, purchases, oneoff_purchases,
@@ -213,23 +869,9 @@ def prepare_credit_card_input(balance, balance_frequency, purchases, oneoff_purc
     --------
     dict : Diccionario con los datos formateados
     """
-    return {
-        'BALANCE': balance,
-        'BALANCE_FREQUENCY': balance_frequency,
-        'PURCHASES': purchases,
-        'ONEOFF_PURCHASES': oneoff_purchases,
-        'INSTALLMENTS_PURCHASES': installments_purchases,
-        'CASH_ADVANCE': cash_advance,
-        'PURCHASES_FREQUENCY': purchases_frequency,
-        'ONEOFF_PURCHASES_FREQUENCY': oneoff_purchases_frequency,
-        'PURCHASES_INSTALLMENTS_FREQUENCY': purchases_installments_frequency,
-        'CASH_ADVANCE_FREQUENCY': cash_advance_frequency,
-        'CASH_ADVANCE_TRX': cash_advance_trx,
-        'PURCHASES_TRX': purchases_trx,
-        'CREDIT_LIMIT': credit_limit,
-        'PAYMENTS': payments,
-        'MINIMUM_PAYMENTS': minimum_payments,
-        'PRC_FULL_PAYMENT': prc_full_payment,
-        'TENURE': tenure
-    }
-
+    return CREDIT_CARD_SCHEMA.map_values((
+        balance, balance_frequency, purchases, oneoff_purchases, installments_purchases,
+        cash_advance, purchases_frequency, oneoff_purchases_frequency,
+        purchases_installments_frequency, cash_advance_frequency, cash_advance_trx,
+        purchases_trx, credit_limit, payments, minimum_payments, prc_full_payment, tenure,
+    ))
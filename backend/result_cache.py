@@ -0,0 +1,204 @@
+"""
+Caché de resultados de predicción para peticiones repetidas.
+
+El mismo cliente se vuelve a puntuar desde los dashboards y desde la app de
+Streamlit; con la caché activada, una petición individual cuyo registro ya
+preparado (salida de ``prepare_*_input``) y opciones coinciden con una anterior
+se responde desde memoria, sin pasar por el ejecutor ni por el modelo.
+
+- La clave es el registro canónico (campos ordenados, números como float),
+  las opciones (ej. ``threshold``) y la versión del modelo.
+- La versión es la firma (mtime/tamaño) en disco de los archivos del modelo
+  (pickle o artefacto), revisada como máximo cada ``MODEL_RELOAD_INTERVAL``
+  segundos. Si cambia, las entradas del modelo se descartan y durante un
+  intervalo no se guardan resultados nuevos, mientras los workers recargan.
+- Política LRU con ``RESULT_CACHE_SIZE`` entradas y caducidad de
+  ``RESULT_CACHE_TTL`` segundos.
+
+Configuración por variables de entorno:
+
+- ``RESULT_CACHE_ENABLED``: '1' para activarla (desactivada por defecto)
+- ``RESULT_CACHE_SIZE``: entradas máximas (por defecto 10000)
+- ``RESULT_CACHE_TTL``: segundos de vida de cada entrada (por defecto 300; 0 = sin caducidad)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .model_loader import MODEL_FILES, RELOAD_CHECK_INTERVAL, _file_signature, resolve_model_path
+
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "0") == "1"
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+
+# Archivos de los que depende el resultado de cada modelo (K-Means incluye los
+# perfiles y el ensemble los dos modelos de churn)
+VERSION_FILES = {
+    **MODEL_FILES,
+    "kmeans": MODEL_FILES["kmeans"] + ("cluster_profiles.pkl",),
+    "ensemble": MODEL_FILES["logistic"] + MODEL_FILES["knn"],
+}
+
+
+def _canonical_value(value):
+    kind = type(value)
+    if kind is str or value is None:
+        return value
+    if kind is not float:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return str(value)
+    # NaN no es igual a sí mismo; los valores faltantes se tratan igual que None
+    return value if value == value else None
+
+
+def canonical_key(record):
+    """
+    Clave canónica de un registro preparado: campos ordenados y números como
+    float, de modo que ``12`` y ``12.0`` (o ``np.float64(12)``) dan la misma clave.
+    """
+    return tuple(sorted((field, _canonical_value(value)) for field, value in record.items()))
+
+
+def model_version(model_name):
+    """Firma en disco de los archivos de ``model_name`` (None si falta alguno)."""
+    version = []
+    for filename in VERSION_FILES[model_name]:
+        try:
+            version.append(_file_signature(resolve_model_path(filename)))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
+class ResultCache:
+    """Caché LRU con caducidad de resultados de predicción por modelo."""
+
+    def __init__(self, max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL,
+                 check_interval=RELOAD_CHECK_INTERVAL):
+        """
+        Parameters:
+        -----------
+        max_size : int
+            Entradas máximas; al superarse se descarta la usada hace más tiempo
+        ttl : float
+            Segundos de vida de cada entrada (0 = sin caducidad)
+        check_interval : float
+            Cada cuántos segundos se revisa en disco la versión de cada modelo
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Modelo -> (versión, revisada en, cambió en)
+        self._versions = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+    def _current_version(self, model_name, now):
+        """Versión vigente del modelo; si cambió en disco, descarta sus entradas."""
+        known = self._versions.get(model_name)
+        if known is not None and now - known[1] < self.check_interval:
+            return known[0]
+
+        version = model_version(model_name)
+        if known is None:
+            self._versions[model_name] = (version, now, None)
+        elif version != known[0]:
+            self._versions[model_name] = (version, now, now)
+            self.invalidate(model_name)
+        else:
+            self._versions[model_name] = (version, now, known[2])
+        return version
+
+    def key(self, model_name, record, options=()):
+        """
+        Clave de caché de una predicción.
+
+        Parameters:
+        -----------
+        model_name : str
+            'logistic', 'knn' o 'kmeans'
+        record : dict
+            Registro ya formateado con ``prepare_*_input``
+        options : tuple
+            Opciones de la predicción (ej. ``(threshold,)``)
+        """
+        version = self._current_version(model_name, time.monotonic())
+        return (model_name, version, tuple(options), canonical_key(record))
+
+    def get(self, key):
+        """Resultado guardado para ``key`` o None si no está o caducó."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at is not None and now >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Copia: el llamador puede modificar el diccionario que recibe
+        return dict(result)
+
+    def put(self, key, result):
+        now = time.monotonic()
+        changed_at = self._versions.get(key[0], (None, None, None))[2]
+        if changed_at is not None and now - changed_at < self.check_interval:
+            # Justo tras un cambio de versión algún worker puede seguir con el modelo anterior
+            return
+
+        expires_at = now + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (expires_at, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_name=None):
+        """Descarta las entradas de un modelo (o todas si ``model_name`` es None)."""
+        with self._lock:
+            stale = [key for key in self._entries if model_name is None or key[0] == model_name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        """
+        Returns:
+        --------
+        dict : Aciertos, fallos, tasa de aciertos, entradas y descartes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
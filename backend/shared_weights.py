@@ -0,0 +1,370 @@
+"""
+Pesos de los modelos compartidos entre procesos mediante archivos mapeados en memoria.
+
+Con varios workers (``uvicorn --workers N`` o ``INFERENCE_EXECUTOR=process``)
+cada proceso deserializa su propia copia de los pickles, y la memoria crece
+linealmente con el número de workers. En el modo compartido los arrays
+numéricos de los modelos se exportan una sola vez a un directorio:
+
+- Regresión Logística: medias y escalas, coeficientes e intercepto
+- KNN: matriz de entrenamiento codificada, etiquetas y parámetros del codificador
+- K-Means: centroides y media/escala del ``StandardScaler``
+
+Cada worker abre esos ``.npy`` con ``np.load(mmap_mode='r')``: las páginas
+viven en la caché del sistema operativo y todos los procesos leen las mismas,
+sin copiarlas. Los metadatos pequeños (columnas, categorías, ``n_neighbors``)
+van en ``manifest.json``.
+
+Cada exportación se guarda en un subdirectorio con la versión de los pickles de
+origen (mtime/tamaño) y del formato de exportación (``EXPORT_FORMAT_VERSION``);
+si un pickle cambia, la siguiente comprobación exporta la nueva versión y el
+proceso cambia a ella.
+
+El directorio es propio del usuario (modo 0700) y solo se reutilizan versiones
+suyas: otro usuario de la máquina no puede dejar pesos preparados de antemano.
+
+Uso recomendado: exportar antes de arrancar los workers
+
+    python -m backend.shared_weights export
+    SHARED_WEIGHTS=1 uvicorn backend.api:app --workers 4
+
+Configuración por variables de entorno:
+
+- ``SHARED_WEIGHTS``: '1' para que las predicciones usen los pesos compartidos
+- ``SHARED_WEIGHTS_DIR``: directorio de exportación (por defecto ``/dev/shm/ml-weights-<uid>``
+  si existe ``/dev/shm``, si no en el directorio temporal del sistema)
+
+En este modo KNN usa el índice de ``KNN_INDEX`` o, si es 'sklearn', la búsqueda
+exacta por fuerza bruta (mismos vecinos que el Pipeline). Los índices en árbol
+(``kd_tree``/``ball_tree``) se construyen en cada proceso y no se comparten.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .compiled_logistic import CompiledLogisticModel, get_compiled_logistic
+from .kmeans_engine import KMeansScoringEngine
+from .model_loader import MODEL_FILES, RELOAD_CHECK_INTERVAL, _file_signature, load_model, resolve_model_path
+from .neighbors import KNN_INDEX, IndexedKNNClassifier, get_indexed_classifier
+
+
+def _current_uid():
+    """uid del proceso, o None en sistemas sin ``os.getuid`` (Windows)."""
+    return os.getuid() if hasattr(os, "getuid") else None
+
+
+def _default_directory():
+    # Un directorio por usuario: /dev/shm y /tmp son compartidos
+    uid = _current_uid()
+    name = "ml-weights" if uid is None else f"ml-weights-{uid}"
+    if os.path.isdir("/dev/shm"):
+        return os.path.join("/dev/shm", name)
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+SHARED_WEIGHTS = os.getenv("SHARED_WEIGHTS", "0") == "1"
+SHARED_WEIGHTS_DIR = os.getenv("SHARED_WEIGHTS_DIR") or _default_directory()
+
+MANIFEST_FILENAME = "manifest.json"
+
+# Cambia cuando cambian los arrays o metadatos que exporta ``to_arrays``, para
+# no reutilizar exportaciones con el formato anterior
+EXPORT_FORMAT_VERSION = 2
+
+
+def _knn_index_kind():
+    return KNN_INDEX if KNN_INDEX != "sklearn" else "brute"
+
+
+# Por modelo: archivos de origen, cómo construir el modelo en NumPy a partir de
+# ellos (pickle o artefacto) y cómo reconstruirlo a partir de los arrays exportados
+SHARED_MODELS = {
+    "logistic": (
+        MODEL_FILES["logistic"],
+        get_compiled_logistic,
+        CompiledLogisticModel.from_arrays,
+    ),
+    "knn": (
+        MODEL_FILES["knn"],
+        lambda pipeline: get_indexed_classifier(pipeline, "brute"),
+        lambda arrays, metadata: IndexedKNNClassifier.from_arrays(arrays, metadata, _knn_index_kind()),
+    ),
+    "kmeans": (
+        MODEL_FILES["kmeans"],
+        KMeansScoringEngine.from_models,
+        KMeansScoringEngine.from_arrays,
+    ),
+}
+
+
+def source_signatures():
+    """
+    Firma (mtime_ns, tamaño) de cada modelo de origen (pickle o manifiesto de
+    su artefacto), o None si no existe.
+
+    Returns:
+    --------
+    dict : {nombre_archivo: [mtime_ns, tamaño] o None}
+    """
+    signatures = {}
+    for sources, _, _ in SHARED_MODELS.values():
+        for filename in sources:
+            try:
+                signatures[filename] = list(_file_signature(resolve_model_path(filename)))
+            except OSError:
+                signatures[filename] = None
+    return signatures
+
+
+def weights_version(signatures=None):
+    """Identificador corto de la versión de los pickles de origen y del formato de exportación."""
+    signatures = signatures if signatures is not None else source_signatures()
+    content = {'format_version': EXPORT_FORMAT_VERSION, 'sources': signatures}
+    digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _check_owner(path):
+    """
+    Raises:
+    -------
+    PermissionError : si ``path`` no pertenece al usuario actual o otros usuarios pueden escribir en él
+    """
+    uid = _current_uid()
+    if uid is None:
+        return
+    info = os.stat(path)
+    if info.st_uid != uid or info.st_mode & 0o022:
+        raise PermissionError(f"{path} no pertenece al usuario actual o lo pueden modificar otros usuarios; "
+                              "no se usan sus pesos")
+
+
+def export_shared_weights(directory=SHARED_WEIGHTS_DIR):
+    """
+    Exporta los arrays de los modelos a ``directory`` si esta versión aún no existe.
+
+    La exportación se escribe en un directorio temporal y se renombra al final;
+    si varios procesos exportan a la vez, se queda la primera y el resto se
+    descarta, así que los lectores nunca ven una versión a medias. Solo se
+    reutilizan directorios del usuario actual.
+
+    Parameters:
+    -----------
+    directory : str
+        Directorio base de los pesos compartidos
+
+    Returns:
+    --------
+    str : Ruta del subdirectorio de la versión actual
+
+    Raises:
+    -------
+    PermissionError : si ``directory`` o la versión ya exportada son de otro usuario
+    """
+    signatures = source_signatures()
+    version = weights_version(signatures)
+    target = os.path.join(directory, f"v-{version}")
+
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_owner(directory)
+    if os.path.exists(os.path.join(target, MANIFEST_FILENAME)):
+        _check_owner(target)
+        return target
+
+    # mkdtemp crea el directorio solo para el usuario actual (0700)
+    staging = tempfile.mkdtemp(prefix=".export-", dir=directory)
+    try:
+        manifest = {
+            'version': version,
+            'created_at': time.time(),
+            'sources': signatures,
+            'models': {},
+        }
+        for name, (sources, build, _) in SHARED_MODELS.items():
+            # Se cargan directamente, sin pasar por el registro del proceso
+            models = [load_model(filename) for filename in sources]
+            if any(model is None for model in models):
+                continue
+
+            built = build(*models)
+            if not hasattr(built, 'to_arrays'):
+                # Estructura no soportada: cada proceso usa su propio Pipeline
+                print(f"⚠️ El modelo {name} no se puede compartir; cada proceso cargará el suyo")
+                continue
+            arrays, metadata = built.to_arrays()
+            files = {}
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                if array.dtype == object:
+                    raise ValueError(f"El array {name}.{key} no es numérico y no puede compartirse")
+                files[key] = f"{name}.{key}.npy"
+                np.save(os.path.join(staging, files[key]), array, allow_pickle=False)
+            manifest['models'][name] = {'arrays': files, 'metadata': metadata}
+
+        with open(os.path.join(staging, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Otro proceso publicó la misma versión antes
+            if not os.path.exists(os.path.join(target, MANIFEST_FILENAME)):
+                raise
+            _check_owner(target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def open_shared_weights(path):
+    """
+    Reconstruye los modelos de una versión exportada sobre arrays mapeados en memoria.
+
+    Returns:
+    --------
+    dict : {'logistic': CompiledLogisticModel, 'knn': IndexedKNNClassifier,
+        'kmeans': KMeansScoringEngine}, solo con los modelos exportados
+    """
+    with open(os.path.join(path, MANIFEST_FILENAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    models = {}
+    for name, entry in manifest['models'].items():
+        arrays = {
+            key: np.load(os.path.join(path, filename), mmap_mode='r', allow_pickle=False)
+            for key, filename in entry['arrays'].items()
+        }
+        models[name] = SHARED_MODELS[name][2](arrays, entry['metadata'])
+    return models
+
+
+# Versión a la que está conectado este proceso
+_attached = None
+_attached_lock = threading.Lock()
+
+
+def attach_shared_weights(directory=SHARED_WEIGHTS_DIR):
+    """
+    Conecta el proceso a los pesos compartidos, exportándolos primero si hace falta.
+
+    Returns:
+    --------
+    dict : Estado de la conexión (ver ``shared_weights_status``)
+    """
+    global _attached
+    with _attached_lock:
+        path = export_shared_weights(directory)
+        if _attached is None or _attached['path'] != path:
+            _attached = {
+                'path': path,
+                'directory': directory,
+                'models': open_shared_weights(path),
+                'checked_at': time.monotonic(),
+            }
+        _attached['checked_at'] = time.monotonic()
+    return shared_weights_status()
+
+
+def get_shared_model(name):
+    """
+    Modelo compartido ``name`` ('logistic', 'knn' o 'kmeans') o None si el modo
+    compartido está desactivado o el modelo no se exportó.
+
+    Como el registro de modelos, comprueba como máximo cada
+    ``RELOAD_CHECK_INTERVAL`` segundos si los pickles cambiaron en disco.
+    """
+    if not SHARED_WEIGHTS:
+        return None
+
+    entry = _attached
+    if entry is None or time.monotonic() - entry['checked_at'] >= RELOAD_CHECK_INTERVAL:
+        attach_shared_weights(entry['directory'] if entry else SHARED_WEIGHTS_DIR)
+        entry = _attached
+    return entry['models'].get(name)
+
+
+def shared_weights_status():
+    """
+    Estado de los pesos compartidos en este proceso.
+
+    Returns:
+    --------
+    dict : Ruta de la versión, modelos disponibles y bytes mapeados, o
+        {'attached': False} si el proceso no está conectado
+    """
+    entry = _attached
+    if entry is None:
+        return {'attached': False}
+
+    mapped = sum(
+        os.path.getsize(os.path.join(entry['path'], filename))
+        for filename in os.listdir(entry['path']) if filename.endswith(".npy")
+    )
+    return {
+        'attached': True,
+        'path': entry['path'],
+        'models': sorted(entry['models']),
+        'mapped_bytes': mapped,
+    }
+
+
+def prune_shared_weights(directory=SHARED_WEIGHTS_DIR, keep=None):
+    """
+    Elimina las versiones exportadas distintas de ``keep``.
+
+    Los procesos que aún las tengan mapeadas siguen funcionando en Linux; en
+    sistemas que no permiten borrar archivos abiertos, esas versiones se ignoran.
+
+    Returns:
+    --------
+    list : Rutas eliminadas
+    """
+    removed = []
+    if not os.path.isdir(directory):
+        return removed
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry.startswith("v-") and path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta los pesos de los modelos para compartirlos entre procesos")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("--dir", default=SHARED_WEIGHTS_DIR, help="Directorio de los pesos compartidos")
+    parser.add_argument("--prune", action="store_true", help="Eliminar las versiones anteriores al exportar")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        path = export_shared_weights(args.dir)
+        print(f"Pesos exportados en {path}")
+        if args.prune:
+            for removed in prune_shared_weights(args.dir, keep=path):
+                print(f"Eliminada versión anterior {removed}")
+        return
+
+    path = os.path.join(args.dir, f"v-{weights_version()}")
+    manifest_path = os.path.join(path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        raise SystemExit(f"No hay pesos exportados para la versión actual en {args.dir}")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    print(f"versión={manifest['version']} ruta={path}")
+    for name, entry in manifest['models'].items():
+        for key, filename in entry['arrays'].items():
+            array = np.load(os.path.join(path, filename), mmap_mode='r')
+            print(f"  {name}.{key}: {array.dtype} {array.shape} ({array.nbytes:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Presupuesto de tiempo de arranque del API y del frontend.
+
+Ejecuta cada objetivo en un proceso nuevo con ``python -X importtime``, agrega
+el tiempo de import por paquete y lo compara con la línea base guardada en
+``startup_budget.json``. Los milisegundos dependen de la máquina, así que la
+línea base no es un tiempo absoluto sino la proporción frente a un import de
+referencia medido en la misma ejecución (``import fastapi`` para el backend,
+``import streamlit`` para el frontend). Falla (código 1) si:
+
+- la mediana del tiempo total de imports, dividida por la de la referencia,
+  supera la proporción de la línea base en más de la tolerancia, o
+- el objetivo importa algún módulo prohibido (ej. pandas o scikit-learn en
+  ``backend.api``, que deben cargarse en segundo plano o al primer uso). Si la
+  referencia ya lo importa (streamlit carga plotly), el tiempo no distingue
+  quién lo pidió; por eso además se revisa el código del objetivo y falla si
+  lo importa siempre al cargarse en lugar de al primer uso.
+
+Los tiempos por paquete son informativos.
+
+Uso (desde la raíz del proyecto):
+
+    python -m backend.startup_bench
+    python -m backend.startup_bench --update      # regrabar la línea base
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).parent.parent
+BUDGET_PATH = Path(__file__).parent / "startup_budget.json"
+
+# Objetivo -> argumentos de Python para ejecutarlo
+TARGETS = {
+    "backend": ["-c", "import backend"],
+    "backend.api": ["-c", "import backend.api"],
+    "frontend": [str(ROOT_DIR / "frontend" / "app.py")],
+}
+
+# Código de cada objetivo cuyos imports se revisan, y su paquete (imports relativos)
+TARGET_SOURCES = {
+    "backend": (ROOT_DIR / "backend" / "__init__.py", "backend"),
+    "backend.api": (ROOT_DIR / "backend" / "api.py", "backend"),
+    "frontend": (ROOT_DIR / "frontend" / "app.py", None),
+}
+
+# Import de referencia de cada objetivo, medido en la misma ejecución
+REFERENCES = {
+    "fastapi": ["-c", "import fastapi"],
+    "streamlit": ["-c", "import streamlit"],
+}
+DEFAULT_REFERENCES = {
+    "backend": "fastapi",
+    "backend.api": "fastapi",
+    "frontend": "streamlit",
+}
+
+DEFAULT_TOLERANCE = 0.5
+
+
+def parse_importtime(stderr):
+    """
+    Interpreta la salida de ``-X importtime``.
+
+    Returns:
+    --------
+    list of tuple : (módulo, tiempo propio en µs, acumulado en µs, nivel de anidamiento)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        head, cumulative_us, name = line.split("|")
+        self_us = int(head.split(":", 1)[1])
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), self_us, int(cumulative_us), level))
+    return entries
+
+
+def measure(target, runs=5):
+    """
+    Ejecuta un objetivo (o un import de ``REFERENCES``) ``runs`` veces.
+
+    Returns:
+    --------
+    dict : Mediana del tiempo total (ms), tiempo propio por paquete de la
+        última ejecución (ms) y conjunto de módulos importados
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    totals = []
+    entries = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", *(TARGETS.get(target) or REFERENCES[target])],
+            capture_output=True, text=True, env=env, cwd=ROOT_DIR,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"El objetivo {target} falló:\n{completed.stderr[-2000:]}")
+        entries = parse_importtime(completed.stderr)
+        totals.append(sum(cumulative for _, _, cumulative, level in entries if level == 0) / 1000)
+
+    packages = {}
+    for name, self_us, _, _ in entries:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_us / 1000
+    return {
+        "total_ms": statistics.median(totals),
+        "packages_ms": dict(sorted(packages.items(), key=lambda item: -item[1])),
+        "modules": {name for name, _, _, _ in entries},
+    }
+
+
+def unconditional_imports(path, package=None):
+    """
+    Módulos que un archivo importa siempre al ejecutarse: los imports del nivel
+    de módulo, también dentro de ``try``/``with``, pero no los de funciones,
+    clases o ramas ``if``/bucles (en un script de Streamlit, el código que solo
+    corre tras una acción del usuario).
+
+    Parameters:
+    -----------
+    package : str, optional
+        Paquete del archivo, para resolver los imports relativos
+
+    Returns:
+    --------
+    set of str
+    """
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    modules = set()
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parent = (package or "").split(".")
+                parent = parent[:len(parent) - node.level + 1]
+                base = ".".join(part for part in [*parent, base] if part)
+            if node.module is None:
+                # from . import x
+                modules.update(f"{base}.{alias.name}" for alias in node.names)
+            else:
+                modules.add(base)
+        elif isinstance(node, (ast.With, ast.AsyncWith)):
+            pending.extend(node.body)
+        elif isinstance(node, ast.Try):
+            pending.extend([*node.body, *node.orelse, *node.finalbody])
+            for handler in node.handlers:
+                pending.extend(handler.body)
+    return modules
+
+
+def load_budget():
+    if not BUDGET_PATH.exists():
+        return {}
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_target(target, result, budget, tolerance, reference_ms=None, reference_modules=(), source_imports=()):
+    """
+    Compara una medida con su presupuesto.
+
+    Parameters:
+    -----------
+    reference_ms : float, optional
+        Tiempo del import de referencia medido en la misma ejecución
+    reference_modules : set of str
+        Módulos que importa la referencia: no cuentan como importados por el objetivo
+    source_imports : set of str
+        Módulos que el código del objetivo importa siempre (ver ``unconditional_imports``)
+
+    Returns:
+    --------
+    list of str : Problemas encontrados (vacía si está dentro del presupuesto)
+    """
+    problems = []
+    entry = budget.get(target, {})
+    baseline = entry.get("baseline_ratio")
+    if baseline is not None and reference_ms:
+        ratio = result["total_ms"] / reference_ms
+        if ratio > baseline * (1 + tolerance):
+            problems.append(
+                f"{target}: {ratio:.2f}× {entry.get('reference')} supera la línea base de "
+                f"{baseline:.2f}× (+{tolerance:.0%})"
+            )
+    def matches(name, module):
+        return name == module or name.startswith(module + ".")
+
+    for module in entry.get("forbidden", []):
+        if any(matches(name, module) for name in source_imports):
+            problems.append(f"{target}: importa {module} al cargar el módulo (no al primer uso)")
+        elif any(matches(name, module) for name in result["modules"] - set(reference_modules)):
+            problems.append(f"{target}: importa {module} al arrancar")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque por módulo frente al presupuesto")
+    parser.add_argument("targets", nargs="*", help=f"Objetivos a medir: {', '.join(TARGETS)} (por defecto todos)")
+    parser.add_argument("--runs", type=int, default=5, help="Ejecuciones por objetivo")
+    parser.add_argument("--top", type=int, default=10, help="Paquetes a mostrar por objetivo")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Margen sobre la proporción de la línea base antes de fallar (0.5 = +50%%)")
+    parser.add_argument("--update", action="store_true", help="Guardar las proporciones como nueva línea base")
+    args = parser.parse_args(argv)
+
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"Objetivos desconocidos: {', '.join(unknown)}")
+
+    budget = load_budget()
+    problems = []
+    references = {}
+    for target in args.targets or list(TARGETS):
+        entry = budget.setdefault(target, {})
+        reference = entry.setdefault("reference", DEFAULT_REFERENCES[target])
+        if reference not in references:
+            references[reference] = measure(reference, args.runs)
+            print(f"referencia {reference}: {references[reference]['total_ms']:.1f} ms")
+        reference_ms = references[reference]["total_ms"]
+
+        result = measure(target, args.runs)
+        ratio = result["total_ms"] / reference_ms
+        baseline = entry.get("baseline_ratio")
+        expected = f" (línea base {baseline:.2f}×)" if baseline is not None else ""
+        print(f"{target}: {result['total_ms']:.1f} ms = {ratio:.2f}× {reference}{expected}")
+        for package, ms in list(result["packages_ms"].items())[:args.top]:
+            print(f"  {package:30s} {ms:8.1f} ms")
+
+        if args.update:
+            entry["baseline_ratio"] = round(ratio, 3)
+            # Las líneas base en ms de versiones anteriores no sirven en otra máquina
+            entry.pop("baseline_ms", None)
+        else:
+            source_imports = unconditional_imports(*TARGET_SOURCES[target]) if target in TARGET_SOURCES else set()
+            problems.extend(check_target(target, result, budget, args.tolerance, reference_ms,
+                                         references[reference]["modules"], source_imports))
+
+    if args.update:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"Línea base guardada en {BUDGET_PATH}")
+        return
+
+    for problem in problems:
+        print(f"REGRESIÓN: {problem}", file=sys.stderr)
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Generador de datos sintéticos de Telco y de tarjetas de crédito.
+
+Produce conjuntos de cualquier tamaño con las mismas variables que
+``TelcoRequest`` y ``CreditCardRequest`` (ver feature_schema.py), para pruebas
+de carga y benchmarks sin los CSV originales:
+
+- Distribuciones marginales parecidas a las de los datasets originales
+  (antigüedad bimodal, contratos más largos con más antigüedad, servicios de
+  internet solo para clientes con internet, importes con cola larga, ~23 % de
+  cuentas sin compras, etc.) y combinaciones coherentes entre variables
+- Estilo ``api`` (por defecto): nombres del API y etiquetas en español del
+  formulario, tal como los recibe ``prepare_telco_input``
+- Estilo ``dataset``: columnas y valores del CSV original (en inglés, con
+  ``customerID`` / ``CUST_ID``, ``TotalCharges`` vacío en clientes nuevos y
+  ``MINIMUM_PAYMENTS`` con faltantes), para ``bulk.py`` y los notebooks
+- Generación y escritura por bloques (CSV, NDJSON o Parquet), con memoria
+  acotada; cada bloque usa su propia semilla, así que el resultado es
+  reproducible
+
+Uso (desde la raíz del proyecto):
+
+    python -m backend.synthetic telco 10000000 -o telco.parquet
+    python -m backend.synthetic credit_card 1000000 -o cc.csv --style dataset
+    python -m backend.synthetic telco 1000 --format ndjson | head
+
+Parquet requiere pyarrow.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_SEED = 42
+
+STYLES = ("api", "dataset")
+OUTPUT_FORMATS = ("csv", "ndjson", "parquet")
+
+# Servicios que dependen de tener internet y su probabilidad de 'Yes'
+INTERNET_ADDONS = {
+    "OnlineSecurity": 0.37,
+    "OnlineBackup": 0.44,
+    "DeviceProtection": 0.44,
+    "TechSupport": 0.37,
+    "StreamingTV": 0.49,
+    "StreamingMovies": 0.50,
+}
+PAYMENT_METHODS = ("Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)")
+PAYMENT_PROBABILITIES = (0.34, 0.23, 0.22, 0.21)
+
+# Topes de los importes de tarjetas de crédito (cerca de los máximos del dataset
+# original), para que la cola de la lognormal no genere valores imposibles
+CREDIT_CARD_CAPS = {
+    "BALANCE": 20000.0,
+    "PURCHASES": 50000.0,
+    "CASH_ADVANCE": 47000.0,
+    "PAYMENTS": 51000.0,
+    "MINIMUM_PAYMENTS": 76000.0,
+}
+
+
+def _labels(values, index):
+    """Array object con ``values[index]`` (indexar una tabla pequeña es mucho más rápido que np.where con textos)."""
+    return np.asarray(values, dtype=object)[index]
+
+
+def _choice(rng, values, probabilities, n_rows):
+    """Array object con ``values`` elegidos con las probabilidades indicadas."""
+    return _labels(values, rng.choice(len(values), n_rows, p=probabilities))
+
+
+def _yes_no(mask, otherwise=None, label=None):
+    """'Yes'/'No' según ``mask``; donde ``otherwise`` es falso, ``label`` (ej. 'No internet service')."""
+    index = mask.astype(np.intp)
+    if otherwise is not None:
+        index = np.where(otherwise, index, 2)
+    return _labels(("No", "Yes", label), index)
+
+
+def _per_month(frequency):
+    """Frecuencias como en el dataset original: múltiplos de 1/12 (al menos 1/12 si no es 0)."""
+    return np.where(frequency > 0, np.maximum(np.round(frequency * 12), 1) / 12, 0.0)
+
+
+def telco_columns(n_rows, rng):
+    """
+    Columnas Telco con los nombres y valores del dataset original.
+
+    Returns:
+    --------
+    dict : {columna del modelo: ndarray}; TotalCharges es NaN con antigüedad 0
+    """
+    # Antigüedad bimodal: muchos clientes recientes, un grupo fiel cerca de 72 meses
+    group = rng.choice(3, n_rows, p=[0.2, 0.1, 0.7])
+    tenure = np.select(
+        [group == 0, group == 1],
+        [1 + np.floor(rng.exponential(4, n_rows)), 72 - np.floor(rng.exponential(3, n_rows))],
+        rng.integers(1, 73, n_rows),
+    )
+    tenure = np.where(rng.random(n_rows) < 0.0016, 0, np.clip(tenure, 1, 72)).astype(np.int64)
+
+    # Contratos más largos cuanto mayor es la antigüedad
+    loyalty = tenure / 72
+    p_two_years = 0.05 + 0.55 * loyalty ** 1.5
+    p_one_year = 0.1 + 0.2 * loyalty
+    draw = rng.random(n_rows)
+    contract = _labels(("Month-to-month", "One year", "Two year"),
+                       (draw < p_two_years + p_one_year).astype(np.intp) + (draw < p_two_years))
+
+    partner = rng.random(n_rows) < 0.48
+    dependents = rng.random(n_rows) < np.where(partner, 0.5, 0.1)
+
+    internet = _choice(rng, ("Fiber optic", "DSL", "No"), (0.44, 0.34, 0.22), n_rows)
+    has_internet = internet != "No"
+    # Los clientes sin teléfono tienen todos DSL
+    phone = ~((internet == "DSL") & (rng.random(n_rows) < 0.28))
+    multiple_lines = phone & (rng.random(n_rows) < 0.47)
+
+    columns = {
+        "gender": _choice(rng, ("Male", "Female"), (0.5, 0.5), n_rows),
+        "SeniorCitizen": (rng.random(n_rows) < 0.16).astype(np.int64),
+        "Partner": _yes_no(partner),
+        "Dependents": _yes_no(dependents),
+        "tenure": tenure,
+        "PhoneService": _yes_no(phone),
+        "MultipleLines": _yes_no(multiple_lines, phone, "No phone service"),
+        "InternetService": internet,
+    }
+
+    charges = 20.0 * phone + 5.0 * multiple_lines
+    charges += np.select([internet == "Fiber optic", internet == "DSL"], [50.0, 25.0], 0.0)
+    for column, probability in INTERNET_ADDONS.items():
+        addon = has_internet & (rng.random(n_rows) < probability)
+        columns[column] = _yes_no(addon, has_internet, "No internet service")
+        charges += addon * (10.0 if column.startswith("Streaming") else 5.0)
+
+    columns["Contract"] = contract
+    columns["PaperlessBilling"] = _yes_no(rng.random(n_rows) < 0.59)
+    columns["PaymentMethod"] = _choice(rng, PAYMENT_METHODS, PAYMENT_PROBABILITIES, n_rows)
+
+    monthly_charges = np.round(np.clip(charges + rng.normal(0, 1.5, n_rows), 18.25, 118.75), 2)
+    total_charges = np.round(tenure * monthly_charges * rng.uniform(0.9, 1.1, n_rows), 2)
+    columns["MonthlyCharges"] = monthly_charges
+    columns["TotalCharges"] = np.where(tenure == 0, np.nan, np.maximum(total_charges, monthly_charges))
+    return columns
+
+
+def credit_card_columns(n_rows, rng):
+    """
+    Columnas de tarjetas de crédito con los nombres del dataset original.
+
+    Returns:
+    --------
+    dict : {columna: ndarray}; MINIMUM_PAYMENTS es NaN en ~3.5 % de las cuentas
+    """
+    # Tipo de compras: ninguna, solo al contado, solo a plazos o ambas
+    kind = rng.choice(4, n_rows, p=[0.23, 0.21, 0.25, 0.31])
+    has_purchases = kind > 0
+    purchases = np.where(has_purchases, np.minimum(rng.lognormal(6.6, 1.3, n_rows), CREDIT_CARD_CAPS["PURCHASES"]), 0.0)
+    oneoff_share = np.select([kind == 1, kind == 2], [1.0, 0.0], rng.beta(2, 2, n_rows))
+    oneoff = purchases * oneoff_share
+    installments = purchases - oneoff
+
+    purchases_frequency = _per_month(np.where(has_purchases, rng.beta(1.2, 1.0, n_rows), 0.0))
+    oneoff_frequency = _per_month(np.where(
+        oneoff > 0, purchases_frequency * np.where(kind == 1, 1.0, rng.uniform(0.2, 1.0, n_rows)), 0.0))
+    installments_frequency = _per_month(np.where(
+        installments > 0, purchases_frequency * np.where(kind == 2, 1.0, rng.uniform(0.2, 1.0, n_rows)), 0.0))
+    purchases_trx = np.where(has_purchases, np.maximum(rng.poisson(purchases_frequency * 24), 1), 0)
+
+    has_cash_advance = rng.random(n_rows) < 0.48
+    cash_advance = np.where(has_cash_advance,
+                            np.minimum(rng.lognormal(7.0, 1.2, n_rows), CREDIT_CARD_CAPS["CASH_ADVANCE"]), 0.0)
+    cash_advance_frequency = _per_month(np.where(has_cash_advance, rng.beta(1.0, 4.0, n_rows), 0.0))
+    cash_advance_trx = np.where(has_cash_advance, np.maximum(rng.poisson(cash_advance_frequency * 18), 1), 0)
+
+    credit_limit = np.clip(np.round(rng.lognormal(8.2, 0.75, n_rows) / 50) * 50, 50, 30000)
+    balance = np.where(rng.random(n_rows) < 0.02, 0.0,
+                       np.minimum(rng.lognormal(6.5, 1.4, n_rows),
+                                  np.minimum(credit_limit * 1.3, CREDIT_CARD_CAPS["BALANCE"])))
+    balance_frequency = np.where(rng.random(n_rows) < 0.7, 1.0, rng.beta(2.0, 1.5, n_rows))
+    balance_frequency = np.where(balance > 0, balance_frequency, 0.0)
+    payments = np.where(rng.random(n_rows) < 0.027, 0.0,
+                        np.minimum(rng.lognormal(6.9, 1.2, n_rows), CREDIT_CARD_CAPS["PAYMENTS"]))
+    minimum_payments = np.where(rng.random(n_rows) < 0.035, np.nan,
+                                np.minimum(rng.lognormal(6.1, 1.1, n_rows), CREDIT_CARD_CAPS["MINIMUM_PAYMENTS"]))
+    prc_full_payment = np.where(rng.random(n_rows) < 0.66, 0.0, np.round(rng.beta(0.7, 0.9, n_rows) * 12) / 12)
+    tenure = np.where(rng.random(n_rows) < 0.85, 12, rng.integers(6, 12, n_rows))
+
+    values = {
+        "BALANCE": balance,
+        "BALANCE_FREQUENCY": balance_frequency,
+        "PURCHASES": purchases,
+        "ONEOFF_PURCHASES": oneoff,
+        "INSTALLMENTS_PURCHASES": installments,
+        "CASH_ADVANCE": cash_advance,
+        "PURCHASES_FREQUENCY": purchases_frequency,
+        "ONEOFF_PURCHASES_FREQUENCY": oneoff_frequency,
+        "PURCHASES_INSTALLMENTS_FREQUENCY": installments_frequency,
+        "CASH_ADVANCE_FREQUENCY": cash_advance_frequency,
+        "CASH_ADVANCE_TRX": cash_advance_trx,
+        "PURCHASES_TRX": purchases_trx,
+        "CREDIT_LIMIT": credit_limit,
+        "PAYMENTS": payments,
+        "MINIMUM_PAYMENTS": minimum_payments,
+        "PRC_FULL_PAYMENT": prc_full_payment,
+        "TENURE": tenure,
+    }
+    return {
+        field.column: (values[field.column].astype(np.int64) if field.kind == "int"
+                       else np.round(values[field.column], 6))
+        for field in CREDIT_CARD_SCHEMA.fields
+    }
+
+
+# Conjunto -> (columnas del dataset original, esquema, columna de identificador, prefijo del id)
+DATASETS = {
+    "telco": (telco_columns, TELCO_SCHEMA, "customerID", "SYN-"),
+    "credit_card": (credit_card_columns, CREDIT_CARD_SCHEMA, "CUST_ID", "C"),
+}
+
+
+def _to_api_style(columns, schema):
+    """Renombra a los nombres del API, traduce al español y rellena los faltantes como el API."""
+    import pandas as pd
+
+    result = {}
+    for field in schema.fields:
+        values = columns[field.column]
+        if field.labels:
+            # Traducir solo los valores distintos
+            spanish = {model_value: label for label, model_value in field.labels.items()}
+            codes, uniques = pd.factorize(values)
+            values = _labels([spanish[value] for value in uniques], codes)
+        elif np.issubdtype(values.dtype, np.floating) and np.isnan(values).any():
+            # El API no admite vacíos: TotalCharges toma el valor por defecto y
+            # MINIMUM_PAYMENTS la mediana del bloque. Es solo un valor verosímil para
+            # el registro; al servir, los vacíos se imputan con la media del escalador
+            # de K-Means (ver predictors.prepare_credit_card_frame)
+            fill = field.default if field.default is not None else float(np.nanmedian(values))
+            values = np.where(np.isnan(values), fill, values)
+        result[field.name] = values
+    return result
+
+
+def synthetic_frame(dataset, n_rows, seed=DEFAULT_SEED, style="api", start=0):
+    """
+    Genera un bloque de datos sintéticos.
+
+    Parameters:
+    -----------
+    dataset : str
+        'telco' o 'credit_card'
+    n_rows : int
+        Filas del bloque
+    seed : int or sequence of int
+        Semilla del generador aleatorio
+    style : str
+        'api' (nombres del API, etiquetas en español) o 'dataset' (CSV original)
+    start : int
+        Posición de la primera fila, para numerar los identificadores en el estilo 'dataset'
+
+    Returns:
+    --------
+    DataFrame
+    """
+    import pandas as pd
+
+    if dataset not in DATASETS:
+        raise ValueError(f"Conjunto de datos no soportado: {dataset}")
+    if style not in STYLES:
+        raise ValueError(f"Estilo no soportado: {style}")
+    generate, schema, id_column, id_prefix = DATASETS[dataset]
+    columns = generate(n_rows, np.random.default_rng(seed))
+    if style == "api":
+        return pd.DataFrame(_to_api_style(columns, schema))
+
+    ids = np.char.add(id_prefix, np.char.zfill(np.arange(start, start + n_rows).astype(str), 9))
+    return pd.DataFrame({id_column: ids.astype(object), **columns})
+
+
+def synthetic_records(dataset, n_rows, seed=DEFAULT_SEED):
+    """
+    Registros sintéticos con los nombres del API, listos para enviar como JSON.
+
+    Returns:
+    --------
+    list of dict
+    """
+    return synthetic_frame(dataset, n_rows, seed).to_dict(orient="records")
+
+
+def iter_synthetic_chunks(dataset, n_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED, style="api"):
+    """
+    Genera ``n_rows`` filas en bloques de ``chunk_size``.
+
+    El bloque i usa la semilla ``(seed, i)``: cada bloque es reproducible por sí
+    solo, sin depender de los anteriores.
+
+    Yields:
+    -------
+    DataFrame : Un bloque de datos sintéticos
+    """
+    for index, start in enumerate(range(0, n_rows, chunk_size)):
+        yield synthetic_frame(dataset, min(chunk_size, n_rows - start), (seed, index), style, start)
+
+
+def detect_output_format(filename):
+    """
+    Returns:
+    --------
+    str : 'parquet' para .parquet, 'ndjson' para .ndjson/.jsonl/.json y 'csv' en cualquier otro caso
+    """
+    name = (filename or "").lower()
+    if name.endswith(".parquet"):
+        return "parquet"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def write_parquet(chunks, path):
+    """
+    Escribe los bloques en un archivo Parquet (un row group por bloque).
+
+    Returns:
+    --------
+    int : Filas escritas
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("La salida Parquet requiere pyarrow (pip install pyarrow)") from exc
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_text(chunks, output, output_format):
+    """
+    Escribe los bloques como CSV (encabezado una sola vez) o NDJSON en un archivo abierto.
+
+    Returns:
+    --------
+    int : Filas escritas
+    """
+    if output_format not in ("csv", "ndjson"):
+        raise ValueError(f"Formato de texto no soportado: {output_format}")
+
+    rows = 0
+    for chunk in chunks:
+        if output_format == "csv":
+            chunk.to_csv(output, index=False, header=rows == 0)
+        elif len(chunk):
+            output.write(chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+        rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos de Telco y tarjetas de crédito")
+    parser.add_argument("dataset", choices=sorted(DATASETS), help="Conjunto de datos")
+    parser.add_argument("rows", type=int, help="Número de filas")
+    parser.add_argument("-o", "--output", default="-", help="Archivo de salida ('-' para stdout)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Por defecto se deduce de la extensión")
+    parser.add_argument("--style", choices=STYLES, default="api",
+                        help="'api': nombres del API y etiquetas en español; 'dataset': como el CSV original")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    output_format = args.format or detect_output_format(args.output)
+    if output_format == "parquet" and args.output == "-":
+        parser.error("La salida Parquet necesita un archivo (-o datos.parquet)")
+
+    start = time.perf_counter()
+    chunks = iter_synthetic_chunks(args.dataset, args.rows, args.chunk_size, args.seed, args.style)
+    if output_format == "parquet":
+        rows = write_parquet(chunks, args.output)
+    elif args.output == "-":
+        rows = write_text(chunks, sys.stdout, output_format)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as output:
+            rows = write_text(chunks, output, output_format)
+
+    elapsed = time.perf_counter() - start
+    print(f"{rows} filas en {elapsed:.2f} s ({rows / elapsed if elapsed > 0 else 0:,.0f} filas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Carga y calentamiento de los modelos al arrancar el API.
+
+Para cada modelo se carga su archivo (o los pesos compartidos) y se hacen
+``WARMUP_ITERATIONS`` predicciones de prueba con un registro de ejemplo: así
+la primera petición real no paga la deserialización, los imports diferidos ni
+el primer uso de NumPy/SciPy. El estado de cada modelo se expone en
+``/health/ready``:
+
+- ``pending`` → ``loading`` → ``warming`` → ``ready``
+- ``failed`` si el modelo no existe o la predicción de prueba falla
+
+Junto al estado se reportan el tiempo de carga y la latencia de las predicciones
+de prueba (primera, p50 y p99), para que el balanceador solo envíe tráfico
+cuando la latencia ya es estable.
+
+Configuración por variables de entorno:
+
+- ``WARMUP_ITERATIONS``: predicciones de prueba por modelo (por defecto 20)
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+from .model_loader import MODEL_FILES, get_model
+from .neighbors import KNN_INDEX, get_indexed_classifier
+from .shared_weights import SHARED_WEIGHTS, attach_shared_weights
+
+
+WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "20"))
+
+# Registros de ejemplo con las etiquetas del formulario (pasan por prepare_*_input)
+SAMPLE_TELCO_FORM = (
+    "Femenino", "No", "Sí", "No", 24, "Sí", "No", "Fibra óptica", "No", "Sí", "No", "No",
+    "Sí", "No", "Mensual", "Sí", "Cheque electrónico", 79.85, 1916.4,
+)
+SAMPLE_CREDIT_CARD_FORM = (
+    1564.47, 0.88, 1003.2, 592.44, 411.07, 978.87, 0.49, 0.2, 0.36, 0.14, 3, 15,
+    4494.45, 1733.14, 864.21, 0.15, 12,
+)
+
+# Modelo -> función de predictors.py para un registro y preparación de su ejemplo
+WARMUP_PREDICTIONS = {
+    "logistic": ("predict_logistic_regression", "prepare_telco_input", SAMPLE_TELCO_FORM),
+    "knn": ("predict_knn", "prepare_telco_input", SAMPLE_TELCO_FORM),
+    "kmeans": ("predict_kmeans", "prepare_credit_card_input", SAMPLE_CREDIT_CARD_FORM),
+}
+
+
+class ReadinessTracker:
+    """Estado de carga y calentamiento por modelo, consultable desde otros hilos."""
+
+    def __init__(self, models=tuple(WARMUP_PREDICTIONS)):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.finished_at = None
+        self.models = {name: {'state': 'pending'} for name in models}
+
+    def update(self, name, **fields):
+        with self._lock:
+            self.models[name].update(fields)
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def is_ready(self):
+        with self._lock:
+            return all(entry['state'] == 'ready' for entry in self.models.values())
+
+    def snapshot(self):
+        """
+        Returns:
+        --------
+        dict : {'ready', 'started_at', 'finished_at', 'models': {modelo: estado}}
+        """
+        with self._lock:
+            models = {name: dict(entry) for name, entry in self.models.items()}
+        return {
+            'ready': all(entry['state'] == 'ready' for entry in models.values()),
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'models': models,
+        }
+
+
+def load_model_files(name):
+    """
+    Carga en el registro los archivos de un modelo (y el índice KNN si se configuró).
+
+    Raises:
+    -------
+    FileNotFoundError : si falta alguno de sus archivos
+    """
+    for filename in MODEL_FILES[name]:
+        if get_model(filename) is None:
+            raise FileNotFoundError(f"No se encontró el archivo {filename}")
+    if name == "knn" and KNN_INDEX != "sklearn":
+        # Construir el índice de vecinos antes de recibir tráfico
+        get_indexed_classifier(get_model("knn_model.pkl"))
+
+
+def warm_up_predictions(name, iterations=WARMUP_ITERATIONS):
+    """
+    Ejecuta predicciones de prueba con el registro de ejemplo del modelo.
+
+    Returns:
+    --------
+    dict : Latencia de la primera predicción, p50 y p99 (ms) y número de iteraciones
+    """
+    from . import predictors
+
+    predict_name, prepare_name, sample = WARMUP_PREDICTIONS[name]
+    predict = getattr(predictors, predict_name)
+    prepare = getattr(predictors, prepare_name)
+
+    latencies = []
+    with metrics.paused():
+        for _ in range(max(1, iterations)):
+            start = time.perf_counter()
+            predict(prepare(*sample))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'iterations': len(latencies),
+        'first_ms': latencies[0],
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def run_startup(tracker, iterations=WARMUP_ITERATIONS):
+    """
+    Carga y calienta todos los modelos del ``tracker``, uno tras otro.
+    Pensado para ejecutarse en un hilo de fondo al arrancar el API.
+    """
+    try:
+        shared_seconds = None
+        if SHARED_WEIGHTS:
+            # Conectarse a los pesos compartidos entre workers en lugar de
+            # deserializar los pickles en cada proceso (ver shared_weights.py)
+            start = time.perf_counter()
+            try:
+                attach_shared_weights()
+            except Exception as exc:
+                print(f"Error al conectar los pesos compartidos: {exc}")
+                for name in tracker.models:
+                    tracker.update(name, state='failed', error=str(exc))
+                return
+            shared_seconds = time.perf_counter() - start
+
+        for name in tracker.models:
+            tracker.update(name, state='loading')
+            try:
+                start = time.perf_counter()
+                if shared_seconds is None:
+                    load_model_files(name)
+                load_seconds = shared_seconds if shared_seconds is not None else time.perf_counter() - start
+
+                tracker.update(name, state='warming', load_seconds=load_seconds)
+                tracker.update(name, state='ready', warmup=warm_up_predictions(name, iterations))
+            except Exception as exc:
+                print(f"Error al preparar el modelo {name}: {exc}")
+                tracker.update(name, state='failed', error=str(exc))
+    finally:
+        tracker.finish()
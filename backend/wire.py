@@ -0,0 +1,263 @@
+"""
+Serialización rápida de respuestas JSON y formato compacto de lotes.
+
+- ``FastJSONResponse``: respuesta JSON que serializa con orjson si está
+  instalado. Los arrays de NumPy numéricos se escriben directamente desde su
+  memoria, sin convertir cada elemento a ``float`` de Python. Sin orjson se usa
+  ``json`` de la biblioteca estándar (los arrays pasan por ``tolist()``).
+- Formato compacto de lotes (``POST /predict/<modelo>/compact``): los nombres
+  de las columnas van una sola vez y cada fila es un array de valores.
+
+      petición:  {"columns": ["gender", "senior_citizen", ...],
+                  "rows": [["Femenino", "No", ...], ...]}
+      respuesta: {"count": 2, "columns": {"prediction": [0, 1],
+                  "probability_churn": [0.12, 0.83], ...}}
+
+  La respuesta va por columnas para que cada array de resultados se serialice
+  de una vez. Las columnas de la petición pueden ir en cualquier orden.
+
+El módulo no importa NumPy al cargarse, para no retrasar el arranque del API.
+
+Benchmark de los formatos frente al actual (lista de objetos con el
+codificador por defecto de FastAPI), desde la raíz del proyecto:
+
+    python -m backend.wire --rows 100 10000
+"""
+
+import argparse
+import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from fastapi.responses import JSONResponse
+
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+class CompactFormatError(ValueError):
+    """El cuerpo de la petición no sigue el formato compacto o sus valores no son válidos."""
+
+
+def _default(value):
+    """Tipos que el serializador no escribe por sí mismo (arrays de texto, escalares de NumPy)."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(content):
+    """Serializa ``content`` a JSON en UTF-8 (bytes)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+def loads(body):
+    """Decodifica un cuerpo JSON (bytes o str)."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    ``JSONResponse`` que serializa con ``dumps``. Devolverla desde un endpoint
+    evita además el paso de ``jsonable_encoder`` de FastAPI sobre cada valor.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+def compact_response(columns):
+    """
+    Respuesta del formato compacto.
+
+    Parameters:
+    -----------
+    columns : dict
+        {nombre: array de NumPy}, todas con el mismo número de filas
+
+    Returns:
+    --------
+    FastJSONResponse : {"count": n, "columns": {nombre: [...]}}
+    """
+    count = len(next(iter(columns.values()), ()))
+    return FastJSONResponse({"count": count, "columns": columns})
+
+
+def parse_compact_batch(body, schema):
+    """
+    Lee un lote en formato compacto y lo valida contra ``schema``.
+
+    Parameters:
+    -----------
+    body : bytes
+        Cuerpo de la petición
+    schema : FeatureSchema
+
+    Returns:
+    --------
+    tuple : (número de filas, {nombre del API: valores}) listo para ``schema.map_columns``;
+        los numéricos ya como arrays de NumPy
+
+    Raises:
+    -------
+    CompactFormatError : si el JSON no es válido, faltan o sobran columnas,
+        alguna fila tiene otra longitud o algún valor no es del tipo del campo
+    """
+    import numpy as np
+
+    try:
+        payload = loads(body)
+    except ValueError as exc:
+        raise CompactFormatError(f"El cuerpo no es JSON válido: {exc}") from exc
+    if not isinstance(payload, dict) or not isinstance(payload.get("columns"), list) \
+            or not isinstance(payload.get("rows"), list):
+        raise CompactFormatError('Se esperaba {"columns": [...], "rows": [[...], ...]}')
+
+    names, rows = payload["columns"], payload["rows"]
+    missing = [name for name in schema.names if name not in names]
+    unknown = [name for name in names if name not in schema.names]
+    if missing or unknown or len(names) != len(set(names)):
+        raise CompactFormatError(
+            f"Columnas de {schema.label} no válidas (faltan: {missing}, desconocidas: {unknown})"
+        )
+
+    width = len(names)
+    for position, row in enumerate(rows):
+        if not isinstance(row, list) or len(row) != width:
+            raise CompactFormatError(f"La fila {position} debe ser una lista de {width} valores")
+
+    # Transponer de filas a columnas una sola vez
+    transposed = list(zip(*rows)) if rows else [()] * width
+    columns = {}
+    for field in schema.fields:
+        values = transposed[names.index(field.name)]
+        if field.kind in ("int", "float"):
+            try:
+                array = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError) as exc:
+                raise CompactFormatError(f"La columna {field.name} debe ser numérica") from exc
+            if np.isnan(array).any():
+                raise CompactFormatError(f"La columna {field.name} tiene valores vacíos")
+            if field.kind == "int":
+                if not np.array_equal(array, np.trunc(array)):
+                    raise CompactFormatError(f"La columna {field.name} debe tener números enteros")
+                array = array.astype(np.int64)
+            columns[field.name] = array
+        else:
+            # Validar solo los valores distintos
+            try:
+                distinct = set(values)
+            except TypeError as exc:
+                raise CompactFormatError(f"La columna {field.name} debe contener textos") from exc
+            if not all(isinstance(value, str) for value in distinct):
+                raise CompactFormatError(f"La columna {field.name} debe contener textos")
+            columns[field.name] = values
+    return len(rows), columns
+
+
+def to_compact_request(records, schema):
+    """Convierte registros con los nombres del API al cuerpo del formato compacto (dict)."""
+    return {
+        "columns": list(schema.names),
+        "rows": [[record[name] for name in schema.names] for record in records],
+    }
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+# Modelo -> (conjunto sintético, función por registros, función por columnas)
+BENCH_MODELS = {
+    "logistic": ("telco", "predict_logistic_regression_batch", "predict_logistic_regression_columns"),
+    "knn": ("telco", "predict_knn_batch", "predict_knn_columns"),
+    "kmeans": ("credit_card", "predict_kmeans_batch", "predict_kmeans_columns"),
+}
+
+
+def _best_of(fn, repeat):
+    """Mejor tiempo de ``repeat`` llamadas (en ms) y el resultado de la última."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_formats(model_name, rows, repeat=5):
+    """
+    Compara, para un lote de ``rows`` registros, el formato actual (lista de
+    objetos, validación con Pydantic y ``jsonable_encoder`` + ``JSONResponse``),
+    la misma lista con ``FastJSONResponse`` y el formato compacto.
+
+    Returns:
+    --------
+    dict : {formato: {'request_bytes', 'parse_ms', 'response_bytes', 'serialize_ms'}}
+    """
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from . import predictors
+    from .api import CreditCardRequest, TelcoRequest
+    from .synthetic import synthetic_records
+
+    dataset, batch_name, columns_name = BENCH_MODELS[model_name]
+    schema = predictors.TELCO_SCHEMA if dataset == "telco" else predictors.CREDIT_CARD_SCHEMA
+    adapter = TypeAdapter(list[TelcoRequest if dataset == "telco" else CreditCardRequest])
+    records = synthetic_records(dataset, rows)
+
+    records_body = json.dumps(records, ensure_ascii=False).encode("utf-8")
+    compact_body = json.dumps(to_compact_request(records, schema), ensure_ascii=False).encode("utf-8")
+
+    parse_records_ms, requests = _best_of(
+        lambda: schema.map_objects(adapter.validate_python(json.loads(records_body))), repeat)
+    parse_compact_ms, (_, columns) = _best_of(
+        lambda: parse_compact_batch(compact_body, schema), repeat)
+
+    # Mismos resultados en las tres variantes; solo se mide la serialización
+    batch_results = getattr(predictors, batch_name)(requests)
+    column_results = getattr(predictors, columns_name)(schema.map_columns(columns))
+
+    default_ms, default_body = _best_of(lambda: JSONResponse(jsonable_encoder(batch_results)).body, repeat)
+    fast_ms, fast_body = _best_of(lambda: FastJSONResponse(batch_results).body, repeat)
+    compact_ms, compact_out = _best_of(lambda: compact_response(column_results).body, repeat)
+
+    return {
+        "actual": {'request_bytes': len(records_body), 'parse_ms': parse_records_ms,
+                   'response_bytes': len(default_body), 'serialize_ms': default_ms},
+        "actual+fast": {'request_bytes': len(records_body), 'parse_ms': parse_records_ms,
+                        'response_bytes': len(fast_body), 'serialize_ms': fast_ms},
+        "compacto": {'request_bytes': len(compact_body), 'parse_ms': parse_compact_ms,
+                     'response_bytes': len(compact_out), 'serialize_ms': compact_ms},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el formato JSON actual con el compacto")
+    parser.add_argument("--models", nargs="+", choices=sorted(BENCH_MODELS), default=sorted(BENCH_MODELS))
+    parser.add_argument("--rows", nargs="+", type=int, default=[100, 10000])
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medida (se toma la mejor)")
+    args = parser.parse_args(argv)
+
+    print(f"Serializador: {'orjson ' + orjson.__version__ if orjson is not None else 'json (sin orjson)'}")
+    print(f"{'caso':28s} {'formato':12s} {'petición':>11s} {'lectura':>11s} {'respuesta':>11s} {'escritura':>11s}")
+    for model_name in args.models:
+        for rows in args.rows:
+            for variant, result in bench_formats(model_name, rows, args.repeat).items():
+                print(f"{model_name + '/rows=' + str(rows):28s} {variant:12s} "
+                      f"{result['request_bytes'] / 1024:8.0f} KB {result['parse_ms']:8.2f} ms "
+                      f"{result['response_bytes'] / 1024:8.0f} KB {result['serialize_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
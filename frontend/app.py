@@ -5,18 +5,12 @@ Interfaz de usuario moderna y atractiva para probar los modelos de Machine Learn
 
 import os
 
-import requests
 import streamlit as st
 import streamlit.components.v1 as components
-import plotly.graph_objects as go
 
-from backend.predictors import (
-    predict_logistic_regression,
-    predict_knn,
-    predict_kmeans,
-    prepare_telco_input,
-    prepare_credit_card_input,
-)
+# requests, plotly y el backend local (pandas, modelos) se importan al primer
+# uso: Streamlit los mantiene en memoria entre ejecuciones del script, así que
+# solo la primera predicción paga ese coste y no el arranque de la página
 
 # ============================================
 # CONFIGURACIÓN DE LA PÁGINA
@@ -404,6 +398,14 @@ st.markdown("""
 API_BASE_URL = os.getenv("API_BASE_URL", "https://machinelearning-ucw1.onrender.com")
 
 
+@st.cache_resource
+def get_backend_client():
+    """Cliente HTTP compartido entre ejecuciones y sesiones (pool de conexiones y circuit breaker)."""
+    from backend_client import BackendClient
+
+    return BackendClient(API_BASE_URL)
+
+
 def call_backend(
     endpoint: str,
     payload: dict,
@@ -412,13 +414,18 @@ def call_backend(
     show_warning: bool = False,
 ):
     """Helper para invocar el backend vía HTTP y usar un fallback local si falla."""
-    base_url = (API_BASE_URL.rstrip("/") if API_BASE_URL else None)
-    if base_url:
-        url = f"{base_url}{endpoint}"
+    client = get_backend_client()
+    if client.base_url:
+        import requests
+        from backend_client import BackendUnavailable
+
         try:
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            return client.post(endpoint, payload)
+        except BackendUnavailable as exc:
+            # El API está marcado como caído: directo al fallback sin esperar
+            if not fallback:
+                st.error(f"❌ {exc}")
+                return None
         except requests.exceptions.RequestException as exc:
             if fallback:
                 if show_warning:
@@ -432,7 +439,7 @@ def call_backend(
 
     if fallback:
         try:
-            return fallback()
+            return client.run_local(fallback)
         except FileNotFoundError as exc:
             st.error(f"❌ {fallback_label.capitalize()}: {exc}")
         except Exception as exc:  # pragma: no cover
@@ -443,62 +450,72 @@ def call_backend(
     return None
 
 
+# Entradas de la caché de predicciones locales (compartida por todas las sesiones)
+LOCAL_RESULT_CACHE_SIZE = int(os.getenv("LOCAL_RESULT_CACHE_SIZE", "1000"))
+
+
+@st.cache_resource(show_spinner="Cargando el modelo local…")
+def get_local_model(model_name: str):
+    """
+    Carga y calienta una sola vez por proceso un modelo del fallback local
+    ('logistic', 'knn' o 'kmeans'); todas las sesiones lo comparten.
+    """
+    from backend.warmup import load_model_files, warm_up_predictions
+
+    load_model_files(model_name)
+    return warm_up_predictions(model_name, iterations=1)
+
+
+@st.cache_resource
+def get_local_result_cache():
+    """Resultados de predicciones locales por formulario, invalidados si cambia el modelo en disco."""
+    from backend.result_cache import RESULT_CACHE_TTL, ResultCache
+
+    return ResultCache(max_size=LOCAL_RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+
+def _predict_locally(model_name: str, predict_name: str, formatted: dict, models=None):
+    """
+    Predicción local memoizada: un formulario idéntico no vuelve a pasar por el
+    modelo. ``models`` son los modelos a cargar si no es solo ``model_name``.
+    """
+    for name in models or (model_name,):
+        get_local_model(name)
+    cache = get_local_result_cache()
+    key = cache.key(model_name, formatted)
+    result = cache.get(key)
+    if result is None:
+        from backend import predictors
+
+        result = getattr(predictors, predict_name)(formatted)
+        cache.put(key, result)
+    return result
+
+
 def _format_telco_payload(form_data: dict):
     """Convierte el payload del formulario en el formato requerido por los modelos Telco."""
-    return prepare_telco_input(
-        form_data["gender"],
-        form_data["senior_citizen"],
-        form_data["partner"],
-        form_data["dependents"],
-        form_data["tenure"],
-        form_data["phone_service"],
-        form_data["multiple_lines"],
-        form_data["internet_service"],
-        form_data["online_security"],
-        form_data["online_backup"],
-        form_data["device_protection"],
-        form_data["tech_support"],
-        form_data["streaming_tv"],
-        form_data["streaming_movies"],
-        form_data["contract"],
-        form_data["paperless_billing"],
-        form_data["payment_method"],
-        form_data["monthly_charges"],
-        form_data["total_charges"],
-    )
+    from backend.feature_schema import TELCO_SCHEMA
+
+    return TELCO_SCHEMA.map_record(form_data)
 
 
 def _predict_logistic_locally(form_data: dict):
-    formatted = _format_telco_payload(form_data)
-    return predict_logistic_regression(formatted)
+    return _predict_locally("logistic", "predict_logistic_regression", _format_telco_payload(form_data))
 
 
 def _predict_knn_locally(form_data: dict):
-    formatted = _format_telco_payload(form_data)
-    return predict_knn(formatted)
+    return _predict_locally("knn", "predict_knn", _format_telco_payload(form_data))
+
+
+def _predict_ensemble_locally(form_data: dict):
+    return _predict_locally("ensemble", "predict_churn_ensemble", _format_telco_payload(form_data),
+                            models=("logistic", "knn"))
 
 
 def _predict_kmeans_locally(form_data: dict):
-    formatted = prepare_credit_card_input(
-        form_data["BALANCE"],
-        form_data["BALANCE_FREQUENCY"],
-        form_data["PURCHASES"],
-        form_data["ONEOFF_PURCHASES"],
-        form_data["INSTALLMENTS_PURCHASES"],
-        form_data["CASH_ADVANCE"],
-        form_data["PURCHASES_FREQUENCY"],
-        form_data["ONEOFF_PURCHASES_FREQUENCY"],
-        form_data["PURCHASES_INSTALLMENTS_FREQUENCY"],
-        form_data["CASH_ADVANCE_FREQUENCY"],
-        form_data["CASH_ADVANCE_TRX"],
-        form_data["PURCHASES_TRX"],
-        form_data["CREDIT_LIMIT"],
-        form_data["PAYMENTS"],
-        form_data["MINIMUM_PAYMENTS"],
-        form_data["PRC_FULL_PAYMENT"],
-        form_data["TENURE"],
-    )
-    return predict_kmeans(formatted)
+    from backend.feature_schema import CREDIT_CARD_SCHEMA
+
+    return _predict_locally("kmeans", "predict_kmeans", CREDIT_CARD_SCHEMA.map_record(form_data))
 
 
 # ============================================
@@ -887,7 +904,7 @@ st.sidebar.markdown("""
 
 model_choice = st.sidebar.radio(
     "Selecciona el modelo a probar:",
-    ["Regresión Logística", "K-Nearest Neighbors (KNN)", "K-Means Clustering"],
+    ["Regresión Logística", "K-Nearest Neighbors (KNN)", "Comparar Modelos (Logística vs KNN)", "K-Means Clustering"],
     label_visibility="collapsed"
 )
 
@@ -908,16 +925,34 @@ st.sidebar.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Estado de la conexión con el backend (solo si ya hubo alguna predicción)
+_backend_status = get_backend_client().status()
+if _backend_status["latency"]:
+    with st.sidebar.expander("🔌 Conexión con el backend"):
+        breaker_labels = {"closed": "disponible", "open": "no disponible", "half_open": "reintentando"}
+        st.caption(f"Backend remoto: {breaker_labels[_backend_status['breaker']['state']]}")
+        for source, label in (("remote", "Remoto"), ("local", "Local")):
+            latency = _backend_status["latency"].get(source)
+            if latency:
+                st.caption(
+                    f"{label}: {latency['calls']} llamadas, {latency['errors']} errores · "
+                    f"p50 {latency['p50_ms']:.0f} ms · p95 {latency['p95_ms']:.0f} ms"
+                )
+
 # ============================================
 # MODELOS SUPERVISADOS (TELCO CHURN/ABANDONO)
 # ============================================
-if model_choice in ["Regresión Logística", "K-Nearest Neighbors (KNN)"]:
+if model_choice in ["Regresión Logística", "K-Nearest Neighbors (KNN)", "Comparar Modelos (Logística vs KNN)"]:
     
     # Header del modelo
     if model_choice == "Regresión Logística":
         icon = "📈"
         color = "#667eea"
         description = "Predice la probabilidad de que un cliente abandone el servicio"
+    elif model_choice == "Comparar Modelos (Logística vs KNN)":
+        icon = "⚖️"
+        color = "#5a67d8"
+        description = "Evalúa ambos modelos con una sola petición y combina sus probabilidades"
     else:
         icon = "🔍"
         color = "#764ba2"
@@ -1012,8 +1047,12 @@ if model_choice in ["Regresión Logística", "K-Nearest Neighbors (KNN)"]:
             "total_charges": total_charges,
         }
         
-        endpoint = "/predict/logistic" if model_choice == "Regresión Logística" else "/predict/knn"
-        fallback_fn = _predict_logistic_locally if model_choice == "Regresión Logística" else _predict_knn_locally
+        # La comparación usa /predict/ensemble: los dos modelos en una sola petición
+        endpoint, fallback_fn = {
+            "Regresión Logística": ("/predict/logistic", _predict_logistic_locally),
+            "K-Nearest Neighbors (KNN)": ("/predict/knn", _predict_knn_locally),
+            "Comparar Modelos (Logística vs KNN)": ("/predict/ensemble", _predict_ensemble_locally),
+        }[model_choice]
         
         with st.spinner("Enviando datos al backend..."):
             result = call_backend(
@@ -1067,6 +1106,8 @@ if model_choice in ["Regresión Logística", "K-Nearest Neighbors (KNN)"]:
                 """, unsafe_allow_html=True)
             
             # Gráfico de barras de probabilidades
+            import plotly.graph_objects as go
+
             fig = go.Figure()
             fig.add_trace(go.Bar(
                 x=['Churn/Abandono', 'Sin Churn/Abandono'],
@@ -1110,6 +1151,88 @@ if model_choice in ["Regresión Logística", "K-Nearest Neighbors (KNN)"]:
                 </div>
                 """, unsafe_allow_html=True)
         
+        elif model_choice == "Comparar Modelos (Logística vs KNN)":
+            st.markdown("---")
+            st.markdown("""
+            <div style="text-align: center; margin: 2rem 0;">
+                <h2 style="color: #2c3e50;">📊 Comparación de Modelos</h2>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            logistic_result = result['logistic']
+            knn_result = result['knn']
+            ensemble_result = result['ensemble']
+            
+            col_res1, col_res2, col_res3 = st.columns(3)
+            cards = (
+                (col_res1, "📈 Regresión Logística", "#667eea", logistic_result, "Probabilidad de churn"),
+                (col_res2, "🔍 KNN", "#764ba2", knn_result, "Vecinos con churn"),
+                (col_res3, "⚖️ Combinado", "#5a67d8", ensemble_result, "Probabilidad combinada"),
+            )
+            for column, title, title_color, model_result, caption in cards:
+                with column:
+                    st.markdown(f"""
+                    <div class="metric-card" style="text-align: center;">
+                        <h3 style="margin: 0; color: {title_color}; font-size: 1.3rem;">{title}</h3>
+                        <h2 style="margin: 0.5rem 0; color: {'#e74c3c' if model_result['prediction'] == 1 else '#27ae60'};">
+                            {model_result['classification']}
+                        </h2>
+                        <p style="margin: 0; color: #6c757d;">{caption}: {model_result['probability_churn'] * 100:.1f}%</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            
+            # Probabilidad de churn de cada modelo
+            import plotly.graph_objects as go
+
+            probabilities = [
+                logistic_result['probability_churn'] * 100,
+                knn_result['probability_churn'] * 100,
+                ensemble_result['probability_churn'] * 100,
+            ]
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                x=['Regresión Logística', 'KNN (vecinos)', 'Combinado'],
+                y=probabilities,
+                marker_color=['#667eea', '#764ba2', '#5a67d8'],
+                text=[f'{value:.1f}%' for value in probabilities],
+                textposition='auto',
+            ))
+            fig.update_layout(
+                title="Probabilidad de Churn/Abandono por Modelo",
+                yaxis_title="Probabilidad (%)",
+                yaxis_range=[0, 100],
+                height=400,
+                showlegend=False,
+                template="plotly_white"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(
+                f"La probabilidad combinada pondera la Regresión Logística con "
+                f"{ensemble_result['logistic_weight']:.0%} y la fracción de vecinos de KNN con "
+                f"{1 - ensemble_result['logistic_weight']:.0%}."
+            )
+            
+            # Interpretación
+            if result['agreement']:
+                st.markdown(f"""
+                <div class="success-box">
+                    <h4 style="margin: 0;">✅ Los modelos coinciden</h4>
+                    <p style="margin: 0.5rem 0 0 0;">
+                        Ambos modelos predicen {'Churn/Abandono' if logistic_result['prediction'] == 1 else 'No Churn/Abandono'} para este cliente.
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div class="warning-box">
+                    <h4 style="margin: 0;">⚠️ Los modelos no coinciden</h4>
+                    <p style="margin: 0.5rem 0 0 0;">
+                        Regresión Logística: "{logistic_result['classification']}" · KNN: "{knn_result['classification']}".
+                        La predicción combinada es "{ensemble_result['classification']}"; conviene revisar el caso.
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+        
         else:  # KNN
             # Mostrar resultados
             st.markdown("---")
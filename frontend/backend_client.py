@@ -0,0 +1,333 @@
+"""
+Cliente HTTP del frontend para el API de predicción.
+
+- Una sola ``requests.Session`` con pool de conexiones (keep-alive); la app la
+  guarda con ``st.cache_resource``, así que se reutiliza entre ejecuciones del
+  script y entre sesiones
+- Tiempos de espera separados para conectar y para leer la respuesta, y un
+  plazo total por llamada (``API_DEADLINE``) que incluye los reintentos y sus
+  esperas: la interfaz nunca queda bloqueada más de ese tiempo
+- Reintentos acotados con espera exponencial y jitter, solo ante errores de
+  conexión y respuestas 429/502/503/504 (las predicciones no tienen efectos
+  secundarios, así que repetirlas es seguro). Un tiempo de lectura agotado no
+  se reintenta: el API puede seguir calculando la predicción y repetirla solo
+  añade carga a un servidor ya lento
+- Circuit breaker: tras ``API_BREAKER_FAILURES`` fallos seguidos el API se da
+  por caído durante ``API_BREAKER_COOLDOWN`` segundos y las llamadas van
+  directo al fallback local; pasado ese tiempo se deja pasar una petición de
+  prueba
+- Registro de la latencia de las llamadas remotas y de las locales
+
+Configuración por variables de entorno:
+
+- ``API_CONNECT_TIMEOUT``: segundos para conectar (por defecto 3.05)
+- ``API_READ_TIMEOUT``: segundos para recibir la respuesta (por defecto 15)
+- ``API_DEADLINE``: segundos máximos por llamada, reintentos incluidos (por defecto
+  20, por encima de conectar + leer; si es menor, acota también esos dos tiempos)
+- ``API_RETRIES``: reintentos tras el primer intento (por defecto 2)
+- ``API_RETRY_BACKOFF``: espera base entre reintentos en segundos (por defecto 0.25)
+- ``API_POOL_SIZE``: conexiones que se mantienen abiertas (por defecto 10)
+- ``API_BREAKER_FAILURES``: fallos seguidos que abren el circuito (por defecto 3)
+- ``API_BREAKER_COOLDOWN``: segundos con el circuito abierto (por defecto 30)
+
+``requests`` se importa al primer uso, para no retrasar el arranque de la app.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "15"))
+API_DEADLINE = float(os.getenv("API_DEADLINE", "20"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.25"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+API_BREAKER_FAILURES = int(os.getenv("API_BREAKER_FAILURES", "3"))
+API_BREAKER_COOLDOWN = float(os.getenv("API_BREAKER_COOLDOWN", "30"))
+
+# Respuestas que indican un problema pasajero del servidor o de la red
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Espera máxima entre dos intentos (segundos)
+MAX_RETRY_WAIT = 2.0
+
+
+class BackendUnavailable(Exception):
+    """El circuito está abierto: el API se considera caído y no se llama."""
+
+
+class CircuitBreaker:
+    """Circuit breaker de fallos consecutivos (closed → open → half_open → closed)."""
+
+    def __init__(self, failure_threshold=API_BREAKER_FAILURES, cooldown=API_BREAKER_COOLDOWN):
+        """
+        Parameters:
+        -----------
+        failure_threshold : int
+            Fallos seguidos que abren el circuito
+        cooldown : float
+            Segundos que el circuito permanece abierto antes de dejar pasar una prueba
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        # Hilo que hace la llamada de prueba
+        self._probe_thread = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return "open"
+            return "half_open"
+
+    def allow(self):
+        """
+        Indica si se puede llamar al API. Con el circuito medio abierto solo se
+        deja pasar una llamada de prueba a la vez.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            self._probe_thread = threading.get_ident()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                # Abrir (o volver a abrir tras una prueba fallida)
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """
+        Libera la llamada de prueba de este hilo si terminó sin registrar éxito
+        ni fallo (ej. un error al preparar la petición); si no, nunca se dejaría
+        pasar otra.
+        """
+        with self._lock:
+            if self._probe_thread == threading.get_ident():
+                self._probing = False
+
+    def snapshot(self):
+        state = self.state
+        with self._lock:
+            remaining = None
+            if state == "open":
+                remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            return {'state': state, 'consecutive_failures': self._failures, 'retry_in_seconds': remaining}
+
+
+class LatencyRecorder:
+    """Latencias recientes por origen ('remote' / 'local') y conteo de llamadas y errores."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._calls = {}
+        self._errors = {}
+
+    def record(self, source, seconds, ok=True):
+        with self._lock:
+            self._latencies.setdefault(source, deque(maxlen=self.window)).append(seconds * 1000)
+            self._calls[source] = self._calls.get(source, 0) + 1
+            if not ok:
+                self._errors[source] = self._errors.get(source, 0) + 1
+
+    def summary(self):
+        """
+        Returns:
+        --------
+        dict : {origen: {'calls', 'errors', 'last_ms', 'p50_ms', 'p95_ms'}}
+        """
+        with self._lock:
+            result = {}
+            for source, latencies in self._latencies.items():
+                ordered = sorted(latencies)
+                result[source] = {
+                    'calls': self._calls[source],
+                    'errors': self._errors.get(source, 0),
+                    'last_ms': latencies[-1],
+                    'p50_ms': ordered[len(ordered) // 2],
+                    'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return result
+
+
+class BackendClient:
+    """Cliente del API con sesión compartida, reintentos y circuit breaker."""
+
+    def __init__(self, base_url, connect_timeout=API_CONNECT_TIMEOUT, read_timeout=API_READ_TIMEOUT,
+                 retries=API_RETRIES, backoff=API_RETRY_BACKOFF, pool_size=API_POOL_SIZE,
+                 breaker=None, deadline=API_DEADLINE):
+        """
+        Parameters:
+        -----------
+        base_url : str or None
+            URL base del API (None = solo predicción local)
+        connect_timeout, read_timeout : float
+            Segundos para conectar y para leer la respuesta (acotados por el plazo restante)
+        retries : int
+            Reintentos tras el primer intento
+        backoff : float
+            Espera base entre reintentos (se duplica en cada uno, con jitter)
+        pool_size : int
+            Conexiones que se mantienen abiertas
+        breaker : CircuitBreaker, optional
+        deadline : float
+            Segundos máximos por llamada a ``post``, reintentos y esperas incluidos
+        """
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.pool_size = pool_size
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.latencies = LatencyRecorder()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """``requests.Session`` con pool de conexiones, creada en el primer uso."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # Los reintentos los gestiona post(); el adaptador solo mantiene el pool
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def _retry_wait(self, attempt):
+        """Espera exponencial con jitter completo antes del reintento ``attempt`` (0, 1, ...)."""
+        return random.uniform(0, min(MAX_RETRY_WAIT, self.backoff * 2 ** attempt))
+
+    def _wait_for_retry(self, attempt, deadline_at):
+        """
+        Espera antes de reintentar si quedan reintentos y el siguiente intento
+        empieza dentro del plazo.
+
+        Returns:
+        --------
+        bool : True si se debe reintentar
+        """
+        if attempt >= self.retries:
+            return False
+        wait = self._retry_wait(attempt)
+        if time.perf_counter() + wait >= deadline_at:
+            return False
+        time.sleep(wait)
+        return True
+
+    def post(self, endpoint, payload):
+        """
+        Envía ``payload`` como JSON a ``endpoint`` y devuelve la respuesta decodificada.
+
+        Raises:
+        -------
+        BackendUnavailable : si el circuito está abierto (no se hace la llamada)
+        requests.exceptions.RequestException : si fallan todos los intentos, se
+            agota el plazo o el API responde con un error que no se reintenta
+        """
+        import requests
+
+        if not self.breaker.allow():
+            remaining = self.breaker.snapshot()['retry_in_seconds'] or 0.0
+            raise BackendUnavailable(f"El backend no responde; se volverá a intentar en {remaining:.0f} s")
+
+        url = f"{self.base_url}{endpoint}"
+        start = time.perf_counter()
+        deadline_at = start + self.deadline
+        try:
+            for attempt in range(self.retries + 1):
+                # Cada intento solo dispone del tiempo que queda hasta el plazo
+                remaining = max(0.001, deadline_at - time.perf_counter())
+                timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+                try:
+                    response = self.session.post(url, json=payload, timeout=timeout)
+                    if response.status_code in RETRY_STATUS_CODES and self._wait_for_retry(attempt, deadline_at):
+                        continue
+                    response.raise_for_status()
+                    result = response.json()
+                except requests.exceptions.ConnectionError:
+                    # Incluye ConnectTimeout: la petición no llegó al API
+                    if self._wait_for_retry(attempt, deadline_at):
+                        continue
+                    self._record_failure(start)
+                    raise
+                except requests.exceptions.Timeout:
+                    # ReadTimeout: el API recibió la petición y quizá siga con ella; no se repite
+                    self._record_failure(start)
+                    raise
+                except requests.exceptions.HTTPError as exc:
+                    if exc.response is not None and exc.response.status_code < 500 \
+                            and exc.response.status_code not in RETRY_STATUS_CODES:
+                        # Petición rechazada (ej. 422): el API está disponible
+                        self.breaker.record_success()
+                        self.latencies.record("remote", time.perf_counter() - start, ok=False)
+                    else:
+                        self._record_failure(start)
+                    raise
+                except requests.exceptions.RequestException:
+                    self._record_failure(start)
+                    raise
+
+                self.breaker.record_success()
+                self.latencies.record("remote", time.perf_counter() - start)
+                return result
+        finally:
+            self.breaker.release()
+
+    def _record_failure(self, start):
+        self.breaker.record_failure()
+        self.latencies.record("remote", time.perf_counter() - start, ok=False)
+
+    def run_local(self, fallback):
+        """Ejecuta la predicción local ``fallback()`` registrando su latencia."""
+        start = time.perf_counter()
+        try:
+            result = fallback()
+        except Exception:
+            self.latencies.record("local", time.perf_counter() - start, ok=False)
+            raise
+        self.latencies.record("local", time.perf_counter() - start)
+        return result
+
+    def status(self):
+        """
+        Returns:
+        --------
+        dict : {'base_url', 'breaker': estado del circuito, 'latency': resumen por origen}
+        """
+        return {
+            'base_url': self.base_url,
+            'breaker': self.breaker.snapshot(),
+            'latency': self.latencies.summary(),
+        }
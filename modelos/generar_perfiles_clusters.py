@@ -1,78 +1,46 @@
 """
-Script de ejemplo para generar perfiles de clusters para K-Means.
-Este script debe ejecutarse después de entrenar el modelo K-Means
-y analizar las características de cada cluster.
+Script para generar los perfiles de clusters de K-Means (cluster_profiles.pkl).
+Este script debe ejecutarse después de entrenar el modelo K-Means y copiar
+kmeans_model.pkl y credit_scaler.pkl a esta carpeta.
+
+Los perfiles se calculan en una sola pasada por bloques sobre el archivo de
+tarjetas de crédito (ver backend/cluster_profiles.py), así que funciona igual
+con el dataset original que con millones de cuentas:
+
+    python modelos/generar_perfiles_clusters.py "CC GENERAL.csv"
+    python modelos/generar_perfiles_clusters.py "CC GENERAL.csv" --json perfiles.json
 """
 
-import pickle
-import pandas as pd
-import numpy as np
+import os
+import sys
+
+# Permitir importar el backend al ejecutar el script directamente
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Ejemplo de cómo crear y guardar perfiles de clusters
-# Debes adaptar esto según tu análisis de los clusters
+from backend.bulk import DEFAULT_CHUNK_SIZE, iter_input_chunks
+from backend.cluster_profiles import DEFAULT_SAMPLE_SIZE, build_cluster_profiles, main
 
-def generar_perfiles_clusters(model, data, n_clusters):
+
+def generar_perfiles_clusters(data, chunk_size=DEFAULT_CHUNK_SIZE, sample_size=DEFAULT_SAMPLE_SIZE):
     """
-    Genera descripciones de perfiles para cada cluster.
-    
+    Genera los perfiles de cada cluster.
+
     Parameters:
     -----------
-    model : KMeans
-        Modelo K-Means entrenado
-    data : DataFrame
-        Datos originales (después de preprocesamiento)
-    n_clusters : int
-        Número de clusters
-    
+    data : DataFrame o str
+        Datos originales de tarjetas de crédito (sin escalar) o ruta a un CSV
+    chunk_size : int
+        Filas por bloque al leer un CSV
+    sample_size : int
+        Filas por cluster que se guardan para estimar los cuartiles
+
     Returns:
     --------
-    dict : Diccionario con perfiles de cada cluster
+    dict : {cluster: perfil} con estadísticas de las 17 variables y una descripción
     """
-    profiles = {}
-    
-    # Asignar clusters a los datos
-    clusters = model.predict(data)
-    
-    for i in range(n_clusters):
-        cluster_data = data[clusters == i]
-        
-        # Calcular estadísticas del cluster
-        # (Adapta estas métricas según las características de tu dataset)
-        profile = f"""
-        **Cluster {i}**
-        
-        **Características principales:**
-        - Número de clientes: {len(cluster_data)}
-        - Balance promedio: ${cluster_data['BALANCE'].mean():.2f}
-        - Compras promedio: ${cluster_data['PURCHASES'].mean():.2f}
-        - Límite de crédito promedio: ${cluster_data['CREDIT_LIMIT'].mean():.2f}
-        
-        **Perfil del cliente:**
-        [Describe aquí las características distintivas de este cluster]
-        
-        **Aplicaciones:**
-        [Describe posibles aplicaciones de negocio para este segmento]
-        """
-        
-        profiles[i] = profile
-    
-    return profiles
+    chunks = iter_input_chunks(data, "csv", chunk_size) if isinstance(data, str) else [data]
+    return build_cluster_profiles(chunks, sample_size)
 
-# Ejemplo de uso:
-# if __name__ == "__main__":
-#     # Cargar modelo y datos
-#     with open('kmeans_model.pkl', 'rb') as f:
-#         kmeans_model = pickle.load(f)
-#     
-#     # Cargar datos preprocesados
-#     # data = pd.read_csv('credit_card_data_preprocessed.csv')
-#     
-#     # Generar perfiles
-#     # profiles = generar_perfiles_clusters(kmeans_model, data, n_clusters=5)
-#     
-#     # Guardar perfiles
-#     # with open('cluster_profiles.pkl', 'wb') as f:
-#     #     pickle.dump(profiles, f)
-#     
-#     print("Perfiles generados y guardados en cluster_profiles.pkl")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Configuración común de las pruebas: el backend se importa como paquete desde la
+raíz del proyecto y el cliente del frontend desde ``frontend/``.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "frontend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
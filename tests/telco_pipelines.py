@@ -0,0 +1,55 @@
+"""
+Pipelines de Telco entrenados sobre datos sintéticos, con la misma estructura
+que los de los notebooks, para las pruebas de paridad.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from backend.feature_schema import TELCO_SCHEMA
+from backend.synthetic import synthetic_records
+
+NUMERIC_COLUMNS = ['SeniorCitizen', 'tenure', 'MonthlyCharges', 'TotalCharges']
+CATEGORICAL_COLUMNS = [column for column in TELCO_SCHEMA.columns if column not in NUMERIC_COLUMNS]
+
+
+def telco_records(n, seed):
+    """Registros preparados (formato de ``prepare_telco_input``)."""
+    return [TELCO_SCHEMA.map_record(record) for record in synthetic_records("telco", n, seed=seed)]
+
+
+def telco_pipeline(classifier, drop=None, handle_unknown='ignore', n=600, seed=1,
+                   categorical_first=False, remainder='drop'):
+    """
+    Pipeline (ColumnTransformer + ``classifier``) ajustado sobre registros sintéticos.
+
+    ``categorical_first`` y ``remainder`` generan variantes que la ruta compilada
+    no soporta; con ``remainder`` se añade la columna numérica 'Extra'.
+    """
+    df = pd.DataFrame(telco_records(n, seed))
+    rng = np.random.default_rng(seed)
+    y = ((df['tenure'] < 24) ^ (rng.random(n) < 0.2)).astype(int)
+    transformers = [
+        ('num', StandardScaler(), NUMERIC_COLUMNS),
+        ('cat', OneHotEncoder(drop=drop, handle_unknown=handle_unknown, sparse_output=False),
+         CATEGORICAL_COLUMNS),
+    ]
+    if categorical_first:
+        transformers.reverse()
+    if remainder != 'drop':
+        df['Extra'] = rng.normal(size=n)
+    preprocessor = ColumnTransformer(transformers, remainder=remainder)
+    return Pipeline([('preprocessor', preprocessor), ('classifier', classifier)]).fit(df, y)
+
+
+def logistic_pipeline(drop=None, handle_unknown='ignore', **layout):
+    return telco_pipeline(LogisticRegression(max_iter=1000), drop, handle_unknown, **layout)
+
+
+def knn_pipeline(drop=None, handle_unknown='ignore', **layout):
+    return telco_pipeline(KNeighborsClassifier(n_neighbors=5), drop, handle_unknown, **layout)
@@ -0,0 +1,80 @@
+"""Artefactos binarios frente a su pickle de origen."""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import artifacts, model_loader
+from backend.compiled_logistic import CompiledLogisticModel
+
+from telco_pipelines import knn_pipeline, logistic_pipeline, telco_records
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    path_in_tmp = lambda filename: str(tmp_path / filename)
+    monkeypatch.setattr(model_loader, "get_model_path", path_in_tmp)
+    monkeypatch.setattr(artifacts, "get_model_path", path_in_tmp)
+    monkeypatch.setattr(model_loader, "RELOAD_CHECK_INTERVAL", 0.0)
+    monkeypatch.setattr(model_loader, "MODEL_FORMAT", "auto")
+    model_loader.clear_model_registry()
+    model_loader._artifact_checks.clear()
+    yield tmp_path
+    model_loader.clear_model_registry()
+    model_loader._artifact_checks.clear()
+
+
+def _write_pickle(path, model):
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+
+@pytest.mark.parametrize("filename, pipeline, method", [
+    ("logreg_model.pkl", logistic_pipeline, "predict_proba"),
+    ("knn_model.pkl", knn_pipeline, "predict"),
+])
+def test_export_with_drop_first(models_dir, filename, pipeline, method):
+    pipeline = pipeline(drop='first')
+    _write_pickle(models_dir / filename, pipeline)
+    artifacts.export_artifact(filename)
+
+    loaded = model_loader.load_model(filename)
+    df = pd.DataFrame(telco_records(200, seed=4))
+    assert not hasattr(loaded, "steps")
+    assert np.array_equal(getattr(loaded, method)(df), getattr(pipeline, method)(df))
+    assert artifacts.check_artifact(filename) == 'ok'
+
+
+def test_replaced_pickle_wins_over_stale_artifact(models_dir, capsys):
+    path = models_dir / "logreg_model.pkl"
+    _write_pickle(path, logistic_pipeline())
+    artifacts.export_artifact("logreg_model.pkl")
+    assert isinstance(model_loader.get_model("logreg_model.pkl"), CompiledLogisticModel)
+
+    replacement = logistic_pipeline(drop='first')
+    _write_pickle(path, replacement)
+    assert artifacts.check_artifact("logreg_model.pkl") == 'stale'
+
+    reloaded = model_loader.get_model("logreg_model.pkl")
+    records = pd.DataFrame(telco_records(100, seed=6))
+    assert np.array_equal(reloaded.predict_proba(records), replacement.predict_proba(records))
+    assert "no corresponde al pickle actual" in capsys.readouterr().out
+
+    # Al volver a exportar se usa de nuevo el artefacto
+    artifacts.export_artifact("logreg_model.pkl")
+    assert isinstance(model_loader.get_model("logreg_model.pkl"), CompiledLogisticModel)
+
+
+def test_touched_pickle_keeps_artifact(models_dir):
+    path = models_dir / "logreg_model.pkl"
+    _write_pickle(path, logistic_pipeline())
+    artifacts.export_artifact("logreg_model.pkl")
+
+    # Mismo contenido con otro mtime (ej. una copia): el SHA-256 coincide
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert model_loader.resolve_model_path("logreg_model.pkl").endswith(model_loader.ARTIFACT_MANIFEST)
+    assert isinstance(model_loader.load_model("logreg_model.pkl"), CompiledLogisticModel)
@@ -0,0 +1,173 @@
+"""Circuit breaker y política de reintentos del cliente del frontend."""
+
+import types
+
+import pytest
+import requests
+
+import backend_client
+from backend_client import BackendClient, BackendUnavailable, CircuitBreaker
+
+
+class Clock:
+    """Reloj simulado: ``sleep`` y las llamadas al API avanzan el tiempo."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    fake_time = types.SimpleNamespace(monotonic=clock, perf_counter=clock, sleep=clock.sleep)
+    monkeypatch.setattr(backend_client, "time", fake_time)
+    return clock
+
+
+def test_breaker_state_machine(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.snapshot()['retry_in_seconds'] == pytest.approx(30)
+
+    # Pasado el enfriamiento se deja pasar una sola prueba
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # Una prueba fallida vuelve a abrir el circuito aunque no se llegue al umbral
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()['consecutive_failures'] == 0
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def _response(status, body=b'{"prediction": 1}'):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.url = "http://api/predict/logistic"
+    return response
+
+
+class ScriptedSession:
+    """Sesión que devuelve (o lanza) los resultados indicados en orden, cada uno tras ``latency`` s."""
+
+    def __init__(self, clock, outcomes, latency=0.1):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.latency = latency
+        self.timeouts = []
+
+    def post(self, url, json, timeout):
+        self.timeouts.append(timeout)
+        outcome = self.outcomes.pop(0)
+        self.clock.now += min(self.latency, timeout[1])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _client(clock, outcomes, **options):
+    options = {'retries': 2, 'backoff': 0.25, 'deadline': 10, **options}
+    client = BackendClient("http://api", breaker=CircuitBreaker(failure_threshold=3, cooldown=30), **options)
+    client._session = ScriptedSession(clock, outcomes)
+    return client
+
+
+@pytest.mark.parametrize("transient", [
+    requests.exceptions.ConnectionError("sin conexión"),
+    requests.exceptions.ConnectTimeout("sin conexión"),
+    _response(503),
+    _response(429),
+])
+def test_transient_errors_are_retried(clock, transient):
+    client = _client(clock, [transient, _response(200)])
+    assert client.post("/predict/logistic", {}) == {"prediction": 1}
+    assert len(client.session.timeouts) == 2
+    assert client.breaker.state == "closed"
+
+
+def test_read_timeout_is_not_retried(clock):
+    client = _client(clock, [requests.exceptions.ReadTimeout("lento"), _response(200)])
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.post("/predict/logistic", {})
+    assert len(client.session.timeouts) == 1
+    assert client.breaker.snapshot()['consecutive_failures'] == 1
+
+
+def test_client_errors_keep_breaker_closed(clock):
+    client = _client(clock, [_response(422, b'{"detail": "x"}')])
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.post("/predict/logistic", {})
+    assert len(client.session.timeouts) == 1
+    assert client.breaker.snapshot()['consecutive_failures'] == 0
+
+
+def test_retries_stop_at_the_deadline(clock):
+    # Cada intento fallido tarda 4 s: el tercero ya no empezaría dentro del plazo de 10 s
+    client = _client(clock, [requests.exceptions.ConnectionError("sin conexión")] * 3,
+                     retries=5, deadline=10)
+    client.session.latency = 4.0
+    start = clock.now
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.post("/predict/logistic", {})
+
+    assert clock.now - start <= 10
+    # Cada intento solo dispone del tiempo que queda hasta el plazo
+    assert all(read <= 10 for _, read in client.session.timeouts)
+    assert client.session.timeouts[-1][1] < client.session.timeouts[0][1]
+
+
+def test_open_breaker_skips_the_call(clock):
+    client = _client(clock, [requests.exceptions.ReadTimeout("lento")] * 3)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.post("/predict/logistic", {})
+    with pytest.raises(BackendUnavailable):
+        client.post("/predict/logistic", {})
+    assert len(client.session.timeouts) == 3
+
+
+def test_probe_is_released_after_unexpected_error(clock):
+    client = _client(clock, [requests.exceptions.ConnectionError("sin conexión")] * 3
+                     + [TypeError("no serializable"), _response(200)], retries=0)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post("/predict/logistic", {})
+
+    # La prueba falla sin pasar por record_success/record_failure
+    clock.now += 30
+    with pytest.raises(TypeError):
+        client.post("/predict/logistic", {})
+    assert client.breaker.state == "half_open"
+    assert client.post("/predict/logistic", {}) == {"prediction": 1}
+    assert client.breaker.state == "closed"
+
+
+def test_default_deadline_allows_the_read_timeout():
+    assert backend_client.API_DEADLINE >= backend_client.API_CONNECT_TIMEOUT + backend_client.API_READ_TIMEOUT
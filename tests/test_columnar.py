@@ -0,0 +1,59 @@
+"""Entrada por columnas: nulos en Arrow y vacíos de K-Means imputados con la media del escalador."""
+
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import predictors
+from backend.columnar import ColumnarFormatError, arrow_table_bytes, read_arrow_table, table_columns
+from backend.feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+from backend.synthetic import synthetic_records
+
+pytest.importorskip("pyarrow")
+
+
+def test_arrow_matches_map_columns():
+    records = synthetic_records("telco", 50, seed=1)
+    columns = table_columns(read_arrow_table(arrow_table_bytes(records, TELCO_SCHEMA), TELCO_SCHEMA), TELCO_SCHEMA)
+    expected = TELCO_SCHEMA.map_columns({name: [record[name] for record in records] for name in TELCO_SCHEMA.names})
+    for column, values in expected.items():
+        assert list(np.asarray(columns[column])) == list(values)
+
+
+@pytest.mark.parametrize("name, value", [("contract", None), ("tenure", None), ("monthly_charges", float("nan"))])
+def test_arrow_rejects_blank_values(name, value):
+    records = synthetic_records("telco", 10, seed=1)
+    records[3][name] = value
+    with pytest.raises(ColumnarFormatError, match=f"La columna {name} tiene valores vacíos"):
+        read_arrow_table(arrow_table_bytes(records, TELCO_SCHEMA), TELCO_SCHEMA)
+
+
+def test_kmeans_blanks_use_scaler_mean(monkeypatch):
+    means = np.arange(1.0, len(CREDIT_CARD_SCHEMA.fields) + 1)
+    assigned = []
+
+    def assign(X):
+        # Guarda la matriz que llega al motor de K-Means
+        assigned.append(X)
+        return np.zeros(len(X), dtype=np.int64), np.zeros(len(X)), types.SimpleNamespace(
+            describe=lambda clusters: [""] * len(clusters))
+
+    monkeypatch.setattr(predictors, "_credit_card_means", lambda: means)
+    monkeypatch.setattr(predictors, "_assign_kmeans_clusters", assign)
+
+    X = np.full((2, len(means)), 50.0)
+    X[0, CREDIT_CARD_SCHEMA.names.index("MINIMUM_PAYMENTS")] = np.nan
+    predictors.predict_kmeans_matrix(X)
+
+    frame = pd.DataFrame(X, columns=CREDIT_CARD_SCHEMA.names)
+    monkeypatch.setattr(predictors, "get_shared_model", lambda name: types.SimpleNamespace(mean=means))
+    prepared = predictors.prepare_credit_card_frame(frame)
+    np.testing.assert_array_equal(assigned[0], prepared.to_numpy(dtype=np.float64))
+
+    # Registros sueltos con el valor ausente
+    records = [dict(zip(CREDIT_CARD_SCHEMA.columns, row)) for row in X.tolist()]
+    del records[0]["MINIMUM_PAYMENTS"]
+    predictors.predict_kmeans_columns(records)
+    np.testing.assert_array_equal(assigned[1], assigned[0])
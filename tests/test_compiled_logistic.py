@@ -0,0 +1,89 @@
+"""Paridad bit a bit de la ruta compilada con ``Pipeline.predict_proba``."""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from backend.compiled_logistic import CompiledLogisticModel, get_compiled_logistic, random_records
+
+from telco_pipelines import NUMERIC_COLUMNS, logistic_pipeline, telco_records
+
+
+def _inputs(records):
+    """Las tres formas de entrada del codificador: registros, DataFrame y dict de arrays."""
+    df = pd.DataFrame(records)
+    columns = {name: df[name].to_numpy() for name in df.columns}
+    return {'records': records, 'frame': df, 'columns': columns}
+
+
+@pytest.mark.parametrize("drop", [None, 'first', 'if_binary'])
+def test_parity_with_unknown_categories(drop):
+    pipeline = logistic_pipeline(drop=drop)
+    compiled = CompiledLogisticModel.from_pipeline(pipeline)
+    records = random_records(compiled, 500, random_state=3, unknown_rate=0.05)
+
+    with warnings.catch_warnings():
+        # OneHotEncoder avisa de las categorías desconocidas cuando hay drop
+        warnings.simplefilter("ignore", UserWarning)
+        expected = pipeline.predict_proba(pd.DataFrame(records))
+    for kind, data in _inputs(records).items():
+        assert np.array_equal(compiled.predict_proba(data), expected), kind
+
+
+def test_parity_with_categorical_columns():
+    pipeline = logistic_pipeline(drop='first')
+    compiled = CompiledLogisticModel.from_pipeline(pipeline)
+    df = pd.DataFrame(telco_records(300, seed=5))
+    categorical = df.astype({name: 'category' for name in df.columns if name not in NUMERIC_COLUMNS})
+
+    assert np.array_equal(compiled.predict_proba(categorical), pipeline.predict_proba(df))
+
+
+def test_unknown_category_rejected_like_pipeline():
+    pipeline = logistic_pipeline(drop='first', handle_unknown='error')
+    compiled = CompiledLogisticModel.from_pipeline(pipeline)
+    records = telco_records(50, seed=7)
+    for kind, data in _inputs(records).items():
+        assert np.array_equal(compiled.predict_proba(data), pipeline.predict_proba(pd.DataFrame(records))), kind
+
+    records[10] = dict(records[10], Contract="Desconocido")
+    with pytest.raises(ValueError):
+        pipeline.predict_proba(pd.DataFrame(records))
+    for kind, data in _inputs(records).items():
+        with pytest.raises(ValueError, match="Contract"):
+            compiled.predict_proba(data)
+
+
+def test_arrays_round_trip_keeps_drop():
+    compiled = CompiledLogisticModel.from_pipeline(logistic_pipeline(drop='first', handle_unknown='error'))
+    restored = CompiledLogisticModel.from_arrays(*compiled.to_arrays())
+    records = telco_records(100, seed=9)
+
+    assert restored.encoder.matches(compiled.encoder)
+    assert np.array_equal(restored.predict_proba(records), compiled.predict_proba(records))
+
+
+def test_unsupported_pipeline_falls_back(capsys):
+    pipeline = logistic_pipeline()
+    # Un 'num' con imputador delante no tiene la forma que sabe compilar
+    preprocessor = pipeline[0]
+    name, scaler, columns = preprocessor.transformers_[0]
+    preprocessor.transformers_[0] = (name, make_pipeline(SimpleImputer(), StandardScaler()), columns)
+
+    assert get_compiled_logistic(pipeline) is pipeline
+    assert "se usa el Pipeline" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("layout", [{'categorical_first': True}, {'remainder': 'passthrough'}])
+def test_other_column_layouts_fall_back(layout, capsys):
+    # Con otro orden de bloques o columnas de más la matriz compilada no sería la del Pipeline
+    pipeline = logistic_pipeline(**layout)
+    with pytest.raises(ValueError):
+        CompiledLogisticModel.from_pipeline(pipeline)
+    assert get_compiled_logistic(pipeline) is pipeline
+    assert "se usa el Pipeline" in capsys.readouterr().out
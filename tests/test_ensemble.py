@@ -0,0 +1,108 @@
+"""Ensemble de churn: paridad con cada modelo, mezcla de probabilidades y preprocesado compartido."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import predictors
+from backend.compiled_logistic import CompiledTelcoEncoder
+from backend.feature_schema import TELCO_SCHEMA
+from backend.synthetic import synthetic_records
+
+from telco_pipelines import knn_pipeline, logistic_pipeline, telco_records
+
+
+@pytest.fixture(scope="module")
+def pipelines():
+    return {
+        'logistic': logistic_pipeline(drop='first'),
+        'knn': knn_pipeline(drop='first'),
+        'knn_other': knn_pipeline(drop=None),
+    }
+
+
+def _use_models(monkeypatch, logistic, knn, engine="compiled"):
+    models = {"logreg_model.pkl": logistic, "knn_model.pkl": knn}
+    monkeypatch.setattr(predictors, "get_model", models.get)
+    monkeypatch.setattr(predictors, "LOGISTIC_ENGINE", engine)
+
+
+@pytest.mark.parametrize("engine", ["compiled", "sklearn"])
+def test_results_match_each_model(monkeypatch, pipelines, engine):
+    _use_models(monkeypatch, pipelines['logistic'], pipelines['knn'], engine)
+    records = telco_records(200, seed=21)
+    threshold, weight = 0.4, 0.3
+
+    results = predictors.predict_churn_ensemble_batch(records, threshold, weight)
+    logistic = predictors.predict_logistic_regression_batch(records, threshold)
+    knn = predictors.predict_knn_batch(records)
+    knn_churn = pipelines['knn'].predict_proba(pd.DataFrame(records))[:, 1]
+
+    for result, expected_logistic, expected_knn, churn in zip(results, logistic, knn, knn_churn):
+        assert result['logistic'] == expected_logistic
+        assert result['knn'] == {**expected_knn, 'probability_churn': churn}
+
+        blended = weight * expected_logistic['probability_churn'] + (1 - weight) * churn
+        ensemble = result['ensemble']
+        assert ensemble['probability_churn'] == pytest.approx(blended)
+        assert ensemble['probability_no_churn'] == pytest.approx(1 - blended)
+        assert ensemble['prediction'] == int(blended > threshold)
+        assert ensemble['classification'] == ('Sí' if blended > threshold else 'No')
+        assert ensemble['logistic_weight'] == weight
+        assert result['agreement'] == (expected_logistic['prediction'] == expected_knn['prediction'])
+
+    # Con estos registros hay tanto acuerdos como desacuerdos
+    assert {result['agreement'] for result in results} == {True, False}
+
+
+def test_weight_extremes_follow_one_model(monkeypatch, pipelines):
+    _use_models(monkeypatch, pipelines['logistic'], pipelines['knn'])
+    records = telco_records(50, seed=22)
+
+    columns = predictors.predict_churn_ensemble_columns(records, logistic_weight=1.0)
+    assert np.array_equal(columns['ensemble_probability_churn'], columns['logistic_probability_churn'])
+    columns = predictors.predict_churn_ensemble_columns(records, logistic_weight=0.0)
+    assert np.array_equal(columns['ensemble_probability_churn'], columns['knn_probability_churn'])
+
+
+def test_encoder_shared_only_when_it_matches(monkeypatch, pipelines, capsys):
+    _use_models(monkeypatch, pipelines['logistic'], pipelines['knn'])
+    logistic_encoder, _, knn_encoder, _ = predictors._get_ensemble_plan()
+    assert knn_encoder is logistic_encoder
+    assert isinstance(logistic_encoder, CompiledTelcoEncoder)
+
+    # Otro drop en KNN: las matrices no coinciden y cada modelo codifica la suya
+    _use_models(monkeypatch, pipelines['logistic'], pipelines['knn_other'])
+    logistic_encoder, _, knn_encoder, _ = predictors._get_ensemble_plan()
+    assert knn_encoder is not logistic_encoder
+    assert not CompiledTelcoEncoder.from_column_transformer(pipelines['knn_other'][0]).matches(logistic_encoder)
+    assert "no comparten preprocesado" in capsys.readouterr().out
+
+    records = telco_records(100, seed=23)
+    results = predictors.predict_churn_ensemble_batch(records)
+    knn = predictors.predict_knn_batch(records)
+    assert [result['knn']['prediction'] for result in results] == [row['prediction'] for row in knn]
+
+
+def test_endpoints(monkeypatch, pipelines):
+    from backend.api import app
+
+    _use_models(monkeypatch, pipelines['logistic'], pipelines['knn'])
+    records = synthetic_records("telco", 20, seed=24)
+    expected = predictors.predict_churn_ensemble_batch(
+        [TELCO_SCHEMA.map_record(record) for record in records], 0.35, 0.6
+    )
+    params = {'threshold': 0.35, 'logistic_weight': 0.6}
+
+    with TestClient(app) as client:
+        response = client.post("/predict/ensemble/batch", json=records, params=params)
+        assert response.status_code == 200
+        assert response.json() == expected
+
+        response = client.post("/predict/ensemble", json=records[0], params=params)
+        assert response.status_code == 200
+        assert response.json() == predictors.predict_churn_ensemble(TELCO_SCHEMA.map_record(records[0]), 0.35, 0.6)
+
+        response = client.post("/predict/ensemble", json=records[0], params={'logistic_weight': 2})
+        assert response.status_code == 422
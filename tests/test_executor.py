@@ -0,0 +1,88 @@
+"""Límites del pool de inferencia: cola llena (429) y tiempo agotado (504)."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import app
+from backend.executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+from backend.synthetic import synthetic_frame
+
+
+def _blocking(event):
+    event.wait(5)
+    return "ok"
+
+
+def test_queue_full_rejects_immediately():
+    executor = InferenceExecutor(workers=1, max_pending=1, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run("knn", _blocking, release))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceQueueFull):
+            await executor.run("knn", _blocking, release)
+        # Los límites son por modelo: la cola de logistic sigue libre
+        assert executor.stats()["logistic"]["pending"] == 0
+        release.set()
+        return await first
+
+    try:
+        assert asyncio.run(scenario()) == "ok"
+        assert executor.stats()["knn"]["pending"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_timeout_counts_queue_wait():
+    executor = InferenceExecutor(workers=1, concurrency={"knn": 1}, timeout=0.2)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run("knn", _blocking, release))
+        await asyncio.sleep(0.05)
+        # La segunda petición espera el hueco de la primera y expira en la cola
+        with pytest.raises(InferenceTimeout):
+            await executor.run("knn", _blocking, release)
+        with pytest.raises(InferenceTimeout):
+            await running
+
+    try:
+        asyncio.run(scenario())
+        assert executor.stats()["knn"]["pending"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _bulk(client):
+    csv = synthetic_frame("telco", 50, style="dataset").to_csv(index=False)
+    return client.post("/predict/logistic/bulk", files={"file": ("telco.csv", csv)})
+
+
+@pytest.mark.parametrize("limits, status", [
+    ({"max_pending": 0}, 429),
+    ({"timeout": 0}, 504),
+])
+def test_bulk_goes_through_executor(client, limits, status):
+    original = app.state.executor
+    app.state.executor = InferenceExecutor(workers=1, **limits)
+    try:
+        assert _bulk(client).status_code == status
+    finally:
+        app.state.executor.shutdown()
+        app.state.executor = original
+
+    response = _bulk(client)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 50
@@ -0,0 +1,99 @@
+"""Conversión del formulario/API al formato de los modelos con ``FeatureSchema``."""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.feature_schema import CREDIT_CARD_SCHEMA, TELCO_SCHEMA
+from backend.synthetic import synthetic_frame, synthetic_records
+
+
+FORM = {
+    'gender': "Femenino", 'senior_citizen': "Sí", 'partner': "No", 'dependents': "Sí",
+    'tenure': 5, 'phone_service': "Sí", 'multiple_lines': "Sin servicio telefónico",
+    'internet_service': "Fibra óptica", 'online_security': "Sin servicio de internet",
+    'online_backup': "Sí", 'device_protection': "No", 'tech_support': "No",
+    'streaming_tv': "Sí", 'streaming_movies': "No", 'contract': "Dos años",
+    'paperless_billing': "Sí", 'payment_method': "Transferencia bancaria (automática)",
+    'monthly_charges': 89.1, 'total_charges': 445.5,
+}
+
+EXPECTED = {
+    'gender': "Female", 'SeniorCitizen': 1, 'Partner': "No", 'Dependents': "Yes",
+    'tenure': 5, 'PhoneService': "Yes", 'MultipleLines': "No phone service",
+    'InternetService': "Fiber optic", 'OnlineSecurity': "No internet service",
+    'OnlineBackup': "Yes", 'DeviceProtection': "No", 'TechSupport': "No",
+    'StreamingTV': "Yes", 'StreamingMovies': "No", 'Contract': "Two year",
+    'PaperlessBilling': "Yes", 'PaymentMethod': "Bank transfer (automatic)",
+    'MonthlyCharges': 89.1, 'TotalCharges': 445.5,
+}
+
+
+def test_map_record_translates_labels():
+    record = TELCO_SCHEMA.map_record(FORM)
+    assert record == EXPECTED
+    assert list(record) == TELCO_SCHEMA.columns
+
+
+def test_english_values_pass_through_and_flags_default():
+    form = dict(FORM, contract="Two year", senior_citizen="quizás", total_charges=None)
+    record = TELCO_SCHEMA.map_record(form)
+    assert record['Contract'] == "Two year"
+    assert record['SeniorCitizen'] == 0
+    assert record['TotalCharges'] == 0.0
+
+
+@pytest.mark.parametrize("container", [list, np.array, pd.Series])
+def test_map_columns_matches_map_record(container):
+    records = synthetic_records("telco", 200, seed=3)
+    columns = TELCO_SCHEMA.map_columns({
+        name: container([record[name] for record in records]) for name in TELCO_SCHEMA.names
+    })
+    assert columns['SeniorCitizen'].dtype == np.int64
+    assert columns['MonthlyCharges'].dtype == np.float64
+
+    for row, record in enumerate(records):
+        expected = TELCO_SCHEMA.map_record(record)
+        assert {column: values[row] for column, values in columns.items()} == expected
+
+
+def test_map_frame_accepts_dataset_columns():
+    # CSV original: nombres del dataset, valores en inglés y TotalCharges vacío con antigüedad 0
+    dataset = synthetic_frame("telco", 2000, style="dataset")
+    raw = pd.read_csv(io.StringIO(dataset.to_csv(index=False)))
+    prepared = TELCO_SCHEMA.map_frame(raw)
+
+    assert list(prepared.columns) == TELCO_SCHEMA.columns
+    assert prepared['TotalCharges'].notna().all()
+    assert (prepared.loc[raw['TotalCharges'].isna(), 'TotalCharges'] == 0.0).all()
+    pd.testing.assert_frame_equal(
+        prepared.drop(columns='TotalCharges'),
+        raw[TELCO_SCHEMA.columns].drop(columns='TotalCharges'),
+        check_dtype=False,
+    )
+
+    # Los mismos clientes con los nombres y las etiquetas del API dan el mismo resultado
+    api = synthetic_frame("telco", 2000, style="api")
+    pd.testing.assert_frame_equal(TELCO_SCHEMA.map_frame(api), prepared, check_dtype=False)
+
+
+def test_missing_columns_are_reported():
+    columns = {name: [1.0] for name in CREDIT_CARD_SCHEMA.names if name != "TENURE"}
+    with pytest.raises(ValueError, match="TENURE"):
+        CREDIT_CARD_SCHEMA.map_columns(columns)
+
+
+def test_credit_card_blanks_stay_missing():
+    # Sin valor por defecto: prepare_credit_card_frame los imputa con la media del escalador
+    values = [1.0] * len(CREDIT_CARD_SCHEMA.fields)
+    values[CREDIT_CARD_SCHEMA.names.index("MINIMUM_PAYMENTS")] = None
+    record = CREDIT_CARD_SCHEMA.map_values(values)
+    assert record['MINIMUM_PAYMENTS'] is None
+
+    columns = CREDIT_CARD_SCHEMA.map_columns({
+        name: [value, "2"] for name, value in zip(CREDIT_CARD_SCHEMA.names, values)
+    })
+    assert np.isnan(columns['MINIMUM_PAYMENTS'][0])
+    assert columns['TENURE'].tolist() == [1.0, 2.0]
@@ -0,0 +1,49 @@
+"""Paridad del motor K-Means fusionado con ``StandardScaler`` + ``KMeans`` de scikit-learn."""
+
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from backend.feature_schema import CREDIT_CARD_SCHEMA
+from backend.kmeans_engine import KMeansScoringEngine
+from backend.synthetic import synthetic_frame
+
+
+def _credit_card_matrix(n, seed):
+    """Matriz (n, 17) sin escalar de tarjetas sintéticas, con los vacíos en la media de la columna."""
+    frame = CREDIT_CARD_SCHEMA.map_frame(synthetic_frame("credit_card", n, seed=seed))
+    return frame.fillna(frame.mean()).to_numpy(dtype=np.float64)
+
+
+@pytest.fixture(scope="module")
+def models():
+    X = _credit_card_matrix(2000, seed=1)
+    scaler = StandardScaler().fit(X)
+    model = KMeans(n_clusters=6, n_init=3, random_state=0).fit(scaler.transform(X))
+    return model, scaler
+
+
+@pytest.mark.parametrize("chunk_rows", [65536, 97])
+def test_parity_with_scaler_and_kmeans(models, chunk_rows):
+    model, scaler = models
+    X = _credit_card_matrix(3000, seed=2)
+    engine = KMeansScoringEngine.from_models(model, scaler, chunk_rows=chunk_rows)
+
+    clusters, distances = engine.assign(X)
+
+    scaled = scaler.transform(X)
+    assert np.array_equal(clusters, model.predict(scaled))
+    expected = model.transform(scaled)[np.arange(len(X)), clusters]
+    np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_arrays_round_trip(models):
+    engine = KMeansScoringEngine.from_models(*models)
+    restored = KMeansScoringEngine.from_arrays(*engine.to_arrays())
+    X = _credit_card_matrix(500, seed=3)
+
+    clusters, distances = engine.assign(X)
+    restored_clusters, restored_distances = restored.assign(X)
+    assert np.array_equal(restored_clusters, clusters)
+    assert np.array_equal(restored_distances, distances)
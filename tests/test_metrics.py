@@ -0,0 +1,63 @@
+"""Registro de métricas: pausa durante el calentamiento y endpoints con el modelo en la ruta."""
+
+import asyncio
+
+import pytest
+
+from backend import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    metrics.REGISTRY.clear()
+    yield metrics.REGISTRY
+    metrics.REGISTRY.clear()
+
+
+def _series(registry):
+    return {name: samples for name, _, _, samples in registry.families() if samples}
+
+
+def test_paused_records_nothing(enabled):
+    with metrics.paused():
+        with metrics.stage("knn", "transform"):
+            pass
+        metrics.observe_stage("knn", "queue", 0.01)
+        metrics.observe_batch_size("knn", "batch", 10)
+        metrics.count_error("knn", "ValueError")
+    # Ni siquiera series vacías
+    assert _series(enabled) == {}
+
+    with metrics.stage("knn", "transform"):
+        pass
+    assert "ml_stage_duration_seconds" in _series(enabled)
+
+
+def _call(endpoint, **kwargs):
+    """Ejecuta el endpoint como lo haría el middleware y devuelve el modelo anotado."""
+    request = {'status': 200, 'model': None, 'handler': 0.0}
+    token = metrics._current_request.set(request)
+    try:
+        asyncio.run(endpoint(**kwargs))
+    finally:
+        metrics._current_request.reset(token)
+    return request['model']
+
+
+def test_instrumented_takes_model_from_path(enabled):
+    @metrics.instrumented(models=("logistic", "knn"))
+    async def endpoint(model_name):
+        return model_name
+
+    assert _call(endpoint, model_name="knn") == "knn"
+    # Un nombre arbitrario en la URL no se usa como etiqueta
+    assert _call(endpoint, model_name="desconocido") is None
+
+
+def test_instrumented_fixed_model(enabled):
+    @metrics.instrumented("kmeans")
+    async def endpoint():
+        return None
+
+    assert _call(endpoint) == "kmeans"
@@ -0,0 +1,94 @@
+"""Micro-batching: agrupación de peticiones concurrentes, reparto de resultados y errores."""
+
+import asyncio
+
+import pytest
+
+from backend.microbatch import MicroBatcher
+
+
+class Recorder:
+    """``run_batch`` que guarda cada lote y devuelve (registro, opciones) por registro."""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def __call__(self, records, *options):
+        self.batches.append((list(records), options))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [(record, options) for record in records]
+
+
+def test_concurrent_submits_share_a_batch():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_wait_ms=50, max_batch_size=4)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i, 0.5) for i in range(4)))
+
+    # Cada petición recibe el resultado de su propio registro
+    assert asyncio.run(scenario()) == [(i, (0.5,)) for i in range(4)]
+    assert run_batch.batches == [([0, 1, 2, 3], (0.5,))]
+    assert batcher.stats()['max_batch_size'] == 4
+
+
+def test_options_are_batched_separately():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_wait_ms=10, max_batch_size=64)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit("a", 0.3), batcher.submit("b", 0.7), batcher.submit("c", 0.3))
+
+    assert asyncio.run(scenario()) == [("a", (0.3,)), ("b", (0.7,)), ("c", (0.3,))]
+    assert sorted(run_batch.batches) == [(["a", "c"], (0.3,)), (["b"], (0.7,))]
+
+
+def test_partial_batch_flushes_after_max_wait():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_wait_ms=20, max_batch_size=64)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == [(1, ()), (2, ())]
+    assert run_batch.batches == [([1, 2], ())]
+    assert 0.015 <= elapsed < 1.0
+
+
+def test_batch_error_reaches_every_caller():
+    run_batch = Recorder(error=ValueError("modelo roto"))
+    batcher = MicroBatcher(run_batch, max_wait_ms=10, max_batch_size=64)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(run_batch.batches) == 1
+    assert all(isinstance(result, ValueError) and str(result) == "modelo roto" for result in results)
+
+
+def test_batcher_keeps_working_after_an_error():
+    outcomes = [ValueError("fallo"), None]
+
+    async def run_batch(records):
+        error = outcomes.pop(0)
+        if error is not None:
+            raise error
+        return records
+
+    batcher = MicroBatcher(run_batch, max_wait_ms=5, max_batch_size=64)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+        return await batcher.submit(2)
+
+    assert asyncio.run(scenario()) == 2
+    assert batcher.stats()['batches'] == 2
@@ -0,0 +1,59 @@
+"""Índices de vecinos frente al Pipeline KNN y a la búsqueda exacta."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+from backend.neighbors import (BruteForceIndex, IndexedKNNClassifier, RandomProjectionIndex,
+                               evaluate_index, get_indexed_classifier)
+
+from telco_pipelines import knn_pipeline, telco_pipeline, telco_records
+
+
+@pytest.mark.parametrize("kind", ['brute', 'kd_tree', 'ball_tree'])
+@pytest.mark.parametrize("drop", [None, 'first'])
+def test_exact_index_matches_pipeline(kind, drop):
+    pipeline = knn_pipeline(drop=drop)
+    classifier = IndexedKNNClassifier.from_pipeline(pipeline, kind)
+    df = pd.DataFrame(telco_records(300, seed=11))
+
+    assert np.array_equal(classifier.predict(df), pipeline.predict(df))
+    assert np.array_equal(classifier.predict_proba_encoded(classifier.transform(df)), pipeline.predict_proba(df))
+
+
+@pytest.mark.parametrize("layout", [{'categorical_first': True}, {'remainder': 'passthrough'}])
+def test_other_column_layouts_are_not_indexed(layout):
+    with pytest.raises(ValueError):
+        IndexedKNNClassifier.from_pipeline(knn_pipeline(**layout), 'brute')
+
+
+def test_random_projection_reranks_exactly():
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(2000, 20))
+    queries = data[rng.integers(0, 2000, 300)] + rng.normal(scale=0.05, size=(300, 20))
+    # Con muchos bits hay cubos con menos de k puntos y esas filas van a la búsqueda exacta
+    index = RandomProjectionIndex(data, n_tables=4, n_bits=10)
+
+    distances, indices = index.query(queries, 5)
+    assert indices.shape == (300, 5)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+    assert np.allclose(distances, np.linalg.norm(data[indices] - queries[:, None, :], axis=2))
+
+    _, exact = BruteForceIndex(data).query(queries, 5)
+    assert np.mean(indices[:, 0] == exact[:, 0]) > 0.9
+
+
+def test_evaluate_index_reports_agreement_with_pipeline():
+    pipeline = knn_pipeline(drop='first')
+    result = evaluate_index(pipeline, 'brute', pd.DataFrame(telco_records(200, seed=13)))
+
+    assert result['recall_at_k'] == 1.0
+    assert result['label_agreement'] == 1.0
+
+
+def test_unsupported_pipeline_falls_back(capsys):
+    pipeline = telco_pipeline(KNeighborsClassifier(n_neighbors=5, weights='distance'))
+
+    assert get_indexed_classifier(pipeline, 'brute') is pipeline
+    assert "se usa el Pipeline" in capsys.readouterr().out
@@ -0,0 +1,117 @@
+"""Caché de resultados: claves canónicas, LRU/TTL e invalidación por versión del modelo."""
+
+import pickle
+import types
+
+import numpy as np
+import pytest
+
+from backend import model_loader, result_cache
+from backend.result_cache import ResultCache, canonical_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Versión de cada modelo controlada por la prueba."""
+    versions = {"logistic": ("v1",), "knn": ("v1",), "kmeans": ("v1",)}
+    monkeypatch.setattr(result_cache, "model_version", lambda name: versions[name])
+    return versions
+
+
+RECORD = {'tenure': 12, 'Contract': 'Month-to-month', 'MonthlyCharges': 70.5}
+
+
+def test_canonical_key_ignores_order_and_numeric_type():
+    same = {'MonthlyCharges': np.float64(70.5), 'Contract': 'Month-to-month', 'tenure': 12.0}
+    assert canonical_key(same) == canonical_key(RECORD)
+    assert canonical_key({'TotalCharges': float('nan')}) == canonical_key({'TotalCharges': None})
+
+
+def test_options_are_part_of_the_key(clock, versions):
+    cache = ResultCache(check_interval=2.0)
+    cache.put(cache.key("logistic", RECORD, (0.5,)), {'prediction': 1})
+
+    assert cache.get(cache.key("logistic", RECORD, (0.5,))) == {'prediction': 1}
+    assert cache.get(cache.key("logistic", RECORD, (0.3,))) is None
+
+
+def test_version_change_invalidates_only_that_model(clock, versions):
+    cache = ResultCache(check_interval=2.0)
+    cache.put(cache.key("logistic", RECORD), {'prediction': 1})
+    cache.put(cache.key("knn", RECORD), {'prediction': 0})
+
+    versions["logistic"] = ("v2",)
+    # Hasta la siguiente comprobación se sigue usando la versión conocida
+    clock.now += 1.0
+    assert cache.get(cache.key("logistic", RECORD)) == {'prediction': 1}
+
+    clock.now += 1.5
+    key = cache.key("logistic", RECORD)
+    assert cache.get(key) is None
+    assert cache.stats()['invalidations'] == 1
+    assert cache.get(cache.key("knn", RECORD)) == {'prediction': 0}
+
+    # Durante un intervalo tras el cambio no se guardan resultados (workers recargando)
+    cache.put(key, {'prediction': 0})
+    assert cache.get(key) is None
+    clock.now += 2.0
+    key = cache.key("logistic", RECORD)
+    cache.put(key, {'prediction': 0})
+    assert cache.get(key) == {'prediction': 0}
+
+
+def test_lru_and_ttl(clock, versions):
+    cache = ResultCache(max_size=2, ttl=10.0, check_interval=2.0)
+    keys = [cache.key("kmeans", {'BALANCE': value}) for value in range(3)]
+    cache.put(keys[0], {'cluster': 0})
+    cache.put(keys[1], {'cluster': 1})
+    cache.get(keys[0])
+    cache.put(keys[2], {'cluster': 2})
+
+    # keys[1] era la menos usada
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == {'cluster': 0}
+    assert cache.stats()['evictions'] == 1
+
+    clock.now += 11.0
+    assert cache.get(keys[2]) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_returned_results_are_copies(clock, versions):
+    cache = ResultCache()
+    key = cache.key("knn", RECORD)
+    cache.put(key, {'prediction': 1})
+    cache.get(key)['prediction'] = 0
+    assert cache.get(key) == {'prediction': 1}
+
+
+def test_replaced_pickle_changes_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader, "get_model_path", lambda filename: str(tmp_path / filename))
+    monkeypatch.setattr(model_loader, "MODEL_FORMAT", "pickle")
+    for filename in ("logreg_model.pkl", "knn_model.pkl"):
+        (tmp_path / filename).write_bytes(pickle.dumps("v1"))
+    before = {name: result_cache.model_version(name) for name in ("logistic", "knn", "ensemble")}
+
+    (tmp_path / "knn_model.pkl").write_bytes(pickle.dumps("version 2"))
+    after = {name: result_cache.model_version(name) for name in ("logistic", "knn", "ensemble")}
+
+    assert after["logistic"] == before["logistic"]
+    assert after["knn"] != before["knn"]
+    # El ensemble depende de los dos modelos de churn
+    assert after["ensemble"] != before["ensemble"]
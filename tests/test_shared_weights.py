@@ -0,0 +1,38 @@
+"""Directorio de los pesos compartidos: propio del usuario y versionado por formato."""
+
+import os
+import stat
+
+import pytest
+
+from backend import shared_weights
+
+
+@pytest.fixture
+def no_models(monkeypatch):
+    # Sin pickles de origen: se exporta un manifiesto vacío
+    monkeypatch.setattr(shared_weights, "load_model", lambda filename: None)
+
+
+def test_export_directory_is_private(tmp_path, no_models):
+    directory = tmp_path / "weights"
+    path = shared_weights.export_shared_weights(str(directory))
+
+    assert stat.S_IMODE(os.stat(directory).st_mode) & 0o077 == 0
+    assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+    # La versión ya exportada se reutiliza
+    assert shared_weights.export_shared_weights(str(directory)) == path
+
+
+def test_foreign_versions_are_rejected(tmp_path, no_models, monkeypatch):
+    path = shared_weights.export_shared_weights(str(tmp_path))
+    monkeypatch.setattr(shared_weights, "_current_uid", lambda: os.stat(path).st_uid + 1)
+    with pytest.raises(PermissionError):
+        shared_weights.export_shared_weights(str(tmp_path))
+
+
+def test_version_includes_export_format(monkeypatch):
+    signatures = {"logreg_model.pkl": [1, 2]}
+    before = shared_weights.weights_version(signatures)
+    monkeypatch.setattr(shared_weights, "EXPORT_FORMAT_VERSION", shared_weights.EXPORT_FORMAT_VERSION + 1)
+    assert shared_weights.weights_version(signatures) != before
@@ -0,0 +1,48 @@
+"""Módulos prohibidos del presupuesto de arranque."""
+
+from backend.startup_bench import check_target, unconditional_imports
+
+
+SCRIPT = '''
+import os
+from . import wire
+from .predictors import predict_knn
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+with open(os.devnull):
+    import requests
+
+if os.getenv("X"):
+    import plotly.graph_objects as go
+
+
+def chart():
+    import pandas
+'''
+
+
+def test_unconditional_imports_skip_functions_and_branches(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text(SCRIPT, encoding="utf-8")
+    assert unconditional_imports(path, "backend") == {
+        "os", "backend.wire", "backend.predictors", "orjson", "requests",
+    }
+
+
+def test_forbidden_module_loaded_by_the_reference():
+    budget = {"frontend": {"forbidden": ["plotly"]}}
+    result = {"modules": {"streamlit", "plotly", "plotly.graph_objects"}}
+    reference = {"streamlit", "plotly", "plotly.graph_objects"}
+
+    # Lo importa streamlit: no es un problema mientras el script no lo importe siempre
+    assert check_target("frontend", result, budget, 0.5, reference_modules=reference) == []
+    problems = check_target("frontend", result, budget, 0.5, reference_modules=reference,
+                            source_imports={"plotly.graph_objects"})
+    assert problems == ["frontend: importa plotly al cargar el módulo (no al primer uso)"]
+
+    # Sin la referencia, el import en tiempo de ejecución basta para fallar
+    assert check_target("frontend", result, budget, 0.5) == ["frontend: importa plotly al arrancar"]